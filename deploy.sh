@@ -54,6 +54,7 @@ RUNTIME_PATHS=(
     "data/stunnel-rtmps.conf"
     "data/stunnel-rtmps.merged.conf"
     "data/rtmps-enabled"
+    "data/rtmps-ports.json"
     "data/stream-status.json"
     "data/overlays"
 )
@@ -124,6 +125,7 @@ FORCE_FILES=(
     "scripts/admin-api.py"
     "scripts/restream-apply.sh"
     "scripts/restream-generate.py"
+    "scripts/restream_apply.py"
     "setup-oracle.sh"
 )
 BACKUP_DIR=""
@@ -150,6 +152,10 @@ chmod +x "${REPO_DIR}/scripts/ffmpeg-abr.sh" \
   "${REPO_DIR}/scripts/restream-apply.sh" \
   "${REPO_DIR}/scripts/restream-generate.py" \
   "${REPO_DIR}/scripts/admin-api.py" \
+  "${REPO_DIR}/scripts/hls-viewers.py" \
+  "${REPO_DIR}/scripts/overlay-bench.py" \
+  "${REPO_DIR}/scripts/admin-api-bench.py" \
+  "${REPO_DIR}/scripts/hotpath-bench.py" \
   "${REPO_DIR}/scripts/hls-viewers.sh" 2>/dev/null || true
 
 # Ensure data directory exists and defaults are present
@@ -456,13 +462,16 @@ EOF
     fi
 fi
 
-# Install/update HLS viewer counter timer (server only)
+# Install/update HLS viewer counter service (server only)
 if command -v systemctl >/dev/null 2>&1; then
+    # The viewer counter used to be a timer-driven oneshot; it now follows the log continuously.
+    sudo systemctl disable --now hls-viewers.timer >/dev/null 2>&1 || true
+    sudo rm -f /etc/systemd/system/hls-viewers.timer
     sudo cp "${REPO_DIR}/scripts/hls-viewers.service" /etc/systemd/system/hls-viewers.service
-    sudo cp "${REPO_DIR}/scripts/hls-viewers.timer" /etc/systemd/system/hls-viewers.timer
     sudo cp "${REPO_DIR}/scripts/redstudio-admin.service" /etc/systemd/system/redstudio-admin.service
     sudo systemctl daemon-reload
-    sudo systemctl enable --now hls-viewers.timer >/dev/null 2>&1 || true
+    sudo systemctl enable --now hls-viewers.service >/dev/null 2>&1 || true
+    sudo systemctl restart hls-viewers.service >/dev/null 2>&1 || true
     sudo systemctl enable --now redstudio-admin.service >/dev/null 2>&1 || true
     sudo systemctl restart redstudio-admin.service >/dev/null 2>&1 || true
 fi
@@ -5,8 +5,8 @@ import { showToast, getErrorMessage, copyToClipboard, generateKey } from './util
 import { normalizeOverlayItem, normalizeOverlays, renderOverlays, bindOverlayEvents } from './overlays.js';
 import { mergeDefaults, renderDestinations, bindDestinationEvents } from './destinations.js';
 import { updateEmbedUi, bindEmbedEvents, setEmbedStatus } from './embed.js';
-import { loadMetrics } from './metrics.js';
-import { loadHealth } from './health.js';
+import { loadMetrics, renderMetrics } from './metrics.js';
+import { loadHealth, renderHealth } from './health.js';
 import { initPreviewPlayer } from './preview.js';
 import { normalizeTicker, renderTicker, bindTickerEvents } from './ticker.js';
 
@@ -70,6 +70,29 @@ async function waitForOrigin(timeoutMs = 12000) {
     return false;
 }
 
+async function waitForApplyJob(jobId, timeoutMs = 120000) {
+    const start = Date.now();
+    while (Date.now() - start < timeoutMs) {
+        try {
+            const res = await fetch(`${API_BASE}/restream/apply/${encodeURIComponent(jobId)}`, { cache: 'no-store' });
+            if (res.status === 401) {
+                window.location.href = '/admin/login.html';
+                return null;
+            }
+            if (res.ok) {
+                const job = await res.json();
+                if (job.status === 'applied' || job.status === 'failed') {
+                    return job;
+                }
+            }
+        } catch (err) {
+            // nginx may be restarting; keep polling
+        }
+        await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+    return null;
+}
+
 async function waitForStreamHealth(timeoutMs = 15000) {
     const start = Date.now();
     while (Date.now() - start < timeoutMs) {
@@ -102,28 +125,34 @@ async function confirmTickerSaved() {
     if (!desired.enabled && !desired.text) {
         return;
     }
-    try {
-        const res = await fetch('/public-config.json', { cache: 'no-store' });
-        if (!res.ok) {
+    // Saves are written to disk after a short debounce, so allow a few polls.
+    for (let attempt = 0; attempt < 4; attempt += 1) {
+        try {
+            const res = await fetch('/public-config.json', { cache: 'no-store' });
+            if (!res.ok) {
+                return;
+            }
+            const data = await res.json();
+            const saved = normalizeTicker(data.ticker);
+            const desiredItems = Array.isArray(desired.items) ? desired.items : [];
+            const savedItems = Array.isArray(saved.items) ? saved.items : [];
+            const mismatch = saved.enabled !== desired.enabled
+                || saved.speed !== desired.speed
+                || saved.font_size !== desired.font_size
+                || saved.height !== desired.height
+                || saved.background !== desired.background
+                || saved.separator !== desired.separator
+                || JSON.stringify(savedItems) !== JSON.stringify(desiredItems);
+            if (!mismatch) {
+                return;
+            }
+        } catch (err) {
+            // Ignore ticker confirmation errors
             return;
         }
-        const data = await res.json();
-        const saved = normalizeTicker(data.ticker);
-        const desiredItems = Array.isArray(desired.items) ? desired.items : [];
-        const savedItems = Array.isArray(saved.items) ? saved.items : [];
-        const mismatch = saved.enabled !== desired.enabled
-            || saved.speed !== desired.speed
-            || saved.font_size !== desired.font_size
-            || saved.height !== desired.height
-            || saved.background !== desired.background
-            || saved.separator !== desired.separator
-            || JSON.stringify(savedItems) !== JSON.stringify(desiredItems);
-        if (mismatch) {
-            showToast('Ticker did not persist. Restart the admin API and save again.', 'error');
-        }
-    } catch (err) {
-        // Ignore ticker confirmation errors
+        await new Promise((resolve) => setTimeout(resolve, 400));
     }
+    showToast('Ticker did not persist. Restart the admin API and save again.', 'error');
 }
 
 async function ensureSession() {
@@ -148,6 +177,7 @@ async function loadConfig() {
             return;
         }
         const payload = await res.json();
+        state.revision = Number.isInteger(payload.revision) ? payload.revision : null;
         state.ingest_key = payload.ingest_key || '';
         state.public_live = typeof payload.public_live === 'boolean' ? payload.public_live : true;
         state.public_hls = typeof payload.public_hls === 'boolean' ? payload.public_hls : true;
@@ -192,6 +222,16 @@ async function saveConfig(apply) {
             return;
         }
 
+        if (res.status === 409) {
+            if (dom.status) {
+                dom.status.textContent = 'Changed elsewhere; reloaded';
+                dom.status.className = 'status error';
+            }
+            showToast('Settings were changed in another session. Reloaded the latest; review and save again.', 'error');
+            await loadConfig();
+            return;
+        }
+
         if (!res.ok) {
             const errorMessage = await getErrorMessage(res);
             if (dom.status) {
@@ -202,6 +242,11 @@ async function saveConfig(apply) {
             return;
         }
 
+        const saved = await res.json();
+        if (Number.isInteger(saved.revision)) {
+            state.revision = saved.revision;
+        }
+
         await confirmTickerSaved();
 
         if (apply) {
@@ -253,6 +298,25 @@ async function saveConfig(apply) {
                 } catch (err) {
                     applyPayload = {};
                 }
+                if (applyPayload.id && applyPayload.status !== 'applied' && applyPayload.status !== 'failed') {
+                    const job = await waitForApplyJob(applyPayload.id);
+                    if (!job) {
+                        if (dom.status) {
+                            dom.status.textContent = 'Saved, apply still running';
+                        }
+                        showToast('Apply is still running; check again shortly.', 'info');
+                        return;
+                    }
+                    applyPayload = job;
+                }
+                if (applyPayload.status === 'failed') {
+                    if (dom.status) {
+                        dom.status.textContent = 'Apply failed';
+                        dom.status.className = 'status error';
+                    }
+                    showToast(applyPayload.error || 'Apply failed', 'error');
+                    return;
+                }
                 if (applyPayload.reconnect === 'failed') {
                     if (dom.status) {
                         dom.status.textContent = 'Saved, reconnect failed';
@@ -418,15 +482,52 @@ function bindEvents() {
     bindTickerEvents();
 }
 
+let polling = false;
+
+function startPolling() {
+    if (polling) {
+        return;
+    }
+    polling = true;
+    loadMetrics();
+    setInterval(loadMetrics, 5000);
+    loadHealth();
+    setInterval(loadHealth, 5000);
+}
+
+function startLiveUpdates() {
+    if (typeof window.EventSource !== 'function') {
+        startPolling();
+        return;
+    }
+    const source = new EventSource(`${API_BASE}/events`);
+    let opened = false;
+    source.addEventListener('open', () => {
+        opened = true;
+    });
+    source.addEventListener('metrics', (event) => {
+        renderMetrics(JSON.parse(event.data));
+    });
+    source.addEventListener('health', (event) => {
+        renderHealth(JSON.parse(event.data));
+    });
+    source.addEventListener('error', () => {
+        // CLOSED means EventSource gave up (503 at the subscriber cap, 401 after the
+        // session expired, a proxy answering without an event stream); it does not
+        // retry on its own, so fall back to polling whether or not it ever opened.
+        if (!opened || source.readyState === EventSource.CLOSED) {
+            source.close();
+            startPolling();
+        }
+    });
+}
+
 bindEvents();
 
 ensureSession().then((ok) => {
     if (ok) {
         loadConfig();
-        loadMetrics();
-        setInterval(loadMetrics, 5000);
-        loadHealth();
-        setInterval(loadHealth, 5000);
+        startLiveUpdates();
         updateEmbedUi();
         setEmbedStatus('', 'info');
         initPreviewPlayer();
@@ -43,6 +43,7 @@ export const overlayDefaults = {
     id: '',
     enabled: false,
     image_file: '',
+    image_name: '',
     position: 'top-right',
     offset_x: 24,
     offset_y: 24,
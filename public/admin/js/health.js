@@ -1,7 +1,7 @@
 import { API_BASE } from './constants.js';
 import { dom } from './dom.js';
 
-function renderHealth(report) {
+export function renderHealth(report) {
     if (!dom.healthList || !dom.healthStatus || !dom.healthMeta) {
         return;
     }
@@ -30,8 +30,10 @@ function renderHealth(report) {
         item.className = 'health-item';
         item.innerHTML = `
             <span class="health-badge ${level}">${level}</span>
-            <span>${warning.message || 'Check recommended settings.'}</span>
+            <span></span>
         `;
+        // Messages can quote destination names, so they go in as text.
+        item.lastElementChild.textContent = warning.message || 'Check recommended settings.';
         dom.healthList.appendChild(item);
     });
 
@@ -54,6 +56,13 @@ function renderHealth(report) {
     } else {
         parts.push('Live: idle');
     }
+    const pushes = (report.push && Array.isArray(report.push.destinations)) ? report.push.destinations : [];
+    if (pushes.length) {
+        const connected = pushes.filter((push) => push.connected);
+        const rates = connected.map((push) => push.bw_out_kbps).filter((value) => typeof value === 'number');
+        const rate = rates.length ? `, ${(rates.reduce((sum, value) => sum + value, 0) / 1000).toFixed(1)} Mbps out` : '';
+        parts.push(`Pushes: ${connected.length}/${pushes.length} connected${rate}`);
+    }
     if (overlays.enabled) {
         parts.push(`Overlays: ${overlays.count || 0} enabled`);
     } else {
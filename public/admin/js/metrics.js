@@ -2,7 +2,7 @@ import { API_BASE } from './constants.js';
 import { dom } from './dom.js';
 import { formatNumber } from './utils.js';
 
-function renderMetrics(data) {
+export function renderMetrics(data) {
     if (!dom.metricsStatus || !dom.cpuValue || !dom.cpuSub || !dom.memValue || !dom.memSub || !dom.diskValue || !dom.diskSub || !dom.netValue || !dom.netSub) {
         return;
     }
@@ -135,6 +135,7 @@ export function normalizeOverlayItem(raw) {
     const rotateValue = Number(overlay.rotate);
     overlay.rotate = Number.isFinite(rotateValue) ? Math.min(180, Math.max(-180, rotateValue)) : overlayDefaults.rotate;
     overlay.image_file = typeof overlay.image_file === 'string' ? overlay.image_file : '';
+    overlay.image_name = typeof overlay.image_name === 'string' ? overlay.image_name : '';
     overlay.enabled = Boolean(overlay.enabled);
 
     return overlay;
@@ -202,7 +203,7 @@ function updateOverlayFileName(item, overlay) {
     }
     const input = item.querySelector('[data-field="image-input"]');
     const selected = input && input.files && input.files[0] ? input.files[0].name : '';
-    const current = overlay.image_file ? `Current: ${overlay.image_file}` : 'No image uploaded';
+    const current = overlay.image_file ? `Current: ${overlayImageLabel(overlay)}` : 'No image uploaded';
     label.textContent = selected ? `${current} | Selected: ${selected}` : current;
 
     const pathLabel = item ? item.querySelector('[data-field="public-path"]') : null;
@@ -222,7 +223,7 @@ function updateOverlaySummary(item, overlay) {
     const sizeText = overlay.size_mode === 'px'
         ? `${overlay.size_value}px`
         : `${overlay.size_value}%`;
-    const imageText = overlay.image_file ? overlay.image_file : 'none';
+    const imageText = overlay.image_file ? overlayImageLabel(overlay) : 'none';
     const parts = [
         `Image: ${imageText}`,
         `Size: ${sizeText}`,
@@ -281,6 +282,14 @@ function buildOverlayUrl(filename) {
     return `/admin/overlays/${encodeURIComponent(filename)}`;
 }
 
+function isContentAddressed(filename) {
+    return /^[0-9a-f]{64}\.(png|jpg|webp)$/.test(filename);
+}
+
+function overlayImageLabel(overlay) {
+    return overlay.image_name || overlay.image_file;
+}
+
 function refreshOverlayPreview(item, overlay) {
     const preview = item ? item.querySelector('[data-field="preview"]') : null;
     const placeholder = item ? item.querySelector('[data-field="preview-placeholder"]') : null;
@@ -293,7 +302,10 @@ function refreshOverlayPreview(item, overlay) {
         setPreviewSource(thumb, thumbPlaceholder, '', thumbContainer);
         return;
     }
-    const src = `${buildOverlayUrl(overlay.image_file)}?v=${Date.now()}`;
+    // Content-addressed images are immutable, so the browser cache can serve them.
+    const src = isContentAddressed(overlay.image_file)
+        ? buildOverlayUrl(overlay.image_file)
+        : `${buildOverlayUrl(overlay.image_file)}?v=${Date.now()}`;
     setPreviewSource(preview, placeholder, src, previewContainer);
     setPreviewSource(thumb, thumbPlaceholder, src, thumbContainer);
 }
@@ -471,46 +483,43 @@ async function uploadOverlayImage(overlayId, item) {
     }
 
     setOverlayStatus(item, 'Uploading...', 'info');
-    const reader = new FileReader();
-    reader.onload = async () => {
-        try {
-            const res = await fetch(`${API_BASE}/overlay/image`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    data_url: reader.result,
-                    overlay_id: overlayId,
-                    original_name: file.name
-                })
-            });
+    try {
+        const params = new URLSearchParams({ overlay_id: overlayId, name: file.name });
+        const res = await fetch(`${API_BASE}/overlay/upload?${params.toString()}`, {
+            method: 'POST',
+            headers: { 'Content-Type': file.type || 'application/octet-stream' },
+            body: file
+        });
 
-            if (res.status === 401) {
-                window.location.href = '/admin/login.html';
-                return;
-            }
-            if (!res.ok) {
-                const errorMessage = await getErrorMessage(res);
-                setOverlayStatus(item, `Upload failed: ${errorMessage}`, 'error');
-                return;
-            }
+        if (res.status === 401) {
+            window.location.href = '/admin/login.html';
+            return;
+        }
+        if (!res.ok) {
+            const errorMessage = await getErrorMessage(res);
+            setOverlayStatus(item, `Upload failed: ${errorMessage}`, 'error');
+            return;
+        }
 
-            const payload = await res.json();
-            if (payload.image_file) {
-                const overlay = state.overlays.find((entry) => entry.id === overlayId);
-                if (overlay) {
-                    overlay.image_file = payload.image_file;
-                }
+        const payload = await res.json();
+        if (Number.isInteger(payload.revision)) {
+            state.revision = payload.revision;
+        }
+        if (payload.image_file) {
+            const overlay = state.overlays.find((entry) => entry.id === overlayId);
+            if (overlay) {
+                overlay.image_file = payload.image_file;
+                overlay.image_name = payload.image_name || '';
             }
-            setOverlayStatus(item, 'Image uploaded', 'success');
-            showToast('Overlay image uploaded', 'success');
-            updateOverlayFileName(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
-            updateOverlaySummary(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
-            refreshOverlayPreview(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
-        } catch (err) {
-            setOverlayStatus(item, 'Upload failed', 'error');
         }
-    };
-    reader.readAsDataURL(file);
+        setOverlayStatus(item, payload.deduplicated ? 'Image already stored; reused' : 'Image uploaded', 'success');
+        showToast('Overlay image uploaded', 'success');
+        updateOverlayFileName(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
+        updateOverlaySummary(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
+        refreshOverlayPreview(item, state.overlays.find((entry) => entry.id === overlayId) || overlayDefaults);
+    } catch (err) {
+        setOverlayStatus(item, 'Upload failed', 'error');
+    }
 }
 
 async function clearOverlayImage(overlayId, item) {
@@ -530,9 +539,11 @@ async function clearOverlayImage(overlayId, item) {
             setOverlayStatus(item, `Remove failed: ${errorMessage}`, 'error');
             return;
         }
+        await trackRevision(res);
         const overlay = state.overlays.find((entry) => entry.id === overlayId);
         if (overlay) {
             overlay.image_file = '';
+            overlay.image_name = '';
             overlay.enabled = false;
         }
         const input = item.querySelector('[data-field="image-input"]');
@@ -573,6 +584,9 @@ async function removeOverlayItem(overlayId, item) {
                     window.location.href = '/admin/login.html';
                     return;
                 }
+                if (res.ok) {
+                    await trackRevision(res);
+                }
             } catch (err) {
                 // ignore delete errors
             }
@@ -602,6 +616,7 @@ async function clearAllOverlays() {
             showToast(`Clear failed: ${errorMessage}`, 'error');
             return;
         }
+        await trackRevision(res);
         state.overlays = [];
         accordionState.clear();
         renderOverlays();
@@ -611,6 +626,17 @@ async function clearAllOverlays() {
     }
 }
 
+async function trackRevision(res) {
+    try {
+        const payload = await res.json();
+        if (Number.isInteger(payload.revision)) {
+            state.revision = payload.revision;
+        }
+    } catch (err) {
+        // Responses without a body leave the revision as is
+    }
+}
+
 function findOverlayById(id) {
     return state.overlays.find((overlay) => overlay.id === id);
 }
@@ -1,4 +1,5 @@
 export const state = {
+    revision: null,
     destinations: [],
     ingest_key: '',
     public_live: true,
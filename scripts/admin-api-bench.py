@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Compare admin-api serving engines: requests/s and latency percentiles.
+
+Starts scripts/admin-api.py from a scratch copy of the tree (so real data
+is never touched) once per ADMIN_API_ENGINE, logs in, and drives a mix of
+dashboard reads and on_publish callbacks from client threads spread over a
+few processes, either opening a new connection per request (nginx's
+default proxying) or reusing keep-alive connections (nginx upstream
+keepalive). Run it on an otherwise idle host; the client shares the CPU.
+
+    python3 scripts/admin-api-bench.py --duration 10 --concurrency 32
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bench_fixtures import free_port, login, percentile, start_admin_api
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+ROUTES = [
+    ("GET", "/api/session", True),
+    ("GET", "/api/restream", True),
+    ("POST", "/api/publish?name=bench-key", False),
+    ("GET", "/api/publish/latency", True),
+]
+
+
+def prepare_tree(target: Path) -> None:
+    shutil.copytree(ROOT_DIR / "scripts", target / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(ROOT_DIR / "config", target / "config")
+    data = target / "data"
+    data.mkdir()
+    (data / "admin.credentials").write_text("user=bench\npassword=bench-pass\n", encoding="utf-8")
+    (data / "restream.json").write_text(json.dumps({"ingest_key": "bench-key"}), encoding="utf-8")
+
+
+def load_worker(port: int, cookie: str, keepalive: bool, threads_per_process: int, stop_at: float, results) -> None:
+    """One client process; several keep the client's GIL out of the measured latency."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(offset: int) -> None:
+        local = []
+        failed = 0
+        conn = None
+        index = offset
+        while time.monotonic() < stop_at:
+            method, path, auth = ROUTES[index % len(ROUTES)]
+            index += 1
+            headers = {"Cookie": cookie} if auth else {}
+            if not keepalive:
+                headers["Connection"] = "close"
+            started = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                conn.request(method, path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                if not keepalive or response.will_close:
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                if conn is not None:
+                    conn.close()
+                conn = None
+                continue
+            local.append((time.perf_counter() - started) * 1000)
+        if conn is not None:
+            conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(threads_per_process)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(port: int, cookie: str, keepalive: bool, concurrency: int, processes: int, duration: float) -> dict:
+    processes = max(1, min(processes, concurrency))
+    results = multiprocessing.Queue()
+    started = time.monotonic()
+    stop_at = started + duration
+    workers = [
+        multiprocessing.Process(
+            target=load_worker,
+            args=(port, cookie, keepalive, concurrency // processes + (1 if i < concurrency % processes else 0), stop_at, results),
+        )
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    latencies = []
+    errors = 0
+    for _ in workers:
+        chunk, failed = results.get()
+        latencies.extend(chunk)
+        errors += failed
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark admin-api serving engines")
+    parser.add_argument("--engines", default="threaded,asyncio")
+    parser.add_argument("--modes", default="close,keepalive")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=4, help="client processes sharing the concurrency")
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="admin-api-bench-") as tmp:
+        tree = Path(tmp)
+        prepare_tree(tree)
+        for engine in [value.strip() for value in args.engines.split(",") if value.strip()]:
+            port = free_port()
+            proc = start_admin_api(
+                tree, port, {"ADMIN_API_ENGINE": engine, "STAT_POLL_INTERVAL": "0", "CONTROL_URL": "http://127.0.0.1:9/"}
+            )
+            try:
+                cookie = login(port, "bench", "bench-pass")
+                for mode in [value.strip() for value in args.modes.split(",") if value.strip()]:
+                    row = {
+                        "engine": engine,
+                        "mode": mode,
+                        "concurrency": args.concurrency,
+                        **run_load(port, cookie, mode == "keepalive", args.concurrency, args.processes, args.duration),
+                    }
+                    results.append(row)
+                    print(
+                        f"engine={engine:<9} mode={mode:<10} rps={row['rps']:<9} p50={row['p50_ms']}ms "
+                        f"p99={row['p99_ms']}ms errors={row['errors']}"
+                    )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    if args.json:
+        args.json.write_text(json.dumps({"results": results}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
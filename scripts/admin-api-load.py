@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Load-test admin-api.py with nginx callbacks, dashboards and applies at once.
+
+Starts scripts/admin-api.py from a scratch copy of the tree with a fake
+nginx /stat + /control (bench_fixtures.FakeNginx), then for --duration
+seconds runs three traffic sources side by side:
+
+- publish storms: every --storm-interval seconds, --storm-size on_publish
+  callbacks fire together, each followed by its on_publish_done after
+  --hold seconds. Like nginx, every callback is a form POST on a fresh
+  connection. --bad-key-ratio of them use unknown keys (403 expected).
+- dashboards: --dashboards pollers, each GETting /api/metrics, /api/health
+  and /api/restream every --poll-interval seconds on a keep-alive
+  connection.
+- applies (opt-in): a POST /api/restream/apply every --apply-interval
+  seconds. The server runs with APPLY_SANDBOX=1, a scratch STUNNEL_CONF and
+  a stub NGINX_BIN, so applies only rewrite the scratch tree and never
+  reload the host's stunnel or nginx.
+
+Publish storms run in their own client process, so the dashboard clients
+cannot skew the number this is mostly for: how long nginx waits on
+on_publish before a stream goes live. Reports p50/p95/p99 per route,
+errors, and the server's thread count and RSS sampled during the run.
+
+    python3 scripts/admin-api-load.py --duration 30 --storm-size 50 --dashboards 16
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode
+
+import bench_fixtures
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DASHBOARD_ROUTES = ("/api/metrics", "/api/health", "/api/restream")
+USER = "load"
+PASSWORD = "load-pass"
+
+
+def prepare_tree(target: Path, args: argparse.Namespace) -> None:
+    shutil.copytree(ROOT_DIR / "scripts", target / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(ROOT_DIR / "config", target / "config")
+    data = target / "data"
+    data.mkdir()
+    (data / "admin.credentials").write_text(f"user={USER}\npassword={PASSWORD}\n", encoding="utf-8")
+    bench_fixtures.write_json(data / "restream.json", bench_fixtures.make_config(args.destinations, 2, 5))
+    stub = target / "nginx-stub"
+    stub.write_text("#!/bin/sh\nexit 0\n", encoding="utf-8")
+    stub.chmod(0o755)
+
+
+class Recorder:
+    """Latencies and outcomes per route, shared by the threads of one client process."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def add(self, route: str, ms: Optional[float], status: Optional[int], expected: tuple) -> None:
+        with self.lock:
+            entry = self.routes.setdefault(route, {"latencies": [], "errors": 0, "failed": 0, "statuses": {}})
+            if status is None or status not in expected:
+                entry["errors"] += 1
+            if status is None:
+                entry["failed"] += 1
+            else:
+                entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+            if ms is not None:
+                entry["latencies"].append(ms)
+
+
+def send(conn: http.client.HTTPConnection, method: str, path: str, body: Optional[str], headers: dict) -> int:
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def callback(port: int, path: str, form: dict, recorder: Recorder, route: str, expected: tuple) -> None:
+    """One nginx notify request: form-encoded POST, new connection, Connection: close."""
+    body = urlencode(form)
+    headers = {"Content-Type": "application/x-www-form-urlencoded", "Connection": "close"}
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        status = send(conn, "POST", path, body, headers)
+    except (OSError, http.client.HTTPException):
+        recorder.add(route, None, None, expected)
+        return
+    finally:
+        conn.close()
+    recorder.add(route, (time.perf_counter() - started) * 1000, status, expected)
+
+
+def publisher(port: int, key: str, client_id: int, hold: float, recorder: Recorder) -> None:
+    form = {
+        "app": "ingest",
+        "flashver": "FMLE/3.0 (compatible; obs-output module)",
+        "swfurl": "",
+        "tcurl": "rtmp://127.0.0.1:1935/ingest",
+        "pageurl": "",
+        "addr": f"198.51.100.{client_id % 250}",
+        "clientid": str(client_id),
+        "call": "publish",
+        "name": key,
+        "type": "live",
+    }
+    callback(port, "/api/publish", form, recorder, "on_publish", (200, 403))
+    time.sleep(hold)
+    form["call"] = "publish_done"
+    callback(port, "/api/publish_done", form, recorder, "on_publish_done", (200,))
+
+
+def storm_worker(port: int, keys: list, args: argparse.Namespace, start_at: float, stop_at: float, results) -> None:
+    rng = random.Random(bench_fixtures.SEED)
+    recorder = Recorder()
+    threads = []
+    client_id = 1000
+    next_storm = start_at
+    while next_storm < stop_at:
+        time.sleep(max(0.0, next_storm - time.time()))
+        for _ in range(args.storm_size):
+            key = f"unknown-{client_id}" if rng.random() < args.bad_key_ratio else rng.choice(keys)
+            thread = threading.Thread(target=publisher, args=(port, key, client_id, args.hold, recorder), daemon=True)
+            thread.start()
+            threads.append(thread)
+            client_id += 1
+        next_storm += args.storm_interval
+        threads = [thread for thread in threads if thread.is_alive()]
+    for thread in threads:
+        thread.join(args.hold + 30)
+    results.put(recorder.routes)
+
+
+def dashboard(port: int, cookie: str, interval: float, offset: float, stop_at: float, recorder: Recorder) -> None:
+    headers = {"Cookie": cookie}
+    conn = None
+    next_poll = time.time() + offset
+    while next_poll < stop_at:
+        time.sleep(max(0.0, next_poll - time.time()))
+        for path in DASHBOARD_ROUTES:
+            started = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                status = send(conn, "GET", path, None, headers)
+            except (OSError, http.client.HTTPException):
+                recorder.add(path, None, None, (200,))
+                if conn is not None:
+                    conn.close()
+                conn = None
+                continue
+            recorder.add(path, (time.perf_counter() - started) * 1000, status, (200,))
+        next_poll += interval
+    if conn is not None:
+        conn.close()
+
+
+def applier(port: int, cookie: str, interval: float, stop_at: float, recorder: Recorder) -> None:
+    next_apply = time.time() + interval / 2
+    while next_apply < stop_at:
+        time.sleep(max(0.0, next_apply - time.time()))
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            status = send(conn, "POST", "/api/restream/apply", "", {"Cookie": cookie})
+            recorder.add("/api/restream/apply", (time.perf_counter() - started) * 1000, status, (202,))
+        except (OSError, http.client.HTTPException):
+            recorder.add("/api/restream/apply", None, None, (202,))
+        finally:
+            conn.close()
+        next_apply += interval
+
+
+def dashboard_worker(port: int, cookie: str, args: argparse.Namespace, start_at: float, stop_at: float, results) -> None:
+    recorder = Recorder()
+    rng = random.Random(bench_fixtures.SEED + 1)
+    threads = []
+    for _ in range(args.dashboards):
+        # Spread the pollers over the interval like independently opened browser tabs.
+        offset = start_at - time.time() + rng.random() * args.poll_interval
+        threads.append(threading.Thread(target=dashboard, args=(port, cookie, args.poll_interval, offset, stop_at, recorder)))
+    if args.apply_interval > 0:
+        threads.append(threading.Thread(target=applier, args=(port, cookie, args.apply_interval, stop_at, recorder)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(recorder.routes)
+
+
+def process_status(pid: int) -> dict:
+    """Threads and VmRSS of a process from /proc (Linux); empty elsewhere."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("Threads:"):
+                    values["threads"] = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    values["rss_mb"] = int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def summarize(routes: dict) -> dict:
+    summary = {}
+    for route, entry in sorted(routes.items()):
+        latencies = sorted(entry["latencies"])
+        summary[route] = {
+            "requests": len(latencies) + entry["failed"],
+            "errors": entry["errors"],
+            "statuses": entry["statuses"],
+            "p50_ms": round(bench_fixtures.percentile(latencies, 0.50), 2),
+            "p95_ms": round(bench_fixtures.percentile(latencies, 0.95), 2),
+            "p99_ms": round(bench_fixtures.percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
+    return summary
+
+
+def merge_routes(target: dict, routes: dict) -> None:
+    for route, entry in routes.items():
+        merged = target.setdefault(route, {"latencies": [], "errors": 0, "failed": 0, "statuses": {}})
+        merged["latencies"].extend(entry["latencies"])
+        merged["errors"] += entry["errors"]
+        merged["failed"] += entry["failed"]
+        for status, count in entry["statuses"].items():
+            merged["statuses"][status] = merged["statuses"].get(status, 0) + count
+
+
+def server_publish_latency(port: int, cookie: str) -> Optional[dict]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("GET", "/api/publish/latency", headers={"Cookie": cookie})
+        response = conn.getresponse()
+        body = response.read()
+        return json.loads(body) if response.status == 200 else None
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test admin-api with publish storms and dashboard polling")
+    parser.add_argument("--engine", default="threaded", help="ADMIN_API_ENGINE of the server under test")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--storm-size", type=int, default=20, help="on_publish callbacks per storm")
+    parser.add_argument("--storm-interval", type=float, default=2.0)
+    parser.add_argument("--hold", type=float, default=1.0, help="seconds between on_publish and on_publish_done")
+    parser.add_argument("--bad-key-ratio", type=float, default=0.1)
+    parser.add_argument("--dashboards", type=int, default=8)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--apply-interval", type=float, default=0.0, help="seconds between sandboxed applies; 0 disables them")
+    parser.add_argument("--destinations", type=int, default=8)
+    parser.add_argument("--stat-streams", type=int, default=20, help="streams in the fake /stat payload")
+    parser.add_argument("--stat-latency", type=float, default=0.0, help="fake nginx reply delay in seconds")
+    parser.add_argument("--stat-interval", type=float, default=2.0, help="STAT_POLL_INTERVAL for the server")
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args()
+
+    fake = bench_fixtures.FakeNginx(bench_fixtures.make_stat_xml(args.stat_streams), latency=args.stat_latency).start()
+    routes: dict = {}
+    samples = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="admin-api-load-") as tmp:
+            tree = Path(tmp)
+            prepare_tree(tree, args)
+            config = json.loads((tree / "data" / "restream.json").read_text(encoding="utf-8"))
+            keys = [config["ingest_key"], *(item["key"] for item in config["ingest_keys"])]
+            port = bench_fixtures.free_port()
+            proc = bench_fixtures.start_admin_api(
+                tree,
+                port,
+                {
+                    "ADMIN_API_ENGINE": args.engine,
+                    "CONTROL_URL": fake.url,
+                    "STAT_POLL_INTERVAL": str(args.stat_interval),
+                    # Keep applies inside the scratch tree (see restream_apply.APPLY_SANDBOX).
+                    "APPLY_SANDBOX": "1",
+                    "STUNNEL_CONF": str(tree / "stunnel.conf"),
+                    "NGINX_BIN": str(tree / "nginx-stub"),
+                },
+            )
+            try:
+                cookie = bench_fixtures.login(port, USER, PASSWORD)
+                results = multiprocessing.Queue()
+                start_at = time.time() + 0.5
+                stop_at = start_at + args.duration
+                workers = [
+                    multiprocessing.Process(target=storm_worker, args=(port, keys, args, start_at, stop_at, results)),
+                    multiprocessing.Process(target=dashboard_worker, args=(port, cookie, args, start_at, stop_at, results)),
+                ]
+                for worker in workers:
+                    worker.start()
+                while time.time() < stop_at:
+                    status = process_status(proc.pid)
+                    if status:
+                        samples.append(status)
+                    time.sleep(0.25)
+                # Read before joining: a worker cannot exit until its results are drained.
+                for _ in workers:
+                    merge_routes(routes, results.get())
+                for worker in workers:
+                    worker.join()
+                server_latency = server_publish_latency(port, cookie)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    finally:
+        fake.stop()
+
+    summary = summarize(routes)
+    threads = [sample["threads"] for sample in samples if "threads" in sample]
+    rss = [sample["rss_mb"] for sample in samples if "rss_mb" in sample]
+    server = {
+        "threads_max": max(threads) if threads else None,
+        "threads_avg": round(sum(threads) / len(threads), 1) if threads else None,
+        "rss_mb_max": round(max(rss), 1) if rss else None,
+        "publish_latency": server_latency,
+        "stat_requests": fake.requests,
+    }
+    for route, row in summary.items():
+        print(
+            f"{route:<24} n={row['requests']:<6} errors={row['errors']:<4} p50={row['p50_ms']}ms "
+            f"p95={row['p95_ms']}ms p99={row['p99_ms']}ms max={row['max_ms']}ms"
+        )
+    print(f"server threads max={server['threads_max']} avg={server['threads_avg']} rss_max={server['rss_mb_max']}MB")
+    if args.json:
+        args.json.write_text(
+            json.dumps({"args": vars(args), "routes": summary, "server": server}, indent=2, default=str),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,23 +1,45 @@
 #!/usr/bin/env python3
+import array
 import base64
+import bisect
+import functools
+import hashlib
+import hmac
 import json
+import math
 import os
+import queue
 import sys
 import re
 import secrets
 import html
+import http.client
+import io
 import shutil
+import signal
+import socket
 import subprocess
+import tempfile
+import threading
 import time
-import urllib.request
+import traceback
 import xml.etree.ElementTree as ET
 from html.parser import HTMLParser
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime, timezone
 from urllib.parse import parse_qs, quote, urlparse
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional, Dict, Tuple
 
+import async_http
+import overlay_assets
+import profiling
+import restream_apply
+import viewer_timeseries
+
 try:
     import crypt
 except ImportError:  # pragma: no cover - not available on some platforms
@@ -26,21 +48,87 @@ except ImportError:  # pragma: no cover - not available on some platforms
 ROOT_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT_DIR / "data"
 OVERLAY_DIR = DATA_DIR / "overlays"
+OVERLAY_CACHE_DIR = OVERLAY_DIR / overlay_assets.CACHE_DIRNAME
 CONFIG_PATH = DATA_DIR / "restream.json"
 DEFAULT_CONFIG = ROOT_DIR / "config" / "restream.default.json"
 STREAM_STATUS_PATH = DATA_DIR / "stream-status.json"
 PUBLIC_CONFIG_PATH = DATA_DIR / "public-config.json"
 PUBLIC_HLS_CONF_PATH = DATA_DIR / "public-hls.conf"
+VIEWER_TIMESERIES_PATH = DATA_DIR / "hls-analytics.bin"
+VIEWER_HISTORY_MAX_SEC = 31 * 86400
 IS_WINDOWS = os.name == "nt"
-APPLY_SCRIPT = ROOT_DIR / "scripts" / ("restream-apply.ps1" if IS_WINDOWS else "restream-apply.sh")
+APPLY_SCRIPT = ROOT_DIR / "scripts" / "restream-apply.ps1"
 STREAM_APP = os.environ.get("STREAM_APP", "live")
 STREAM_NAME = os.environ.get("STREAM_NAME", "stream")
 CONTROL_URL = os.environ.get("CONTROL_URL")
+CONTROL_TIMEOUT = float(os.environ.get("CONTROL_TIMEOUT", "4"))
+CONTROL_CONNECT_TIMEOUT = float(os.environ.get("CONTROL_CONNECT_TIMEOUT", "1"))
+CONTROL_CONCURRENCY = int(os.environ.get("CONTROL_CONCURRENCY", "4"))
 SESSION_COOKIE = os.environ.get("ADMIN_SESSION_COOKIE", "rs_admin")
 SESSION_TTL = int(os.environ.get("ADMIN_SESSION_TTL", "86400"))
-SESSIONS: Dict[str, Dict[str, object]] = {}
-CPU_SAMPLE: Optional[Tuple[int, int, float]] = None
-NET_SAMPLE: Optional[Tuple[int, int, float]] = None
+SESSION_MAX = int(os.environ.get("ADMIN_SESSION_MAX", "256"))
+SESSION_SWEEP_INTERVAL = float(os.environ.get("ADMIN_SESSION_SWEEP_INTERVAL", "60"))
+SESSION_STORE_PATH = DATA_DIR / "admin-sessions.json"
+CREDENTIALS_PATH = DATA_DIR / "admin.credentials"
+HTPASSWD_PATH = DATA_DIR / "admin.htpasswd"
+LOGIN_IP_RATE = float(os.environ.get("LOGIN_IP_RATE_PER_MIN", "10")) / 60
+LOGIN_IP_BURST = float(os.environ.get("LOGIN_IP_BURST", "5"))
+LOGIN_USER_RATE = float(os.environ.get("LOGIN_USER_RATE_PER_MIN", "20")) / 60
+LOGIN_USER_BURST = float(os.environ.get("LOGIN_USER_BURST", "10"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get("LOGIN_THROTTLE_MAX_KEYS", "4096"))
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", "2"))
+LOGIN_HASH_QUEUE = int(os.environ.get("LOGIN_HASH_QUEUE", "8"))
+LOGIN_HASH_TIMEOUT = float(os.environ.get("LOGIN_HASH_TIMEOUT", "10"))
+INGEST_STREAM_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+INGEST_KEYS_MAX = int(os.environ.get("INGEST_KEYS_MAX", "16"))
+INGEST_INDEX: Dict[str, Optional[dict]] = {"current": None}
+STATUS_QUEUE: "queue.Queue[Tuple[bool, Optional[int], Optional[int], Optional[str]]]" = queue.Queue()
+STATUS_WRITER: Dict[str, Optional[threading.Thread]] = {"thread": None}
+STATUS_WRITER_LOCK = threading.Lock()
+OVERLAY_RENDER_QUEUE: "queue.Queue[list]" = queue.Queue()
+OVERLAY_RENDERER: Dict[str, Optional[threading.Thread]] = {"thread": None}
+OVERLAY_RENDERER_LOCK = threading.Lock()
+OVERLAY_INGEST_WIDTHS: Dict[str, int] = overlay_assets.read_ingest_widths(OVERLAY_CACHE_DIR)
+STAT_POLL_INTERVAL = float(os.environ.get("STAT_POLL_INTERVAL", "2"))
+STAT_STALE_AFTER = float(os.environ.get("STAT_STALE_AFTER", "10"))
+RTMPS_PORTS_PATH = DATA_DIR / "rtmps-ports.json"
+PUSH_HISTORY_SEC = int(os.environ.get("PUSH_HISTORY_SEC", "3600"))
+PUSH_HEALTH_WINDOW = float(os.environ.get("PUSH_HEALTH_WINDOW", "300"))
+PUSH_FLAP_RECONNECTS = int(os.environ.get("PUSH_FLAP_RECONNECTS", "3"))
+PUSH_SOCKET_STATS = os.environ.get("PUSH_SOCKET_STATS", "1") != "0"
+PUSH_RESOLVE_TTL = 300.0
+PUSH_SERIES = ("bw_out_kbps", "uptime_sec", "reconnects")
+SS_BYTES_ACKED_RE = re.compile(r"\bbytes_acked:(\d+)")
+EVENTS_INTERVAL = float(os.environ.get("EVENTS_INTERVAL", "5"))
+EVENTS_KEEPALIVE = float(os.environ.get("EVENTS_KEEPALIVE", "15"))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get("EVENTS_MAX_SUBSCRIBERS", "16"))
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0)
+REQUEST_BUCKETS_MS = (1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "").strip()
+HLS_VIEWERS_SKETCH_PATH = DATA_DIR / "hls-viewers.sketch.json"
+ADMIN_PROFILING = os.environ.get("ADMIN_PROFILING", "0") == "1"
+PROFILING_FLAG_PATH = DATA_DIR / "admin-profiling.enabled"
+# nginx proxies /admin/api/ with its default 60 s proxy_read_timeout, so a
+# profile has to finish well inside that or the client gets a 504 instead.
+PROFILE_MAX_SEC = min(float(os.environ.get("PROFILE_MAX_SEC", "45")), 50.0)
+TRACEMALLOC_KEYS = ("lineno", "filename", "traceback")
+CONFIG_CACHE_LOCK = threading.Lock()
+CONFIG_CACHE: Dict[str, object] = {"key": None, "snapshot": None}
+CONFIG_CACHE_STATS = {"hits": 0, "misses": 0}
+CONFIG_WRITE_DELAY = float(os.environ.get("CONFIG_WRITE_DELAY", "0.25"))
+APPLY_TIMEOUT = float(os.environ.get("APPLY_TIMEOUT", "300"))
+APPLY_JOB_HISTORY = int(os.environ.get("APPLY_JOB_HISTORY", "20"))
+APPLY_PHASE_PREFIX = "APPLY_PHASE "
+APPLY_LOG_LINES = 20
+ADMIN_API_ENGINE = os.environ.get("ADMIN_API_ENGINE", "threaded").strip().lower()
+ADMIN_API_WORKERS = int(os.environ.get("ADMIN_API_WORKERS", "16"))
+ADMIN_API_MAX_PENDING = int(os.environ.get("ADMIN_API_MAX_PENDING", "64"))
+ADMIN_API_MAX_CONNECTIONS = int(os.environ.get("ADMIN_API_MAX_CONNECTIONS", "256"))
+ADMIN_API_KEEPALIVE_TIMEOUT = float(os.environ.get("ADMIN_API_KEEPALIVE_TIMEOUT", "15"))
+ADMIN_API_BACKLOG = int(os.environ.get("ADMIN_API_BACKLOG", "128"))
+METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "5"))
+METRICS_HISTORY_SEC = int(os.environ.get("METRICS_HISTORY_SEC", "86400"))
+METRICS_SERIES = ("cpu_pct", "mem_pct", "mem_used_mb", "rx_mbps", "tx_mbps", "load1")
 OVERLAY_ALLOWED_POSITIONS = {
     "top-left",
     "top-right",
@@ -61,13 +149,17 @@ OVERLAY_ALLOWED_MIME = {
     "image/webp": "webp",
 }
 OVERLAY_MAX_BYTES = 5 * 1024 * 1024
+OVERLAY_UPLOAD_CHUNK = 64 * 1024
 OVERLAY_MAX_COUNT = int(os.environ.get("OVERLAY_MAX_COUNT", "8"))
 OVERLAY_ID_RE = re.compile(r"^[A-Za-z0-9_-]{4,32}$")
 OVERLAY_FILENAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}\.(png|jpe?g|webp)$", re.IGNORECASE)
+OVERLAY_BLOB_RE = re.compile(r"^[0-9a-f]{64}\.(png|jpg|webp)$")
+OVERLAY_STORE_LOCK = threading.RLock()
 OVERLAY_DEFAULT = {
     "id": "",
     "enabled": False,
     "image_file": "",
+    "image_name": "",
     "position": "top-right",
     "offset_x": 24,
     "offset_y": 24,
@@ -113,6 +205,175 @@ def iso_from_ts(ts: int) -> str:
     return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
 
 
+class LatencyHistogram:
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        slot = bisect.bisect_left(self.buckets_ms, value_ms)
+        with self.lock:
+            self.add(slot, value_ms)
+
+    def add(self, slot: int, value_ms: float) -> None:
+        """Count one value; the caller holds `lock`."""
+        self.counts[slot] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def state(self) -> Tuple[list, int, float, float]:
+        with self.lock:
+            return list(self.counts), self.total, self.sum_ms, self.max_ms
+
+    def quantile(self, counts: list, total: int, q: float) -> Optional[float]:
+        if not total:
+            return None
+        target = q * total
+        running = 0
+        for idx, count in enumerate(counts):
+            running += count
+            if running >= target:
+                return self.buckets_ms[idx] if idx < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        counts, total, sum_ms, max_ms = self.state()
+        labels = [str(bound) for bound in self.buckets_ms] + ["+Inf"]
+        return {
+            "count": total,
+            "avg_ms": round(sum_ms / total, 4) if total else None,
+            "max_ms": round(max_ms, 4),
+            "p50_ms": self.quantile(counts, total, 0.5),
+            "p99_ms": self.quantile(counts, total, 0.99),
+            "buckets_ms": dict(zip(labels, counts)),
+        }
+
+
+class RouteHistogram(LatencyHistogram):
+    """Request latencies plus response counts by status class (index 1-5 for 1xx-5xx)."""
+
+    def __init__(self) -> None:
+        super().__init__(REQUEST_BUCKETS_MS)
+        self.classes = [0] * 6
+
+    def observe_response(self, value_ms: float, status: int) -> None:
+        slot = bisect.bisect_left(self.buckets_ms, value_ms)
+        status_class = status // 100 if 100 <= status < 600 else 5
+        with self.lock:
+            self.add(slot, value_ms)
+            self.classes[status_class] += 1
+
+    def class_counts(self) -> list:
+        with self.lock:
+            return list(self.classes)
+
+
+class Instrumentation:
+    """Request and section timings rendered by /metrics.
+
+    Every route histogram exists before the first request (paths outside
+    API_ROUTES share "other"), so recording a request is a dict lookup, a
+    bisect and one short per-route lock; nothing is built per request.
+    Section timers are registered by @timed at import time.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[str, ...]]) -> None:
+        self.routes = {
+            method: {path: RouteHistogram() for path in paths + ("other",)} for method, paths in routes.items()
+        }
+        self.sections: Dict[str, LatencyHistogram] = {}
+        self.phases: Dict[str, LatencyHistogram] = {}
+        self.phases_lock = threading.Lock()
+
+    def route(self, method: str, path: str) -> Optional[RouteHistogram]:
+        table = self.routes.get(method)
+        if table is None:
+            return None
+        histogram = table.get(path)
+        if histogram is None:
+            if path.startswith(APPLY_JOB_ROUTE_PREFIX):
+                histogram = table.get(APPLY_JOB_ROUTE)
+            if histogram is None:
+                histogram = table["other"]
+        return histogram
+
+    def section(self, name: str) -> LatencyHistogram:
+        histogram = self.sections.get(name)
+        if histogram is None:
+            histogram = self.sections[name] = LatencyHistogram(REQUEST_BUCKETS_MS)
+        return histogram
+
+    def observe_phase(self, name: str, value_ms: float) -> None:
+        # Apply phases are few and rare, so they are created on first use.
+        histogram = self.phases.get(name)
+        if histogram is None:
+            with self.phases_lock:
+                histogram = self.phases.setdefault(name, LatencyHistogram(REQUEST_BUCKETS_MS))
+        histogram.observe(value_ms)
+
+
+APPLY_JOB_ROUTE_PREFIX = "/api/restream/apply/"
+APPLY_JOB_ROUTE = "/api/restream/apply/{id}"
+API_ROUTES = {
+    "GET": (
+        "/api/session",
+        "/api/restream",
+        "/api/ingest",
+        "/api/publish/latency",
+        "/api/metrics",
+        "/api/events",
+        "/api/viewers/history",
+        "/api/metrics/history",
+        "/api/health",
+        "/api/restream/apply",
+        APPLY_JOB_ROUTE,
+        "/metrics",
+        "/api/debug/threads",
+        "/api/debug/profile",
+        "/api/debug/tracemalloc",
+    ),
+    "POST": (
+        "/api/login",
+        "/api/logout",
+        "/api/overlay/image",
+        "/api/overlay/upload",
+        "/api/restream",
+        "/api/ingest",
+        "/api/publish",
+        "/api/publish_done",
+        "/api/restream/apply",
+        "/api/stream/reconnect",
+        "/api/debug/tracemalloc",
+    ),
+}
+INSTRUMENTATION = Instrumentation(API_ROUTES)
+
+
+def timed(section: str):
+    """Record the duration of every call of the decorated function under `section`."""
+
+    def decorate(func):
+        histogram = INSTRUMENTATION.section(section)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe((time.perf_counter() - started) * 1000)
+
+        return wrapper
+
+    return decorate
+
+
 def load_stream_status() -> dict:
     if STREAM_STATUS_PATH.exists():
         try:
@@ -130,8 +391,13 @@ def load_stream_status() -> dict:
     }
 
 
-def write_stream_status(active: bool, started_at: Optional[int] = None, ended_at: Optional[int] = None) -> None:
-    status = load_stream_status()
+def apply_stream_status(
+    status: dict,
+    active: bool,
+    started_at: Optional[int] = None,
+    ended_at: Optional[int] = None,
+    stream: Optional[str] = None,
+) -> None:
     now = now_ts()
     status["active"] = active
     status["updated_at_epoch"] = now
@@ -147,16 +413,103 @@ def write_stream_status(active: bool, started_at: Optional[int] = None, ended_at
         status["ended_at_epoch"] = ended_at
         status["ended_at"] = iso_from_ts(ended_at)
 
+    if stream is not None:
+        status["stream"] = stream
+
     if active:
         status["ended_at_epoch"] = None
         status["ended_at"] = None
 
+
+def store_stream_status(status: dict) -> None:
     STREAM_STATUS_PATH.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = STREAM_STATUS_PATH.with_suffix(".tmp")
     tmp_path.write_text(json.dumps(status), encoding="utf-8")
     tmp_path.replace(STREAM_STATUS_PATH)
 
 
+def write_stream_status(
+    active: bool,
+    started_at: Optional[int] = None,
+    ended_at: Optional[int] = None,
+    stream: Optional[str] = None,
+) -> None:
+    status = load_stream_status()
+    apply_stream_status(status, active, started_at=started_at, ended_at=ended_at, stream=stream)
+    store_stream_status(status)
+
+
+def stream_status_worker() -> None:
+    while True:
+        updates = [STATUS_QUEUE.get()]
+        while True:
+            try:
+                updates.append(STATUS_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            status = load_stream_status()
+            for active, started_at, ended_at, stream in updates:
+                apply_stream_status(status, active, started_at=started_at, ended_at=ended_at, stream=stream)
+            store_stream_status(status)
+        except OSError:
+            pass
+
+
+def queue_stream_status(
+    active: bool,
+    started_at: Optional[int] = None,
+    ended_at: Optional[int] = None,
+    stream: Optional[str] = None,
+) -> None:
+    """Persist a publish state change from a background thread.
+
+    Bursts of publish callbacks are folded into a single write.
+    """
+    thread = STATUS_WRITER["thread"]
+    if thread is None or not thread.is_alive():
+        with STATUS_WRITER_LOCK:
+            thread = STATUS_WRITER["thread"]
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=stream_status_worker, name="stream-status", daemon=True)
+                thread.start()
+                STATUS_WRITER["thread"] = thread
+    STATUS_QUEUE.put((active, started_at, ended_at, stream))
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write via a temp file in the same directory, fsync it and rename it into place.
+
+    Readers see either the old or the new content, never a partial file; the
+    existing file mode is kept so nginx and the scripts can still read it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if not IS_WINDOWS:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
 def write_public_config(public_live: bool, public_hls: bool, ticker: dict) -> None:
     now = now_ts()
     payload = {
@@ -166,12 +519,9 @@ def write_public_config(public_live: bool, public_hls: bool, ticker: dict) -> No
         "updated_at_epoch": now,
         "updated_at": iso_from_ts(now),
     }
-    PUBLIC_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = PUBLIC_CONFIG_PATH.with_suffix(".tmp")
-    tmp_path.write_text(json.dumps(payload), encoding="utf-8")
-    tmp_path.replace(PUBLIC_CONFIG_PATH)
+    atomic_write_text(PUBLIC_CONFIG_PATH, json.dumps(payload))
     hls_value = "1" if public_hls else "0"
-    PUBLIC_HLS_CONF_PATH.write_text(f"set $public_hls {hls_value};\n", encoding="utf-8")
+    atomic_write_text(PUBLIC_HLS_CONF_PATH, f"set $public_hls {hls_value};\n")
 
 
 def sanitize_destination(dest: dict) -> dict:
@@ -190,6 +540,36 @@ def sanitize_destination(dest: dict) -> dict:
     return clean
 
 
+def sanitize_ingest_key(value: object) -> str:
+    if value is None:
+        return ""
+    key = str(value).strip()
+    if any(ch in key for ch in ["\n", "\r", ";", " "]):
+        return ""
+    return key
+
+
+def sanitize_ingest_keys(value: object) -> list:
+    if not isinstance(value, list):
+        return []
+    cleaned = []
+    seen = set()
+    for item in value:
+        if not isinstance(item, dict):
+            continue
+        key = sanitize_ingest_key(item.get("key"))
+        if not key or key in seen:
+            continue
+        stream = str(item.get("stream") or "").strip()
+        if not INGEST_STREAM_RE.match(stream):
+            stream = STREAM_NAME
+        seen.add(key)
+        cleaned.append({"key": key, "stream": stream})
+        if len(cleaned) >= INGEST_KEYS_MAX:
+            break
+    return cleaned
+
+
 def parse_bool(value: object, default: bool) -> bool:
     if isinstance(value, bool):
         return value
@@ -448,6 +828,7 @@ def generate_overlay_id() -> str:
 def sanitize_overlay_item(payload: dict, existing: dict, fallback_id: str = "") -> dict:
     merged = {**OVERLAY_DEFAULT, **(existing if isinstance(existing, dict) else {})}
     merged["image_file"] = normalize_overlay_image_file(merged.get("image_file"))
+    merged["image_name"] = normalize_overlay_image_file(merged.get("image_name"))
 
     overlay_id = normalize_overlay_id(payload.get("id")) or normalize_overlay_id(merged.get("id"))
     if not overlay_id and fallback_id:
@@ -460,6 +841,8 @@ def sanitize_overlay_item(payload: dict, existing: dict, fallback_id: str = "")
         merged["enabled"] = bool(payload.get("enabled"))
     if "image_file" in payload:
         merged["image_file"] = normalize_overlay_image_file(payload.get("image_file"))
+    if "image_name" in payload:
+        merged["image_name"] = normalize_overlay_image_file(payload.get("image_name"))
     if "position" in payload:
         position = str(payload.get("position", "")).strip().lower()
         if position in OVERLAY_ALLOWED_POSITIONS:
@@ -538,43 +921,175 @@ def sanitize_overlays(payload: dict, existing: dict) -> list:
     return cleaned
 
 
-def delete_overlay_file(filename: str) -> None:
+def overlay_refcounts(overlays: list) -> Dict[str, int]:
+    """How many overlays point at each stored image."""
+    counts: Dict[str, int] = {}
+    for item in overlays:
+        if not isinstance(item, dict):
+            continue
+        filename = normalize_overlay_image_file(item.get("image_file"))
+        if filename:
+            counts[filename] = counts.get(filename, 0) + 1
+    return counts
+
+
+def saved_overlay_refcounts() -> Dict[str, int]:
+    return overlay_refcounts(current_overlays(load_config()))
+
+
+def delete_overlay_file(filename: str) -> bool:
+    """Unlink an overlay image unless the saved config still references it.
+
+    Call after saving the change that dropped the reference.
+    """
     if not filename:
-        return
-    stored = overlay_storage_path(filename)
-    if stored.exists():
-        stored.unlink()
-        return
-    legacy = overlay_legacy_path(filename)
-    if legacy.exists():
-        legacy.unlink()
+        return False
+    with OVERLAY_STORE_LOCK:
+        if saved_overlay_refcounts().get(filename):
+            return False
+        stored = overlay_storage_path(filename)
+        if stored.exists():
+            stored.unlink()
+            return True
+        legacy = overlay_legacy_path(filename)
+        if legacy.exists():
+            legacy.unlink()
+            return True
+    return False
 
 
 def remove_overlay_files(overlays: Optional[list] = None, keep: Optional[set] = None, remove_all: bool = False) -> None:
-    keep_set = set(keep or [])
-    if remove_all or not overlays:
-        if not OVERLAY_DIR.exists():
+    with OVERLAY_STORE_LOCK:
+        keep_set = set(keep or []) | set(saved_overlay_refcounts())
+        if remove_all or not overlays:
+            if not OVERLAY_DIR.exists():
+                return
+            for path in OVERLAY_DIR.iterdir():
+                if not path.is_file():
+                    continue
+                if path.name in keep_set:
+                    continue
+                if not OVERLAY_FILENAME_RE.match(path.name):
+                    continue
+                path.unlink()
             return
-        for path in OVERLAY_DIR.iterdir():
-            if not path.is_file():
-                continue
-            if path.name in keep_set:
+        for filename in overlay_refcounts(overlays):
+            if filename in keep_set:
                 continue
-            if not OVERLAY_FILENAME_RE.match(path.name):
-                continue
-            path.unlink()
+            delete_overlay_file(filename)
+
+
+def sniff_overlay_ext(head: bytes) -> Optional[str]:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def current_overlays(existing: dict) -> list:
+    overlays = existing.get("overlays", [])
+    if not isinstance(overlays, list):
+        overlays = [existing.get("overlay")] if isinstance(existing.get("overlay"), dict) else []
+    return sanitize_overlays({"overlays": overlays}, existing)
+
+
+def attach_overlay_image(overlay_id: str, ext: str, digest: str, original_name: object, place_file) -> dict:
+    """Point an overlay at the content-addressed blob for an uploaded image.
+
+    Blobs are stored as <sha256>.<ext>, so re-uploading an image reuses the
+    existing blob and `place_file` (which must put the image at the given
+    path) is only called for new content. The previous image is unlinked
+    once no overlay references it.
+    """
+    filename = f"{digest}.{ext}"
+    if not OVERLAY_BLOB_RE.match(filename):
+        raise ValueError("invalid image digest")
+    with OVERLAY_STORE_LOCK, CONFIG_WRITER.lock:
+        existing = load_config()
+        overlays = current_overlays(existing)
+        if not overlay_id:
+            overlay_id = generate_overlay_id()
+        idx = next(
+            (i for i, item in enumerate(overlays) if isinstance(item, dict) and item.get("id") == overlay_id),
+            -1,
+        )
+        if idx == -1:
+            overlays.append(sanitize_overlay_item({"id": overlay_id}, {}))
+            idx = len(overlays) - 1
+        overlay_path = overlay_storage_path(filename)
+        deduplicated = overlay_path.exists()
+        if not deduplicated:
+            overlay_path.parent.mkdir(parents=True, exist_ok=True)
+            place_file(overlay_path)
+        previous_file = overlays[idx].get("image_file", "")
+        overlays[idx]["image_file"] = filename
+        overlays[idx]["image_name"] = sanitize_overlay_filename(original_name, ext, "")
+        revision = save_config({"overlays": overlays}, expected_revision=existing["revision"])
+        if previous_file and previous_file != filename:
+            delete_overlay_file(previous_file)
+    return {
+        "status": "ok",
+        "image_file": filename,
+        "image_name": overlays[idx]["image_name"],
+        "image_url": f"/admin/overlays/{filename}",
+        "overlay_id": overlay_id,
+        "deduplicated": deduplicated,
+        "revision": revision,
+    }
+
+
+def overlay_canvas_widths() -> list:
+    """Widths worth pre-rendering for: every ingest width seen so far and the default canvas."""
+    return sorted({overlay_assets.CANVAS_WIDTH, *list(OVERLAY_INGEST_WIDTHS.values())})
+
+
+def prerender_overlays(overlays: list) -> None:
+    ffmpeg = overlay_assets.find_binary("ffmpeg")
+    if not ffmpeg:
         return
-    targets = set()
+    widths = overlay_canvas_widths()
+    keep = []
     for item in overlays:
-        if not isinstance(item, dict):
+        if not isinstance(item, dict) or not item.get("enabled") or not item.get("image_file"):
             continue
-        filename = normalize_overlay_image_file(item.get("image_file"))
-        if filename:
-            targets.add(filename)
-    for filename in targets:
-        if filename in keep_set:
+        source = overlay_storage_path(item["image_file"])
+        if not source.exists():
             continue
-        delete_overlay_file(filename)
+        for width in widths if item.get("size_mode") == "percent" else [None]:
+            asset = overlay_assets.ensure_asset(ffmpeg, source, item, width, OVERLAY_CACHE_DIR)
+            if asset is not None:
+                keep.append(asset)
+    overlay_assets.prune_cache(OVERLAY_CACHE_DIR, keep)
+
+
+def overlay_render_worker() -> None:
+    while True:
+        overlays = OVERLAY_RENDER_QUEUE.get()
+        while True:
+            try:
+                overlays = OVERLAY_RENDER_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            prerender_overlays(overlays)
+        except Exception:
+            pass
+
+
+def queue_overlay_render(overlays: list) -> None:
+    """Pre-render overlay assets in the background; only the latest list is rendered."""
+    thread = OVERLAY_RENDERER["thread"]
+    if thread is None or not thread.is_alive():
+        with OVERLAY_RENDERER_LOCK:
+            thread = OVERLAY_RENDERER["thread"]
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=overlay_render_worker, name="overlay-render", daemon=True)
+                thread.start()
+                OVERLAY_RENDERER["thread"] = thread
+    OVERLAY_RENDER_QUEUE.put(overlays)
 
 
 def build_base_urls() -> list:
@@ -604,32 +1119,286 @@ def build_base_urls() -> list:
     return urls
 
 
-def build_stat_urls() -> list:
-    return [f"{base}/stat" for base in build_base_urls()]
+def drop_path(app: str, name: str) -> str:
+    return f"/control/drop/publisher?app={quote(app, safe='')}&name={quote(name, safe='')}"
+
+
+class ControlError(Exception):
+    pass
+
+
+class ControlClient:
+    """Keep-alive HTTP client for nginx's /stat and /control endpoints.
+
+    Idle connections are pooled per base URL and the base that answered
+    last is tried first, so an unreachable candidate port is only paid for
+    until a working one is known. get_many() runs independent requests
+    concurrently under one shared deadline.
+    """
+
+    def __init__(self, timeout: float, connect_timeout: float, concurrency: int) -> None:
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_idle = max(1, concurrency)
+        self.lock = threading.Lock()
+        self.idle: Dict[str, list] = {}
+        self.preferred: Optional[str] = None
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="control")
+        self.stats = {"requests": 0, "reused": 0, "failovers": 0, "errors": 0}
+
+    def candidates(self) -> list:
+        bases = build_base_urls()
+        with self.lock:
+            preferred = self.preferred
+        if preferred in bases:
+            bases.remove(preferred)
+            bases.insert(0, preferred)
+        return bases
+
+    def connect(self, base: str) -> http.client.HTTPConnection:
+        parsed = urlparse(base)
+        connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        return connection_class(parsed.hostname, parsed.port, timeout=self.connect_timeout)
+
+    def checkout(self, base: str) -> Optional[http.client.HTTPConnection]:
+        with self.lock:
+            idle = self.idle.get(base)
+            return idle.pop() if idle else None
+
+    def checkin(self, base: str, conn: http.client.HTTPConnection) -> None:
+        with self.lock:
+            idle = self.idle.setdefault(base, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def send(self, base: str, path: str, deadline: float) -> bytes:
+        conn = self.checkout(base)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self.connect(base)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                conn.close()
+                raise ControlError(f"{base}{path}: timed out")
+            try:
+                if conn.sock is None:
+                    # A dead candidate fails on connect; only a live one gets the whole deadline.
+                    conn.timeout = min(self.connect_timeout, remaining)
+                    conn.connect()
+                conn.sock.settimeout(remaining)
+                conn.request("GET", path)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                if not reused:
+                    raise ControlError(f"{base}{path}: {exc}") from None
+                # nginx closed the idle keep-alive connection; retry once on a fresh one.
+                conn, reused = None, False
+        with self.lock:
+            self.stats["requests"] += 1
+            if reused:
+                self.stats["reused"] += 1
+        if response.will_close:
+            conn.close()
+        else:
+            self.checkin(base, conn)
+        if response.status >= 400:
+            raise ControlError(f"{base}{path}: HTTP {response.status}")
+        return body
+
+    def get(self, path: str, deadline: Optional[float] = None) -> bytes:
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        last_error = "no control URL"
+        for index, base in enumerate(self.candidates()):
+            try:
+                body = self.send(base, path, deadline)
+            except ControlError as exc:
+                last_error = str(exc)
+                continue
+            with self.lock:
+                if index:
+                    self.stats["failovers"] += 1
+                self.preferred = base
+            return body
+        with self.lock:
+            self.stats["errors"] += 1
+        raise ControlError(last_error)
+
+    def get_many(self, paths: list, timeout: Optional[float] = None) -> list:
+        """(body, None) or (None, error) per path, all within one deadline."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        futures = [self.pool.submit(self.get, path, deadline) for path in paths]
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(timeout=max(0.0, deadline - time.monotonic()) + 0.1), None))
+            except ControlError as exc:
+                results.append((None, str(exc)))
+            except FuturesTimeout:
+                results.append((None, "timed out"))
+        return results
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "preferred": self.preferred,
+                "idle": sum(len(idle) for idle in self.idle.values()),
+                **self.stats,
+            }
 
 
-def build_drop_urls(app: str, name: str) -> list:
-    if CONTROL_URL:
-        parsed = urlparse(CONTROL_URL)
-        if parsed.scheme and parsed.netloc:
-            base_urls = [f"{parsed.scheme}://{parsed.netloc}"]
-        else:
-            base_urls = build_base_urls()
-    else:
-        base_urls = build_base_urls()
-    safe_name = quote(name, safe="")
-    return [f"{base}/control/drop/publisher?app={app}&name={safe_name}" for base in base_urls]
+CONTROL_CLIENT = ControlClient(CONTROL_TIMEOUT, CONTROL_CONNECT_TIMEOUT, CONTROL_CONCURRENCY)
 
 
+@timed("fetch_rtmp_stats")
 def fetch_rtmp_stats() -> Tuple[Optional[bytes], Optional[str]]:
-    last_error = None
-    for url in build_stat_urls():
+    try:
+        return CONTROL_CLIENT.get("/stat"), None
+    except ControlError as exc:
+        return None, str(exc)
+
+
+class StatSnapshot:
+    __slots__ = ("payload", "error", "fetched_at", "parsed")
+
+    def __init__(self, payload: Optional[bytes], error: Optional[str], fetched_at: float) -> None:
+        self.payload = payload
+        self.error = error
+        self.fetched_at = fetched_at
+        self.parsed: Optional[dict] = None
+
+    def model(self) -> dict:
+        """Parse the payload once and share the result with every reader.
+
+        A payload that does not parse (e.g. a truncated body) is dropped and
+        recorded as the snapshot's error, so it reads as a failed fetch
+        rather than as "no streams".
+        """
+        parsed = self.parsed
+        if parsed is None:
+            try:
+                parsed = parse_stat_model(self.payload) if self.payload else {}
+            except ET.ParseError as exc:
+                self.payload = None
+                self.error = f"invalid /stat payload: {exc}"
+                parsed = {}
+            self.parsed = parsed
+        return parsed
+
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+    def is_stale(self) -> bool:
+        return self.age() > STAT_STALE_AFTER
+
+
+class StatCollector:
+    """Polls nginx /stat on one thread and shares the latest payload.
+
+    Callers that find the snapshot too old trigger a refresh, but only one
+    fetch runs at a time; everyone else waits for its result. A max age of
+    0 or less (STAT_POLL_INTERVAL=0 without the thread) means every caller
+    refreshes, still sharing an in-flight fetch. Listeners run
+    on their own "stat-listeners" thread, never on the request thread that
+    happened to refresh; if they fall behind, only the newest snapshot is
+    handed to them.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.snapshot: Optional[StatSnapshot] = None
+        self.inflight = False
+        self.thread: Optional[threading.Thread] = None
+        self.listeners = []
+        self.listener_cond = threading.Condition()
+        self.listener_pending: Optional[StatSnapshot] = None
+        self.listener_thread: Optional[threading.Thread] = None
+        self.listener_errors: Dict[int, str] = {}
+
+    def refresh(self) -> StatSnapshot:
+        with self.cond:
+            if self.inflight:
+                generation = self.snapshot
+                while self.inflight:
+                    self.cond.wait()
+                if self.snapshot is not generation and self.snapshot is not None:
+                    return self.snapshot
+            self.inflight = True
+        snapshot = None
         try:
-            with urllib.request.urlopen(url, timeout=4) as response:
-                return response.read(), None
-        except Exception as exc:
-            last_error = str(exc)
-    return None, last_error
+            payload, error = fetch_rtmp_stats()
+            snapshot = StatSnapshot(payload, error, time.time())
+            # Parse before publishing so readers see a bad payload as an error.
+            snapshot.model()
+        finally:
+            with self.cond:
+                if snapshot is not None:
+                    self.snapshot = snapshot
+                self.inflight = False
+                self.cond.notify_all()
+        self.notify_listeners(snapshot)
+        return snapshot
+
+    def notify_listeners(self, snapshot: StatSnapshot) -> None:
+        if not self.listeners:
+            return
+        with self.listener_cond:
+            self.listener_pending = snapshot
+            if self.listener_thread is None:
+                self.listener_thread = threading.Thread(target=self.run_listeners, name="stat-listeners", daemon=True)
+                self.listener_thread.start()
+            self.listener_cond.notify()
+
+    def run_listeners(self) -> None:
+        while True:
+            with self.listener_cond:
+                while self.listener_pending is None:
+                    self.listener_cond.wait()
+                snapshot = self.listener_pending
+                self.listener_pending = None
+            for index, listener in enumerate(self.listeners):
+                try:
+                    listener(snapshot)
+                except Exception as exc:
+                    # Log each new failure once instead of every poll interval.
+                    message = f"{type(exc).__name__}: {exc}"
+                    if self.listener_errors.get(index) != message:
+                        self.listener_errors[index] = message
+                        print(f"stat listener {getattr(listener, '__qualname__', listener)} failed", file=sys.stderr)
+                        traceback.print_exc()
+                else:
+                    self.listener_errors.pop(index, None)
+
+    def get(self, max_age: Optional[float] = None) -> StatSnapshot:
+        limit = self.interval * 2 if max_age is None else max_age
+        snapshot = self.snapshot
+        if snapshot is not None and limit > 0 and snapshot.age() <= limit:
+            return snapshot
+        return self.refresh()
+
+    def run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, name="stat-collector", daemon=True)
+        self.thread.start()
+
+
+STAT_COLLECTOR = StatCollector(STAT_POLL_INTERVAL)
 
 
 def parse_int(value: Optional[str]) -> Optional[int]:
@@ -650,39 +1419,144 @@ def parse_float(value: Optional[str]) -> Optional[float]:
         return None
 
 
+STAT_STREAM_NUMBERS = {
+    "time": "time_ms",
+    "bw_in": "bw_in",
+    "bw_out": "bw_out",
+    "bytes_in": "bytes_in",
+    "bytes_out": "bytes_out",
+    "nclients": "nclients",
+}
+STAT_CLIENT_NUMBERS = {"id": "id", "time": "time_ms", "dropped": "dropped"}
+STAT_VIDEO_FIELDS = {"width": parse_int, "height": parse_int, "frame_rate": parse_float, "codec": None}
+STAT_AUDIO_FIELDS = {"codec": None, "sample_rate": parse_int, "channels": parse_int}
+
+
+def new_stat_stream() -> dict:
+    return {
+        "name": "",
+        "time_ms": None,
+        "bw_in": None,
+        "bw_out": None,
+        "bytes_in": None,
+        "bytes_out": None,
+        "nclients": None,
+        "publishing": False,
+        "video": None,
+        "audio": None,
+        "clients": [],
+        "push": [],
+    }
+
+
+def is_push_client(client: dict) -> bool:
+    if client.get("publishing"):
+        return False
+    address = str(client.get("address") or "")
+    flashver = str(client.get("flashver") or "")
+    return address.startswith(("rtmp://", "rtmps://")) or "relay" in flashver
+
+
+@timed("stat_parse")
+def parse_stat_model(xml_payload: bytes) -> dict:
+    """Build {app: {stream: {...}}} from nginx-rtmp /stat XML in one pass.
+
+    Elements are detached from their parent as soon as they end, so memory
+    stays flat no matter how many streams and clients the payload lists.
+    Raises ET.ParseError on a malformed or truncated payload.
+    """
+    model: Dict[str, Dict[str, dict]] = {}
+    tags = []
+    elements = []
+    app_name = None
+    stream: Optional[dict] = None
+    pending_streams = []
+    client: Optional[dict] = None
+    for event, elem in ET.iterparse(io.BytesIO(xml_payload), events=("start", "end")):
+        if event == "start":
+            tags.append(elem.tag)
+            elements.append(elem)
+            if elem.tag == "stream" and tags[-2:-1] == ["live"]:
+                stream = new_stat_stream()
+            elif elem.tag in ("video", "audio") and stream is not None and tags[-2:-1] == ["meta"]:
+                stream[elem.tag] = {}
+            elif elem.tag == "client" and stream is not None:
+                client = {"id": None, "address": "", "flashver": "", "time_ms": None, "dropped": None}
+            elif elem.tag == "application":
+                app_name = None
+                pending_streams = []
+            continue
+
+        tag = tags.pop()
+        elements.pop()
+        text = (elem.text or "").strip()
+        parent = tags[-1] if tags else ""
+        if client is not None:
+            if tag == "client":
+                client["publishing"] = bool(client.get("publishing"))
+                stream["clients"].append(client)
+                if is_push_client(client):
+                    stream["push"].append(client)
+                client = None
+            elif parent == "client":
+                if tag in STAT_CLIENT_NUMBERS:
+                    client[STAT_CLIENT_NUMBERS[tag]] = parse_int(text)
+                elif tag in ("address", "flashver"):
+                    client[tag] = text
+                elif tag == "publishing":
+                    client["publishing"] = True
+        elif stream is not None:
+            if tag == "stream":
+                pending_streams.append(stream)
+                if app_name is not None:
+                    model.setdefault(app_name, {})[stream["name"]] = stream
+                stream = None
+            elif parent == "stream":
+                if tag == "name":
+                    stream["name"] = text
+                elif tag in STAT_STREAM_NUMBERS:
+                    stream[STAT_STREAM_NUMBERS[tag]] = parse_int(text)
+                elif tag == "publishing":
+                    stream["publishing"] = True
+            elif parent == "video" and tag in STAT_VIDEO_FIELDS and stream["video"] is not None:
+                convert = STAT_VIDEO_FIELDS[tag]
+                stream["video"][tag] = convert(text) if convert else (text or None)
+            elif parent == "audio" and tag in STAT_AUDIO_FIELDS and stream["audio"] is not None:
+                convert = STAT_AUDIO_FIELDS[tag]
+                stream["audio"][tag] = convert(text) if convert else (text or None)
+        elif tag == "name" and parent == "application":
+            app_name = text
+            streams = model.setdefault(app_name, {})
+            for item in pending_streams:
+                streams[item["name"]] = item
+
+        elem.clear()
+        if elements:
+            elements[-1].remove(elem)
+    return model
+
+
+def stat_streams(model: dict, app_name: str) -> list:
+    return list((model.get(app_name) or {}).values())
+
+
 def extract_stream_meta(xml_payload: bytes, app_name: str) -> list:
     try:
-        root = ET.fromstring(xml_payload)
+        return stream_meta_entries(parse_stat_model(xml_payload), app_name)
     except ET.ParseError:
         return []
-    streams = []
-    for app in root.findall("./server/application"):
-        name_node = app.find("name")
-        if name_node is None or name_node.text != app_name:
-            continue
-        for stream in app.findall("./live/stream"):
-            entry = {
-                "name": stream.findtext("name") or "",
-                "video": {},
-                "audio": {},
-            }
-            video = stream.find("./meta/video")
-            if video is not None:
-                entry["video"] = {
-                    "width": parse_int(video.findtext("width")),
-                    "height": parse_int(video.findtext("height")),
-                    "frame_rate": parse_float(video.findtext("frame_rate")),
-                    "codec": video.findtext("codec"),
-                }
-            audio = stream.find("./meta/audio")
-            if audio is not None:
-                entry["audio"] = {
-                    "codec": audio.findtext("codec"),
-                    "sample_rate": parse_int(audio.findtext("sample_rate")),
-                    "channels": parse_int(audio.findtext("channels")),
-                }
-            streams.append(entry)
-    return streams
+
+
+def stream_meta_entries(model: dict, app_name: str) -> list:
+    entries = []
+    for stream in stat_streams(model, app_name):
+        entry = {"name": stream["name"], "video": {}, "audio": {}}
+        if stream["video"] is not None:
+            entry["video"] = {key: stream["video"].get(key) for key in STAT_VIDEO_FIELDS}
+        if stream["audio"] is not None:
+            entry["audio"] = {key: stream["audio"].get(key) for key in STAT_AUDIO_FIELDS}
+        entries.append(entry)
+    return entries
 
 
 def is_close(value: Optional[float], target: float, tolerance: float = 0.5) -> bool:
@@ -691,7 +1565,315 @@ def is_close(value: Optional[float], target: float, tolerance: float = 0.5) -> b
     return abs(value - target) <= tolerance
 
 
-def build_health_report() -> dict:
+def split_host_port(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    host = host.strip("[]").split("%", 1)[0]
+    if host.startswith("::ffff:") and "." in host:
+        host = host[len("::ffff:"):]
+    return host, int(port)
+
+
+def read_socket_counters(ports: set) -> Optional[Dict[Tuple[str, int], Dict[str, int]]]:
+    """bytes_acked of established TCP sockets to the given remote ports.
+
+    Keyed by (peer host, peer port), then by local address. Linux only
+    (iproute2 ss); None when the counters are unavailable.
+    """
+    ss = shutil.which("ss")
+    if not ss or not ports:
+        return None
+    expression = ["("]
+    for port in sorted(ports):
+        if len(expression) > 1:
+            expression.append("or")
+        expression += ["dport", "=", f":{port}"]
+    expression.append(")")
+    try:
+        result = subprocess.run(
+            [ss, "-tinH", "state", "established", *expression],
+            capture_output=True,
+            text=True,
+            timeout=2,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    counters: Dict[Tuple[str, int], Dict[str, int]] = {}
+    socket_key = None
+    for line in result.stdout.splitlines():
+        if not line[:1].isspace():
+            # Recv-Q Send-Q Local Peer; the TCP info follows on an indented line.
+            fields = line.split()
+            socket_key = None
+            if len(fields) >= 4:
+                try:
+                    socket_key = (split_host_port(fields[3]), fields[2])
+                except ValueError:
+                    pass
+            continue
+        match = SS_BYTES_ACKED_RE.search(line)
+        if socket_key is not None and match:
+            peer, local = socket_key
+            counters.setdefault(peer, {})[local] = int(match.group(1))
+    return counters
+
+
+class PushTelemetry:
+    """Per-destination push state and history, fed by every /stat refresh.
+
+    nginx-rtmp lists each push as a relay client of the live stream whose
+    address is the push URL without "rtmp://", so clients map back to the
+    destinations restream.conf is rendered from. /stat has no per-client
+    byte counters; bw_out comes from the kernel's bytes_acked for the push
+    socket instead, when ss is available.
+    """
+
+    def __init__(self, interval: float, history_sec: int) -> None:
+        self.interval = interval if interval > 0 else 2.0
+        self.capacity = max(2, int(history_sec / self.interval))
+        self.lock = threading.Lock()
+        self.destinations: Dict[str, dict] = {}
+        self.live: set = set()
+        self.unmatched = 0
+        self.observed_at = 0.0
+        self.socket_stats = False
+        self.addresses: Dict[str, Tuple[float, frozenset]] = {}
+
+    def new_destination(self) -> dict:
+        return {
+            "name": "",
+            "connected": False,
+            "client_id": None,
+            "stream": None,
+            "lost_live": False,
+            "uptime_sec": None,
+            "dropped": None,
+            "reconnects": 0,
+            "last_seen": None,
+            "socket": None,
+            "bw_out_kbps": None,
+            "timestamps": array.array("d", [math.nan]) * self.capacity,
+            "series": {name: array.array("d", [math.nan]) * self.capacity for name in PUSH_SERIES},
+            "head": 0,
+            "count": 0,
+        }
+
+    def resolve(self, host: str) -> frozenset:
+        """Addresses of a push host; cached, since nginx resolved it when it connected anyway."""
+        now = time.monotonic()
+        cached = self.addresses.get(host)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        try:
+            addresses = frozenset(info[4][0] for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP))
+        except (OSError, UnicodeError):
+            addresses = frozenset()
+        self.addresses[host] = (now + PUSH_RESOLVE_TTL, addresses)
+        return addresses
+
+    def match_sockets(self, targets: list, counters: Dict[Tuple[str, int], Dict[str, int]]) -> Dict[str, tuple]:
+        """Destination key -> (peer, local address) of its push socket, where unambiguous."""
+        claimed = set()
+        matched: Dict[str, tuple] = {}
+        pending = []
+        for target in targets:
+            host, port = target["connect"]
+            addresses = self.resolve(host)
+            found = [
+                (peer, local)
+                for peer, sockets in counters.items()
+                if peer[1] == port and peer[0] in addresses
+                for local in sockets
+                if (peer, local) not in claimed
+            ]
+            if len(found) == 1:
+                claimed.add(found[0])
+                matched[target["key"]] = found[0]
+            else:
+                pending.append(target)
+        for target in pending:
+            # The host may resolve elsewhere by now; a lone socket to a lone port still matches.
+            port = target["connect"][1]
+            if sum(1 for other in pending if other["connect"][1] == port) != 1:
+                continue
+            found = [
+                (peer, local)
+                for peer, sockets in counters.items()
+                if peer[1] == port
+                for local in sockets
+                if (peer, local) not in claimed
+            ]
+            if len(found) == 1:
+                claimed.add(found[0])
+                matched[target["key"]] = found[0]
+        return matched
+
+    def observe(self, snapshot: StatSnapshot) -> None:
+        if not snapshot.payload:
+            return
+        live = set()
+        clients: Dict[str, list] = {}
+        for stream in stat_streams(snapshot.model(), STREAM_APP):
+            if stream["publishing"]:
+                live.add(stream["name"])
+            for client in stream["push"]:
+                address = str(client.get("address") or "")
+                if address.lower().startswith("rtmp://"):
+                    address = address[len("rtmp://"):]
+                clients.setdefault(address, []).append((stream["name"], client))
+        config = load_config()
+        destinations = config.get("destinations", [])
+        ports = restream_apply.allocate_tunnel_ports(
+            destinations if isinstance(destinations, list) else [],
+            restream_apply.read_port_table(RTMPS_PORTS_PATH),
+            restream_apply.tunnel_base_port(),
+        )
+        targets = restream_apply.push_targets(config, ports)
+
+        matches = {}
+        for target in targets:
+            candidates = clients.pop(target["url"].split("://", 1)[1], [])
+            if candidates:
+                matches[target["key"]] = next((item for item in candidates if item[0] == STREAM_NAME), candidates[0])
+        connected = [target for target in targets if target["key"] in matches]
+        counters = None
+        if PUSH_SOCKET_STATS and connected:
+            counters = read_socket_counters({target["connect"][1] for target in connected})
+        sockets = self.match_sockets(connected, counters) if counters is not None else {}
+        now = time.time()
+
+        with self.lock:
+            previous_live = self.live
+            states = {}
+            for target in targets:
+                key = target["key"]
+                state = self.destinations.get(key) or self.new_destination()
+                state["name"] = target["name"]
+                states[key] = state
+                match = matches.get(key)
+                if match is None:
+                    if state["connected"]:
+                        state["lost_live"] = state["stream"] in live
+                    elif state["stream"] not in live:
+                        state["lost_live"] = False
+                    state.update(connected=False, client_id=None, uptime_sec=None, dropped=None, socket=None, bw_out_kbps=0.0)
+                    self.record(state, now, 0.0, 0.0)
+                    continue
+
+                stream_name, client = match
+                # Only count reconnects while the local stream stayed up; a new publish re-creates every push.
+                continuous = stream_name in previous_live and stream_name in live
+                if state["connected"] and state["client_id"] != client["id"] and continuous:
+                    state["reconnects"] += 1
+                elif not state["connected"] and state["lost_live"] and stream_name in live:
+                    state["reconnects"] += 1
+                bw_out = math.nan
+                found = sockets.get(key)
+                if found is not None:
+                    acked = counters[found[0]][found[1]]
+                    previous = state["socket"]
+                    if previous is not None and previous[0] == found and acked >= previous[1] and now > previous[2]:
+                        bw_out = (acked - previous[1]) * 8 / 1000 / (now - previous[2])
+                    state["socket"] = (found, acked, now)
+                else:
+                    state["socket"] = None
+                uptime = (client.get("time_ms") or 0) / 1000
+                state.update(
+                    connected=True,
+                    client_id=client["id"],
+                    stream=stream_name,
+                    lost_live=False,
+                    uptime_sec=round(uptime, 1),
+                    dropped=client.get("dropped"),
+                    last_seen=int(now),
+                    bw_out_kbps=None if bw_out != bw_out else round(bw_out, 1),
+                )
+                self.record(state, now, bw_out, uptime)
+            self.destinations = states
+            self.live = live
+            self.unmatched = sum(len(items) for items in clients.values())
+            self.observed_at = now
+            self.socket_stats = counters is not None
+
+    def record(self, state: dict, ts: float, bw_out: float, uptime: float) -> None:
+        slot = state["head"]
+        state["timestamps"][slot] = ts
+        state["series"]["bw_out_kbps"][slot] = bw_out
+        state["series"]["uptime_sec"][slot] = uptime
+        state["series"]["reconnects"][slot] = state["reconnects"]
+        state["head"] = (slot + 1) % self.capacity
+        state["count"] = min(state["count"] + 1, self.capacity)
+
+    def report(self, window_sec: float) -> dict:
+        window_sec = max(self.interval, min(window_sec, self.capacity * self.interval))
+        start = time.time() - window_sec
+        destinations = []
+        with self.lock:
+            for key, state in self.destinations.items():
+                timestamps = []
+                series = {name: [] for name in PUSH_SERIES}
+                for offset in range(state["count"]):
+                    slot = (state["head"] - 1 - offset) % self.capacity
+                    ts = state["timestamps"][slot]
+                    if ts < start:
+                        break
+                    timestamps.append(int(ts))
+                    for name in PUSH_SERIES:
+                        value = state["series"][name][slot]
+                        series[name].append(None if value != value else round(value, 1))
+                timestamps.reverse()
+                for values in series.values():
+                    values.reverse()
+                recent = series["reconnects"]
+                destinations.append(
+                    {
+                        "id": key,
+                        "name": state["name"],
+                        "connected": state["connected"],
+                        "uptime_sec": state["uptime_sec"],
+                        "bw_out_kbps": state["bw_out_kbps"],
+                        "reconnects": state["reconnects"],
+                        "reconnects_window": int(recent[-1] - recent[0]) if recent else 0,
+                        "dropped": state["dropped"],
+                        "last_seen": state["last_seen"],
+                        "series": {"t": timestamps, **series},
+                    }
+                )
+            return {
+                "observed_at": int(self.observed_at) if self.observed_at else None,
+                "window_sec": window_sec,
+                "bw_source": "socket" if self.socket_stats else None,
+                "unmatched": self.unmatched,
+                "destinations": destinations,
+            }
+
+
+PUSH_TELEMETRY = PushTelemetry(STAT_POLL_INTERVAL, PUSH_HISTORY_SEC)
+
+
+def track_ingest_widths(snapshot: StatSnapshot) -> None:
+    """Stat listener: record each ingest's width for ffmpeg-overlay.sh and render for new widths."""
+    seen = {}
+    for entry in stream_meta_entries(snapshot.model(), "ingest"):
+        width = entry["video"].get("width")
+        if width:
+            seen[entry["name"]] = width
+    changed = {name: width for name, width in seen.items() if OVERLAY_INGEST_WIDTHS.get(name) != width}
+    if not changed:
+        return
+    rendered = overlay_canvas_widths()
+    new_width = any(width not in rendered for width in changed.values())
+    OVERLAY_INGEST_WIDTHS.update(changed)
+    overlay_assets.write_ingest_widths(OVERLAY_CACHE_DIR, dict(OVERLAY_INGEST_WIDTHS))
+    if new_width:
+        queue_overlay_render(load_config().get("overlays", []))
+
+
+STAT_COLLECTOR.listeners.append(PUSH_TELEMETRY.observe)
+STAT_COLLECTOR.listeners.append(track_ingest_widths)
+
+
+def build_health_report(push_window: float = PUSH_HEALTH_WINDOW) -> dict:
     report: Dict[str, object] = {
         "supported": True,
         "warnings": [],
@@ -734,6 +1916,10 @@ def build_health_report() -> dict:
 
     metrics = read_metrics()
     report["metrics"] = metrics
+    report["config_cache"] = config_cache_stats()
+    report["config_writer"] = CONFIG_WRITER.summary()
+    report["apply"] = APPLY_QUEUE.summary()
+    report["control"] = CONTROL_CLIENT.summary()
     if metrics.get("supported"):
         cpu_pct = (metrics.get("cpu") or {}).get("usage_pct")
         if isinstance(cpu_pct, (int, float)):
@@ -767,14 +1953,19 @@ def build_health_report() -> dict:
             }
         )
 
-    xml_payload, stat_error = fetch_rtmp_stats()
+    stats = STAT_COLLECTOR.get()
+    report["stats"] = {"age_sec": round(stats.age(), 2), "stale": stats.is_stale()}
+    push = PUSH_TELEMETRY.report(push_window)
+    report["push"] = push
+    xml_payload = stats.payload
     if not xml_payload:
         report["supported"] = False
-        report["error"] = stat_error or "RTMP stats unavailable"
+        report["error"] = stats.error or "RTMP stats unavailable"
         return report
 
-    ingest_streams = extract_stream_meta(xml_payload, "ingest")
-    live_streams = extract_stream_meta(xml_payload, STREAM_APP)
+    model = stats.model()
+    ingest_streams = stream_meta_entries(model, "ingest")
+    live_streams = stream_meta_entries(model, STREAM_APP)
     ingest_active = bool(ingest_streams)
     live_active = bool(live_streams)
     report["ingest"] = {"active": ingest_active}
@@ -795,6 +1986,25 @@ def build_health_report() -> dict:
                 "message": "Ingest is active but live output is not. The overlay pipeline may be down.",
             }
         )
+    if live_active:
+        for destination in push["destinations"]:
+            if not destination["connected"]:
+                warnings.append(
+                    {
+                        "level": "warning",
+                        "message": f"Push to {destination['name']} is not connected. Check its URL and stream key.",
+                    }
+                )
+            elif destination["reconnects_window"] >= PUSH_FLAP_RECONNECTS:
+                warnings.append(
+                    {
+                        "level": "warning",
+                        "message": (
+                            f"Push to {destination['name']} reconnected {destination['reconnects_window']} times "
+                            f"in the last {int(push['window_sec'] // 60)} min. The uplink may be saturated."
+                        ),
+                    }
+                )
     if not ingest_active:
         warnings.append(
             {
@@ -859,61 +2069,110 @@ def build_health_report() -> dict:
 
 def list_active_streams(xml_payload: bytes, app_name: str) -> list:
     try:
-        root = ET.fromstring(xml_payload)
+        return active_stream_names(parse_stat_model(xml_payload), app_name)
     except ET.ParseError:
         return []
-    names = []
-    for app in root.findall("./server/application"):
-        name_node = app.find("name")
-        if name_node is None or name_node.text != app_name:
-            continue
-        for stream in app.findall("./live/stream"):
-            stream_name = stream.findtext("name")
-            if stream_name:
-                names.append(stream_name)
-    return names
+
+
+def active_stream_names(model: dict, app_name: str) -> list:
+    return [stream["name"] for stream in stat_streams(model, app_name) if stream["name"]]
 
 
 def trigger_reconnect() -> Tuple[bool, str]:
-    xml_payload, stat_error = fetch_rtmp_stats()
-    ingest_names = []
-    if xml_payload:
-        ingest_names = list_active_streams(xml_payload, "ingest")
+    stats = STAT_COLLECTOR.get(max_age=STAT_POLL_INTERVAL)
+    stat_error = stats.error
+    ingest_names = active_stream_names(stats.model(), "ingest")
 
     last_error = stat_error or "unknown error"
     dropped = []
 
-    for name in ingest_names:
-        for url in build_drop_urls("ingest", name):
-            try:
-                with urllib.request.urlopen(url, timeout=4) as response:
-                    body = response.read().decode("utf-8")
-                dropped.append(f"ingest:{name} -> {body}")
-                break
-            except Exception as exc:
-                last_error = str(exc)
-
-    for url in build_drop_urls("live", STREAM_NAME):
-        try:
-            with urllib.request.urlopen(url, timeout=4) as response:
-                body = response.read().decode("utf-8")
-            dropped.append(f"live:{STREAM_NAME} -> {body}")
-            break
-        except Exception as exc:
-            last_error = str(exc)
+    targets = [("ingest", name) for name in ingest_names] + [("live", STREAM_NAME)]
+    results = CONTROL_CLIENT.get_many([drop_path(app, name) for app, name in targets])
+    for (app, name), (body, error) in zip(targets, results):
+        if error is not None:
+            last_error = error
+            continue
+        dropped.append(f"{app}:{name} -> {body.decode('utf-8')}")
 
     if dropped:
         return True, "; ".join(dropped)
     return False, last_error
 
 
+def freeze_config(value: object) -> object:
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_config(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_config(item) for item in value)
+    return value
+
+
+def thaw_config(value: object) -> object:
+    if isinstance(value, MappingProxyType):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_config(item) for item in value]
+    return value
+
+
+def config_cache_key() -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = CONFIG_PATH.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def invalidate_config_cache() -> None:
+    with CONFIG_CACHE_LOCK:
+        CONFIG_CACHE["key"] = None
+        CONFIG_CACHE["snapshot"] = None
+
+
+def config_cache_stats() -> dict:
+    with CONFIG_CACHE_LOCK:
+        return dict(CONFIG_CACHE_STATS)
+
+
+@timed("load_config")
+def load_config_snapshot() -> MappingProxyType:
+    """Return the sanitized config as a read-only snapshot.
+
+    The snapshot is shared between threads and only rebuilt when the
+    (inode, mtime_ns, size) of data/restream.json changes. A save that is
+    staged but not yet written is returned as-is.
+    """
+    staged = CONFIG_WRITER.snapshot
+    if staged is not None:
+        return staged
+    key = config_cache_key()
+    with CONFIG_CACHE_LOCK:
+        if key is not None and CONFIG_CACHE["key"] == key:
+            CONFIG_CACHE_STATS["hits"] += 1
+            return CONFIG_CACHE["snapshot"]
+        CONFIG_CACHE_STATS["misses"] += 1
+        snapshot = freeze_config(read_config_file())
+        # A rewrite during sanitizing (or a concurrent edit) changes the key;
+        # skip caching so the next call parses the settled file.
+        stable = key is not None and config_cache_key() == key
+        CONFIG_CACHE["key"] = key if stable else None
+        CONFIG_CACHE["snapshot"] = snapshot if stable else None
+        return snapshot
+
+
 def load_config() -> dict:
+    return thaw_config(load_config_snapshot())
+
+
+def read_config_file() -> dict:
     if not CONFIG_PATH.exists() and DEFAULT_CONFIG.exists():
-        CONFIG_PATH.write_text(DEFAULT_CONFIG.read_text(encoding="utf-8"), encoding="utf-8")
+        atomic_write_text(CONFIG_PATH, DEFAULT_CONFIG.read_text(encoding="utf-8"))
     if not CONFIG_PATH.exists():
         return {
+            "revision": 0,
             "destinations": [],
             "ingest_key": "",
+            "ingest_keys": [],
             "public_live": True,
             "public_hls": True,
             "force_transcode": True,
@@ -926,8 +2185,10 @@ def load_config() -> dict:
             "overlays": [sanitize_overlay_item({}, {}, fallback_id="primary")],
         }
     payload = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    payload["revision"] = clamp_int(payload.get("revision"), 0, 2**53, 0)
     if "ingest_key" not in payload:
         payload["ingest_key"] = ""
+    payload["ingest_keys"] = sanitize_ingest_keys(payload.get("ingest_keys"))
     if "public_live" not in payload:
         payload["public_live"] = True
     else:
@@ -968,31 +2229,29 @@ def load_config() -> dict:
     payload["overlays"] = overlays
     payload["overlay"] = overlays[0] if overlays else OVERLAY_DEFAULT.copy()
     if raw_ticker != payload["ticker"]:
-        CONFIG_PATH.write_text(
-            json.dumps(
-                {
-                    "destinations": payload.get("destinations", []),
-                    "ingest_key": payload.get("ingest_key", ""),
-                    "public_live": payload.get("public_live", True),
-                    "public_hls": payload.get("public_hls", True),
-                    "force_transcode": payload.get("force_transcode", True),
-                    "transcode_bitrate_kbps": payload.get(
-                        "transcode_bitrate_kbps", TRANSCODE_DEFAULTS["bitrate_kbps"]
-                    ),
-                    "transcode_maxrate_kbps": payload.get(
-                        "transcode_maxrate_kbps", TRANSCODE_DEFAULTS["maxrate_kbps"]
-                    ),
-                    "transcode_bufsize_kbps": payload.get(
-                        "transcode_bufsize_kbps", TRANSCODE_DEFAULTS["bufsize_kbps"]
-                    ),
-                    "transcode_fps": payload.get("transcode_fps", TRANSCODE_DEFAULTS["fps"]),
-                    "ticker": payload.get("ticker", TICKER_DEFAULT.copy()),
-                    "overlay": payload.get("overlay", OVERLAY_DEFAULT.copy()),
-                    "overlays": payload.get("overlays", []),
-                },
-                indent=2,
-            ),
-            encoding="utf-8",
+        write_config_file(
+            {
+                "revision": payload["revision"],
+                "destinations": payload.get("destinations", []),
+                "ingest_key": payload.get("ingest_key", ""),
+                "ingest_keys": payload.get("ingest_keys", []),
+                "public_live": payload.get("public_live", True),
+                "public_hls": payload.get("public_hls", True),
+                "force_transcode": payload.get("force_transcode", True),
+                "transcode_bitrate_kbps": payload.get(
+                    "transcode_bitrate_kbps", TRANSCODE_DEFAULTS["bitrate_kbps"]
+                ),
+                "transcode_maxrate_kbps": payload.get(
+                    "transcode_maxrate_kbps", TRANSCODE_DEFAULTS["maxrate_kbps"]
+                ),
+                "transcode_bufsize_kbps": payload.get(
+                    "transcode_bufsize_kbps", TRANSCODE_DEFAULTS["bufsize_kbps"]
+                ),
+                "transcode_fps": payload.get("transcode_fps", TRANSCODE_DEFAULTS["fps"]),
+                "ticker": payload.get("ticker", TICKER_DEFAULT.copy()),
+                "overlay": payload.get("overlay", OVERLAY_DEFAULT.copy()),
+                "overlays": payload.get("overlays", []),
+            }
         )
         write_public_config(
             payload.get("public_live", True),
@@ -1002,6 +2261,97 @@ def load_config() -> dict:
     return payload
 
 
+@timed("config_write")
+def write_config_file(document: dict) -> None:
+    # No cache invalidation here: read_config_file() calls this while holding
+    # CONFIG_CACHE_LOCK, and the changed file key already forces a re-read.
+    atomic_write_text(CONFIG_PATH, json.dumps(document, indent=2))
+
+
+class ConfigConflictError(ValueError):
+    def __init__(self, revision: int) -> None:
+        super().__init__(f"config was changed by another save (now at revision {revision}); reload and retry")
+        self.revision = revision
+
+
+class ConfigWriter:
+    """Single writer for data/restream.json.
+
+    save_config() stages the new document under `lock`; readers see it at
+    once through load_config_snapshot(). A background thread writes the
+    latest staged document `delay` seconds after the first change of a
+    burst, so a run of UI saves costs one atomic disk write and one
+    write_public_config(). flush() forces the write, e.g. before the apply
+    script reads the file.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+        self.pending: Optional[dict] = None
+        self.snapshot: Optional[MappingProxyType] = None
+        self.due = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.stats = {"staged": 0, "writes": 0, "conflicts": 0, "errors": 0}
+
+    def stage(self, document: dict) -> None:
+        with self.cond:
+            if self.pending is None:
+                self.due = time.monotonic() + self.delay
+            self.pending = document
+            self.snapshot = freeze_config(document)
+            self.stats["staged"] += 1
+            if self.delay <= 0:
+                self.write_pending()
+                return
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="config-writer", daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def write_pending(self) -> None:
+        document = self.pending
+        if document is None:
+            return
+        try:
+            write_config_file(document)
+            invalidate_config_cache()
+            write_public_config(document["public_live"], document["public_hls"], document["ticker"])
+        except OSError:
+            # Keep the staged copy; the next flush retries.
+            self.stats["errors"] += 1
+            raise
+        self.stats["writes"] += 1
+        self.pending = None
+        self.snapshot = None
+
+    def flush(self) -> None:
+        with self.cond:
+            self.write_pending()
+
+    def run(self) -> None:
+        with self.cond:
+            while True:
+                while self.pending is None:
+                    self.cond.wait()
+                remaining = self.due - time.monotonic()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+                try:
+                    self.write_pending()
+                except OSError:
+                    self.due = time.monotonic() + max(self.delay, 1.0)
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {**self.stats, "pending": self.pending is not None}
+
+
+CONFIG_WRITER = ConfigWriter(CONFIG_WRITE_DELAY)
+
+
 if not STREAM_STATUS_PATH.exists():
     write_stream_status(False)
 if not PUBLIC_CONFIG_PATH.exists():
@@ -1013,102 +2363,399 @@ if not PUBLIC_CONFIG_PATH.exists():
     )
 
 
-def save_config(payload: dict) -> None:
-    existing = load_config()
-    destinations = payload.get("destinations", existing.get("destinations", []))
-    if not isinstance(destinations, list):
-        raise ValueError("destinations must be a list")
-    cleaned = [sanitize_destination(d) for d in destinations if isinstance(d, dict)]
-    ingest_key = payload.get("ingest_key", existing.get("ingest_key", ""))
-    if ingest_key is None:
-        ingest_key = ""
-    ingest_key = str(ingest_key).strip()
-    if any(ch in ingest_key for ch in ["\n", "\r", ";", " "]):
-        ingest_key = ""
-    public_live = bool(payload.get("public_live", existing.get("public_live", True)))
-    public_hls = bool(payload.get("public_hls", existing.get("public_hls", True)))
-    force_transcode = parse_bool(payload.get("force_transcode"), existing.get("force_transcode", True))
-    transcode_bitrate_kbps = clamp_int(
-        payload.get("transcode_bitrate_kbps", existing.get("transcode_bitrate_kbps")),
-        300,
-        20000,
-        TRANSCODE_DEFAULTS["bitrate_kbps"],
-    )
-    transcode_maxrate_kbps = clamp_int(
-        payload.get("transcode_maxrate_kbps", existing.get("transcode_maxrate_kbps")),
-        transcode_bitrate_kbps,
-        30000,
-        max(transcode_bitrate_kbps, TRANSCODE_DEFAULTS["maxrate_kbps"]),
-    )
-    transcode_bufsize_kbps = clamp_int(
-        payload.get("transcode_bufsize_kbps", existing.get("transcode_bufsize_kbps")),
-        transcode_maxrate_kbps,
-        60000,
-        transcode_maxrate_kbps * 2,
-    )
-    transcode_fps = clamp_int(
-        payload.get("transcode_fps", existing.get("transcode_fps")),
-        0,
-        120,
-        TRANSCODE_DEFAULTS["fps"],
-    )
-    ticker = sanitize_ticker(payload, existing)
-    overlays = sanitize_overlays(payload, existing)
-    overlay = overlays[0] if overlays else OVERLAY_DEFAULT.copy()
-    CONFIG_PATH.write_text(
-        json.dumps(
-            {
-                "destinations": cleaned,
-                "ingest_key": ingest_key,
-                "public_live": public_live,
-                "public_hls": public_hls,
-                "force_transcode": force_transcode,
-                "transcode_bitrate_kbps": transcode_bitrate_kbps,
-                "transcode_maxrate_kbps": transcode_maxrate_kbps,
-                "transcode_bufsize_kbps": transcode_bufsize_kbps,
-                "transcode_fps": transcode_fps,
-                "ticker": ticker,
-                "overlay": overlay,
-                "overlays": overlays,
-            },
-            indent=2,
-        ),
-        encoding="utf-8",
-    )
-    write_public_config(public_live, public_hls, ticker)
+@timed("save_config")
+def save_config(payload: dict, expected_revision: Optional[int] = None) -> int:
+    """Merge `payload` into the config and stage it for writing; returns the new revision.
+
+    `expected_revision` (or a "revision" key in the payload) makes the save
+    conditional: it is rejected with ConfigConflictError if another save
+    landed since that revision was read.
+    """
+    with CONFIG_WRITER.lock:
+        existing = load_config()
+        revision = int(existing.get("revision", 0))
+        if expected_revision is None and payload.get("revision") is not None:
+            expected_revision = clamp_int(payload.get("revision"), 0, 2**53, -1)
+        if expected_revision is not None and expected_revision != revision:
+            CONFIG_WRITER.stats["conflicts"] += 1
+            raise ConfigConflictError(revision)
+        destinations = payload.get("destinations", existing.get("destinations", []))
+        if not isinstance(destinations, list):
+            raise ValueError("destinations must be a list")
+        cleaned = [sanitize_destination(d) for d in destinations if isinstance(d, dict)]
+        ingest_key = sanitize_ingest_key(payload.get("ingest_key", existing.get("ingest_key", "")))
+        ingest_keys = sanitize_ingest_keys(payload.get("ingest_keys", existing.get("ingest_keys", [])))
+        public_live = bool(payload.get("public_live", existing.get("public_live", True)))
+        public_hls = bool(payload.get("public_hls", existing.get("public_hls", True)))
+        force_transcode = parse_bool(payload.get("force_transcode"), existing.get("force_transcode", True))
+        transcode_bitrate_kbps = clamp_int(
+            payload.get("transcode_bitrate_kbps", existing.get("transcode_bitrate_kbps")),
+            300,
+            20000,
+            TRANSCODE_DEFAULTS["bitrate_kbps"],
+        )
+        transcode_maxrate_kbps = clamp_int(
+            payload.get("transcode_maxrate_kbps", existing.get("transcode_maxrate_kbps")),
+            transcode_bitrate_kbps,
+            30000,
+            max(transcode_bitrate_kbps, TRANSCODE_DEFAULTS["maxrate_kbps"]),
+        )
+        transcode_bufsize_kbps = clamp_int(
+            payload.get("transcode_bufsize_kbps", existing.get("transcode_bufsize_kbps")),
+            transcode_maxrate_kbps,
+            60000,
+            transcode_maxrate_kbps * 2,
+        )
+        transcode_fps = clamp_int(
+            payload.get("transcode_fps", existing.get("transcode_fps")),
+            0,
+            120,
+            TRANSCODE_DEFAULTS["fps"],
+        )
+        ticker = sanitize_ticker(payload, existing)
+        overlays = sanitize_overlays(payload, existing)
+        overlay = overlays[0] if overlays else OVERLAY_DEFAULT.copy()
+        document = {
+            "revision": revision + 1,
+            "destinations": cleaned,
+            "ingest_key": ingest_key,
+            "ingest_keys": ingest_keys,
+            "public_live": public_live,
+            "public_hls": public_hls,
+            "force_transcode": force_transcode,
+            "transcode_bitrate_kbps": transcode_bitrate_kbps,
+            "transcode_maxrate_kbps": transcode_maxrate_kbps,
+            "transcode_bufsize_kbps": transcode_bufsize_kbps,
+            "transcode_fps": transcode_fps,
+            "ticker": ticker,
+            "overlay": overlay,
+            "overlays": overlays,
+        }
+        CONFIG_WRITER.stage(document)
+    queue_overlay_render(overlays)
+    return revision + 1
+
+
+class ApplyQueue:
+    """Runs applies on a background thread, one at a time.
+
+    submit() returns the job at once. While a job is still queued, later
+    submits join it (restart/reconnect options are OR-ed), so a burst of
+    clicks from one or several admins costs a single run. The pending
+    config is flushed when the job starts, so that run applies the latest
+    save. The apply itself runs in-process through restream_apply (the
+    PowerShell script on Windows); phase timings come from its phase
+    callbacks or "APPLY_PHASE <name>" lines, plus "reconnect" when the
+    stream is dropped afterwards.
+    """
+
+    def __init__(self, history: int) -> None:
+        self.history = max(2, history)
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self.queued: Optional[dict] = None
+        self.running: Optional[dict] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "coalesced": 0, "runs": 0, "failed": 0}
+
+    def submit(self, restart: bool, reconnect: bool) -> Tuple[dict, bool]:
+        with self.cond:
+            self.stats["submitted"] += 1
+            job = self.queued
+            coalesced = job is not None
+            if job is None:
+                job = {
+                    "id": secrets.token_hex(4),
+                    "status": "queued",
+                    "options": {"restart": restart, "reconnect": reconnect},
+                    "requests": 1,
+                    "queued_at": now_ts(),
+                    "started_at": None,
+                    "finished_at": None,
+                    "phase": None,
+                    "phases": {},
+                    "error": None,
+                    "changed": [],
+                    "tunnels": {},
+                    "actions": [],
+                    "log": [],
+                }
+                self.queued = job
+                self.jobs[job["id"]] = job
+                while len(self.jobs) > self.history:
+                    self.jobs.popitem(last=False)
+            else:
+                job["options"]["restart"] = job["options"]["restart"] or restart
+                job["options"]["reconnect"] = job["options"]["reconnect"] or reconnect
+                job["requests"] += 1
+                self.stats["coalesced"] += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="apply-queue", daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+            return self.copy(job), coalesced
+
+    @staticmethod
+    def copy(job: dict) -> dict:
+        return {**job, "options": dict(job["options"]), "phases": dict(job["phases"]), "log": list(job["log"])}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self.copy(job) if job else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            job = self.jobs.get(job_id)
+            while job is not None and job["status"] in ("queued", "running"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            return self.copy(job) if job else None
+
+    def update(self, job: dict, **fields) -> None:
+        with self.lock:
+            job.update(fields)
+
+    def end_phase(self, job: dict, name: str, started: float) -> None:
+        elapsed = round((time.monotonic() - started) * 1000, 1)
+        INSTRUMENTATION.observe_phase(name, elapsed)
+        with self.lock:
+            job["phases"][name] = round(job["phases"].get(name, 0.0) + elapsed, 1)
+
+    def run(self) -> None:
+        while True:
+            with self.cond:
+                while self.queued is None:
+                    self.cond.wait()
+                job = self.queued
+                self.queued = None
+                self.running = job
+                job["status"] = "running"
+                job["started_at"] = now_ts()
+                options = dict(job["options"])
+                self.stats["runs"] += 1
+            result: Dict[str, object] = {"status": "applied"}
+            try:
+                self.execute(job, options["restart"])
+                if options["reconnect"]:
+                    self.update(job, phase="reconnect")
+                    started = time.monotonic()
+                    try:
+                        ok, detail = trigger_reconnect()
+                    except Exception as exc:
+                        ok, detail = False, str(exc)
+                    self.end_phase(job, "reconnect", started)
+                    if ok:
+                        result.update({"reconnect": "ok", "reconnect_result": detail})
+                    else:
+                        result.update({"reconnect": "failed", "reconnect_error": detail})
+            except (restream_apply.ApplyError, OSError, ValueError) as exc:
+                result = {"status": "failed", "error": f"apply failed: {exc}", "failed_phase": job["phase"]}
+            except Exception as exc:
+                # A bug must fail this job, not end the worker and strand every later apply.
+                traceback.print_exc()
+                result = {
+                    "status": "failed",
+                    "error": f"apply failed: {type(exc).__name__}: {exc}",
+                    "failed_phase": job["phase"],
+                }
+            with self.cond:
+                job.update(result)
+                job["phase"] = None
+                job["finished_at"] = now_ts()
+                if job["status"] == "failed":
+                    self.stats["failed"] += 1
+                self.running = None
+                self.cond.notify_all()
+
+    def execute(self, job: dict, restart: bool) -> None:
+        CONFIG_WRITER.flush()
+        if IS_WINDOWS:
+            self.execute_script(job, restart)
+            return
+        overrides = restream_apply.read_override(ROOT_DIR)
+        config = load_config()
+        if any(key in config and config[key] != value for key, value in overrides.items()):
+            # Same merge the shell pipeline did, but through save_config so revisions hold.
+            save_config(overrides)
+            CONFIG_WRITER.flush()
+            config = load_config()
+        current = {"phase": None, "started": 0.0}
+
+        def on_phase(name: str) -> None:
+            if current["phase"]:
+                self.end_phase(job, current["phase"], current["started"])
+            current.update(phase=name, started=time.monotonic())
+            self.update(job, phase=name)
 
+        try:
+            # public-config.json is kept current by every save (write_public_config).
+            result = restream_apply.apply(ROOT_DIR, config, restart=restart, public_config=False, on_phase=on_phase)
+        finally:
+            if current["phase"]:
+                self.end_phase(job, current["phase"], current["started"])
+        self.update(
+            job, changed=result["changed"], tunnels=result["tunnels"], actions=result["actions"], log=result["messages"]
+        )
 
-def load_ingest_key() -> str:
-    return str(load_config().get("ingest_key", "")).strip()
+    def execute_script(self, job: dict, restart: bool) -> None:
+        env = os.environ.copy()
+        if restart:
+            env["RESTART_NGINX"] = "1"
+        cmd = ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-File", str(APPLY_SCRIPT)]
+        phase = "generate"
+        self.update(job, phase=phase)
+        started = time.monotonic()
+        output: deque = deque(maxlen=APPLY_LOG_LINES)
+        proc = subprocess.Popen(
+            cmd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        )
+        timed_out = threading.Event()
 
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
 
-def read_metrics() -> dict:
-    global CPU_SAMPLE, NET_SAMPLE
-    if os.name != "posix" or not Path("/proc/stat").exists():
-        return {"supported": False}
+        timer = threading.Timer(APPLY_TIMEOUT, kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                line = line.rstrip()
+                if line.startswith(APPLY_PHASE_PREFIX):
+                    name = line[len(APPLY_PHASE_PREFIX):].strip()
+                    if name and name != phase:
+                        self.end_phase(job, phase, started)
+                        phase = name
+                        started = time.monotonic()
+                        self.update(job, phase=phase)
+                    continue
+                if line:
+                    output.append(line)
+                    self.update(job, log=list(output))
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+        self.end_phase(job, phase, started)
+        if returncode != 0:
+            reason = f"timed out after {APPLY_TIMEOUT:g}s" if timed_out.is_set() else f"exit status {returncode}"
+            detail = f" ({output[-1]})" if output else ""
+            raise restream_apply.ApplyError(f"{reason} during {phase}{detail}")
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                "running": self.running["id"] if self.running else None,
+                "queued": self.queued["id"] if self.queued else None,
+            }
 
-    metrics: Dict[str, object] = {"supported": True}
-    now = time.time()
+    def recent(self) -> list:
+        with self.lock:
+            return [self.copy(job) for job in reversed(self.jobs.values())]
 
-    # CPU usage
+
+APPLY_QUEUE = ApplyQueue(APPLY_JOB_HISTORY)
+
+
+def load_ingest_key() -> str:
+    return str(load_config_snapshot().get("ingest_key", "")).strip()
+
+
+def digest_ingest_key(key: str) -> bytes:
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+
+def ingest_key_index() -> dict:
+    """Return the ingest key index, rebuilding it when the config snapshot changes."""
+    snapshot = load_config_snapshot()
+    index = INGEST_INDEX["current"]
+    if index is not None and index["source"] is snapshot:
+        return index
+    entries = []
+    legacy = str(snapshot.get("ingest_key", "")).strip()
+    if legacy:
+        entries.append((digest_ingest_key(legacy), STREAM_NAME, False))
+    for item in snapshot.get("ingest_keys", ()):
+        entries.append((digest_ingest_key(item["key"]), item["stream"], True))
+    index = {"source": snapshot, "open": not entries, "entries": tuple(entries)}
+    INGEST_INDEX["current"] = index
+    return index
+
+
+def authorize_ingest_key(key: str) -> Tuple[bool, str, bool]:
+    """(allowed, stream name, whether the stream should be renamed to it).
+
+    Only keys from ingest_keys rename the stream; the legacy ingest_key and
+    an open ingest keep publishing under the name the encoder chose.
+    """
+    index = ingest_key_index()
+    if index["open"]:
+        return True, STREAM_NAME, False
+    presented = digest_ingest_key(key)
+    matched = ""
+    rename = False
+    # Compare against every entry so the timing does not reveal which key matched.
+    for digest, stream, mapped in index["entries"]:
+        if hmac.compare_digest(presented, digest) and not matched:
+            matched = stream
+            rename = mapped
+    return bool(matched), matched, rename
+
+
+PUBLISH_LATENCY = LatencyHistogram()
+
+
+def read_proc_counters() -> dict:
+    """Read the raw cumulative counters needed for rate calculations."""
+    counters: Dict[str, object] = {"ts": time.time(), "cpu": None, "net": None}
     try:
         with open("/proc/stat", "r", encoding="utf-8") as handle:
             line = handle.readline()
-        parts = line.split()
-        values = [int(v) for v in parts[1:]]
-        total = sum(values)
+        values = [int(v) for v in line.split()[1:]]
         idle = values[3] + (values[4] if len(values) > 4 else 0)
-        usage_pct = None
-        if CPU_SAMPLE:
-            prev_total, prev_idle, prev_ts = CPU_SAMPLE
-            total_delta = total - prev_total
-            idle_delta = idle - prev_idle
-            if total_delta > 0:
-                usage_pct = max(0.0, min(100.0, (1 - idle_delta / total_delta) * 100))
-        CPU_SAMPLE = (total, idle, now)
-        metrics["cpu"] = {"usage_pct": usage_pct}
+        counters["cpu"] = (sum(values), idle)
+    except Exception:
+        pass
+    try:
+        rx_total = 0
+        tx_total = 0
+        with open("/proc/net/dev", "r", encoding="utf-8") as handle:
+            lines = handle.readlines()[2:]
+        for line in lines:
+            iface, data = line.split(":", 1)
+            if iface.strip() == "lo":
+                continue
+            fields = data.split()
+            rx_total += int(fields[0])
+            tx_total += int(fields[8])
+        counters["net"] = (rx_total, tx_total)
     except Exception:
-        metrics["cpu"] = {"usage_pct": None}
+        pass
+    return counters
+
+
+def collect_metrics(previous: Optional[dict], current: dict) -> dict:
+    metrics: Dict[str, object] = {"supported": True}
+
+    # CPU usage
+    usage_pct = None
+    if current["cpu"] is not None and previous and previous.get("cpu") is not None:
+        total_delta = current["cpu"][0] - previous["cpu"][0]
+        idle_delta = current["cpu"][1] - previous["cpu"][1]
+        if total_delta > 0:
+            usage_pct = max(0.0, min(100.0, (1 - idle_delta / total_delta) * 100))
+    metrics["cpu"] = {"usage_pct": usage_pct}
 
     # Memory
     mem_total = None
@@ -1146,34 +2793,22 @@ def read_metrics() -> dict:
         metrics["disk"] = {"total_gb": None, "used_gb": None, "used_pct": None}
 
     # Network
-    try:
-        rx_total = 0
-        tx_total = 0
-        with open("/proc/net/dev", "r", encoding="utf-8") as handle:
-            lines = handle.readlines()[2:]
-        for line in lines:
-            iface, data = line.split(":", 1)
-            iface = iface.strip()
-            if iface == "lo":
-                continue
-            fields = data.split()
-            rx_total += int(fields[0])
-            tx_total += int(fields[8])
+    if current["net"] is not None:
+        rx_total, tx_total = current["net"]
         rx_mbps = None
         tx_mbps = None
-        if NET_SAMPLE:
-            prev_rx, prev_tx, prev_ts = NET_SAMPLE
-            delta = max(0.001, now - prev_ts)
+        if previous and previous.get("net") is not None:
+            prev_rx, prev_tx = previous["net"]
+            delta = max(0.001, current["ts"] - previous["ts"])
             rx_mbps = round(((rx_total - prev_rx) * 8) / (1_000_000 * delta), 2)
             tx_mbps = round(((tx_total - prev_tx) * 8) / (1_000_000 * delta), 2)
-        NET_SAMPLE = (rx_total, tx_total, now)
         metrics["network"] = {
             "rx_mbps": rx_mbps,
             "tx_mbps": tx_mbps,
             "rx_bytes": rx_total,
             "tx_bytes": tx_total,
         }
-    except Exception:
+    else:
         metrics["network"] = {"rx_mbps": None, "tx_mbps": None}
 
     # Uptime + loadavg
@@ -1193,13 +2828,366 @@ def read_metrics() -> dict:
     return metrics
 
 
-def parse_plain_credentials() -> Optional[Tuple[str, str]]:
-    creds_path = DATA_DIR / "admin.credentials"
-    if not creds_path.exists():
+def metric_value(value: object) -> float:
+    return float(value) if isinstance(value, (int, float)) else math.nan
+
+
+class MetricsSampler:
+    """Samples system metrics on one thread into fixed-size ring buffers.
+
+    Every caller reads the same samples, so concurrent dashboards no longer
+    reset each other's CPU and network deltas. Only the sampler thread
+    records into the rings; a request that finds the latest sample stale
+    takes a fresh one for itself, so the history keeps a regular cadence.
+    """
+
+    def __init__(self, interval: float, history_sec: int) -> None:
+        self.interval = interval if interval > 0 else 5.0
+        self.capacity = max(2, int(history_sec / self.interval))
+        self.lock = threading.Lock()
+        self.timestamps = array.array("d", [math.nan]) * self.capacity
+        self.series = {name: array.array("d", [math.nan]) * self.capacity for name in METRICS_SERIES}
+        self.head = 0
+        self.count = 0
+        self.counters: Optional[dict] = None
+        self.latest: Optional[dict] = None
+        self.latest_ts = 0.0
+        self.thread: Optional[threading.Thread] = None
+
+    @timed("metrics_sample")
+    def sample(self, record: bool = True) -> dict:
+        with self.lock:
+            current = read_proc_counters()
+            metrics = collect_metrics(self.counters, current)
+            self.counters = current
+            self.latest = metrics
+            self.latest_ts = current["ts"]
+            if not record:
+                return metrics
+            values = {
+                "cpu_pct": metric_value((metrics.get("cpu") or {}).get("usage_pct")),
+                "mem_pct": metric_value((metrics.get("memory") or {}).get("used_pct")),
+                "mem_used_mb": metric_value((metrics.get("memory") or {}).get("used_mb")),
+                "rx_mbps": metric_value((metrics.get("network") or {}).get("rx_mbps")),
+                "tx_mbps": metric_value((metrics.get("network") or {}).get("tx_mbps")),
+                "load1": metric_value((metrics.get("loadavg") or [None])[0]),
+            }
+            slot = self.head
+            self.timestamps[slot] = current["ts"]
+            for name in METRICS_SERIES:
+                self.series[name][slot] = values[name]
+            self.head = (slot + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            return metrics
+
+    def current(self) -> dict:
+        with self.lock:
+            latest = self.latest
+            fresh = latest is not None and time.time() - self.latest_ts <= self.interval * 2
+        if not fresh:
+            latest = self.sample(record=False)
+        return latest
+
+    def history(self, window_sec: float, step_sec: float) -> dict:
+        step_sec = max(self.interval, step_sec)
+        window_sec = max(step_sec, min(window_sec, self.capacity * self.interval))
+        now = time.time()
+        start = now - window_sec
+        buckets = int(math.ceil(window_sec / step_sec))
+        sums = {name: [0.0] * buckets for name in METRICS_SERIES}
+        counts = {name: [0] * buckets for name in METRICS_SERIES}
+        mins = {name: [math.inf] * buckets for name in METRICS_SERIES}
+        maxs = {name: [-math.inf] * buckets for name in METRICS_SERIES}
+        with self.lock:
+            for offset in range(self.count):
+                slot = (self.head - 1 - offset) % self.capacity
+                ts = self.timestamps[slot]
+                if ts < start:
+                    break
+                bucket = min(buckets - 1, int((ts - start) // step_sec))
+                for name in METRICS_SERIES:
+                    value = self.series[name][slot]
+                    if value != value:
+                        continue
+                    sums[name][bucket] += value
+                    counts[name][bucket] += 1
+                    if value < mins[name][bucket]:
+                        mins[name][bucket] = value
+                    if value > maxs[name][bucket]:
+                        maxs[name][bucket] = value
+        series = {}
+        for name in METRICS_SERIES:
+            avg_values = []
+            min_values = []
+            max_values = []
+            for bucket in range(buckets):
+                count = counts[name][bucket]
+                if not count:
+                    avg_values.append(None)
+                    min_values.append(None)
+                    max_values.append(None)
+                    continue
+                avg_values.append(round(sums[name][bucket] / count, 2))
+                min_values.append(round(mins[name][bucket], 2))
+                max_values.append(round(maxs[name][bucket], 2))
+            series[name] = {"min": min_values, "avg": avg_values, "max": max_values}
+        return {
+            "interval_sec": self.interval,
+            "window_sec": window_sec,
+            "step_sec": step_sec,
+            "start": int(start),
+            "t": [int(start + bucket * step_sec) for bucket in range(buckets)],
+            "series": series,
+        }
+
+    def run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.thread is not None or not metrics_supported():
+            return
+        self.thread = threading.Thread(target=self.run, name="metrics-sampler", daemon=True)
+        self.thread.start()
+
+
+def metrics_supported() -> bool:
+    return os.name == "posix" and Path("/proc/stat").exists()
+
+
+METRICS_SAMPLER = MetricsSampler(METRICS_SAMPLE_INTERVAL, METRICS_HISTORY_SEC)
+
+
+def read_metrics() -> dict:
+    if not metrics_supported():
+        return {"supported": False}
+    return METRICS_SAMPLER.current()
+
+
+def prom_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prom_value(value: object) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(float(value)) if isinstance(value, float) else str(value)
+    return "NaN"
+
+
+def prom_histogram(lines: list, name: str, labels: str, histogram: LatencyHistogram) -> None:
+    """Append one histogram in seconds; `labels` is a rendered label list ending in "," or empty."""
+    counts, total, sum_ms, _ = histogram.state()
+    running = 0
+    for bound, count in zip(histogram.buckets_ms, counts):
+        running += count
+        lines.append(f'{name}_bucket{{{labels}le="{bound / 1000:g}"}} {running}')
+    lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {total}')
+    suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {sum_ms / 1000!r}")
+    lines.append(f"{name}_count{suffix} {total}")
+
+
+def prom_family(lines: list, name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def read_viewer_job() -> dict:
+    try:
+        return json.loads(HLS_VIEWERS_SKETCH_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def render_prometheus() -> str:
+    """Text exposition (format 0.0.4) of request, section and system metrics."""
+    lines: list = []
+    prom_family(lines, "redstudio_http_requests_total", "counter", "Admin API responses by route and status class.")
+    for method, table in INSTRUMENTATION.routes.items():
+        for route, histogram in table.items():
+            for status_class, count in enumerate(histogram.class_counts()):
+                if count:
+                    lines.append(
+                        f'redstudio_http_requests_total{{method="{method}",route="{route}",code="{status_class}xx"}} {count}'
+                    )
+    prom_family(lines, "redstudio_http_request_duration_seconds", "histogram", "Admin API request latency by route.")
+    for method, table in INSTRUMENTATION.routes.items():
+        for route, histogram in table.items():
+            # Routes that never served a request are left out to keep scrapes small.
+            if histogram.total:
+                prom_histogram(
+                    lines, "redstudio_http_request_duration_seconds", f'method="{method}",route="{route}",', histogram
+                )
+    prom_family(lines, "redstudio_section_duration_seconds", "histogram", "Time spent in instrumented functions.")
+    for section, histogram in sorted(INSTRUMENTATION.sections.items()):
+        prom_histogram(lines, "redstudio_section_duration_seconds", f'section="{section}",', histogram)
+    prom_family(lines, "redstudio_apply_phase_duration_seconds", "histogram", "Restream apply phase durations.")
+    for phase, histogram in sorted(INSTRUMENTATION.phases.items()):
+        prom_histogram(lines, "redstudio_apply_phase_duration_seconds", f'phase="{prom_label(phase)}",', histogram)
+    prom_family(lines, "redstudio_publish_auth_duration_seconds", "histogram", "on_publish key check latency.")
+    prom_histogram(lines, "redstudio_publish_auth_duration_seconds", "", PUBLISH_LATENCY)
+
+    with CONFIG_CACHE_LOCK:
+        cache = dict(CONFIG_CACHE_STATS)
+    prom_family(lines, "redstudio_config_cache_total", "counter", "load_config() cache lookups.")
+    for result in ("hits", "misses"):
+        lines.append(f'redstudio_config_cache_total{{result="{result}"}} {cache.get(result, 0)}')
+    control = CONTROL_CLIENT.summary()
+    prom_family(lines, "redstudio_control_requests_total", "counter", "Requests to the nginx /stat and /control endpoints.")
+    for kind in ("requests", "reused", "failovers", "errors"):
+        lines.append(f'redstudio_control_requests_total{{kind="{kind}"}} {control.get(kind, 0)}')
+    prom_family(lines, "redstudio_threads", "gauge", "Threads in the admin API process.")
+    lines.append(f"redstudio_threads {threading.active_count()}")
+
+    if metrics_supported():
+        metrics = METRICS_SAMPLER.current()
+        memory = metrics.get("memory") or {}
+        disk = metrics.get("disk") or {}
+        network = metrics.get("network") or {}
+        gauges = (
+            ("redstudio_cpu_usage_percent", "Host CPU usage.", (metrics.get("cpu") or {}).get("usage_pct")),
+            ("redstudio_memory_used_percent", "Host memory in use.", memory.get("used_pct")),
+            ("redstudio_memory_used_megabytes", "Host memory in use, in MB.", memory.get("used_mb")),
+            ("redstudio_disk_used_percent", "Disk usage of the install volume.", disk.get("used_pct")),
+            ("redstudio_network_receive_mbps", "Host receive rate (non-loopback).", network.get("rx_mbps")),
+            ("redstudio_network_transmit_mbps", "Host transmit rate (non-loopback).", network.get("tx_mbps")),
+            ("redstudio_uptime_seconds", "Host uptime.", metrics.get("uptime_sec")),
+        )
+        for name, help_text, value in gauges:
+            prom_family(lines, name, "gauge", help_text)
+            lines.append(f"{name} {prom_value(value)}")
+        prom_family(lines, "redstudio_load_average", "gauge", "Host load average.")
+        for period, value in zip(("1m", "5m", "15m"), metrics.get("loadavg") or ()):
+            lines.append(f'redstudio_load_average{{period="{period}"}} {prom_value(value)}')
+
+    viewers = read_viewer_job()
+    if "job_ms" in viewers:
+        prom_family(lines, "redstudio_viewer_job_duration_seconds", "gauge", "Duration of the last hls-viewers update.")
+        lines.append(f"redstudio_viewer_job_duration_seconds {prom_value(viewers['job_ms'] / 1000)}")
+        prom_family(lines, "redstudio_viewer_job_lines", "gauge", "Access log lines read by the last hls-viewers update.")
+        lines.append(f"redstudio_viewer_job_lines {prom_value(viewers.get('lines'))}")
+    return "\n".join(lines) + "\n"
+
+
+def profiling_enabled() -> bool:
+    """ADMIN_PROFILING=1, or data/admin-profiling.enabled to switch it on without a restart."""
+    return ADMIN_PROFILING or PROFILING_FLAG_PATH.exists()
+
+
+STACK_PROFILER = profiling.StackProfiler()
+ALLOCATION_TRACER = profiling.AllocationTracer()
+
+
+def metrics_signature(metrics: dict) -> str:
+    """What the dashboard shows of `metrics`: uptime in whole hours, no raw byte counters."""
+    shown = dict(metrics)
+    uptime = shown.pop("uptime_sec", None)
+    shown["uptime_hours"] = uptime // 3600 if isinstance(uptime, int) else None
+    if isinstance(shown.get("network"), dict):
+        shown["network"] = {key: value for key, value in shown["network"].items() if not key.endswith("_bytes")}
+    return json.dumps(shown, sort_keys=True)
+
+
+def encode_event(name: str, payload: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+class EventHub:
+    """Computes dashboard sections once per tick and fans them out over SSE.
+
+    Only sections whose content changed since the last tick are sent; new
+    subscribers first receive the latest frame of every section.
+    """
+
+    def __init__(self, interval: float, max_subscribers: int) -> None:
+        self.interval = interval if interval > 0 else 5.0
+        self.max_subscribers = max_subscribers
+        self.cond = threading.Condition()
+        self.subscribers = set()
+        self.frames: Dict[str, bytes] = {}
+        self.signatures: Dict[str, str] = {}
+        self.thread: Optional[threading.Thread] = None
+
+    def subscribe(self) -> Optional["queue.Queue[bytes]"]:
+        with self.cond:
+            if len(self.subscribers) >= self.max_subscribers:
+                return None
+            channel: "queue.Queue[bytes]" = queue.Queue(maxsize=8)
+            for frame in self.frames.values():
+                channel.put_nowait(frame)
+            self.subscribers.add(channel)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="event-hub", daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+            return channel
+
+    def unsubscribe(self, channel: "queue.Queue[bytes]") -> None:
+        with self.cond:
+            self.subscribers.discard(channel)
+
+    def publish(self, name: str, payload: dict, signature: str) -> None:
+        if self.signatures.get(name) == signature:
+            return
+        frame = encode_event(name, payload)
+        with self.cond:
+            self.signatures[name] = signature
+            self.frames[name] = frame
+            for channel in list(self.subscribers):
+                try:
+                    channel.put_nowait(frame)
+                except queue.Full:
+                    # A client that cannot keep up is dropped; EventSource reconnects.
+                    self.subscribers.discard(channel)
+                    try:
+                        channel.get_nowait()
+                    except queue.Empty:
+                        pass
+                    channel.put_nowait(b"")
+
+    def tick(self) -> None:
+        metrics = read_metrics()
+        self.publish("metrics", metrics, metrics_signature(metrics))
+        health = build_health_report()
+        health.pop("metrics", None)
+        volatile = {key: value for key, value in health.items() if key not in ("stats", "config_cache", "config_writer", "apply", "push", "control")}
+        self.publish("health", health, json.dumps(volatile, sort_keys=True))
+
+    def run(self) -> None:
+        while True:
+            with self.cond:
+                while not self.subscribers:
+                    self.signatures.clear()
+                    self.frames.clear()
+                    self.cond.wait()
+            try:
+                self.tick()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+
+
+EVENT_HUB = EventHub(EVENTS_INTERVAL, EVENTS_MAX_SUBSCRIBERS)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
         return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def parse_plain_credentials_text(text: str) -> Optional[Tuple[str, str]]:
     user = ""
     password = ""
-    for line in creds_path.read_text(encoding="utf-8").splitlines():
+    for line in text.splitlines():
         line = line.strip()
         if line.startswith("user="):
             user = line.split("=", 1)[1].strip()
@@ -1210,32 +3198,262 @@ def parse_plain_credentials() -> Optional[Tuple[str, str]]:
     return None
 
 
+def parse_htpasswd_text(text: str) -> Dict[str, str]:
+    entries: Dict[str, str] = {}
+    for line in text.splitlines():
+        if ":" not in line:
+            continue
+        name, hashed = line.split(":", 1)
+        entries.setdefault(name, hashed)
+    return entries
+
+
+class CredentialIndex:
+    """Parsed admin.credentials and admin.htpasswd, reloaded only when a file changes."""
+
+    def __init__(self, creds_path: Path, htpasswd_path: Path) -> None:
+        self.creds_path = creds_path
+        self.htpasswd_path = htpasswd_path
+        self.lock = threading.Lock()
+        self.signatures: Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]] = (None, None)
+        self.plain: Optional[Tuple[str, str]] = None
+        self.hashes: Dict[str, str] = {}
+        self.loaded = False
+
+    def refresh(self) -> None:
+        signatures = (file_signature(self.creds_path), file_signature(self.htpasswd_path))
+        if self.loaded and signatures == self.signatures:
+            return
+        with self.lock:
+            plain = None
+            hashes: Dict[str, str] = {}
+            try:
+                if signatures[0] is not None:
+                    plain = parse_plain_credentials_text(self.creds_path.read_text(encoding="utf-8"))
+                if signatures[1] is not None:
+                    hashes = parse_htpasswd_text(self.htpasswd_path.read_text(encoding="utf-8"))
+            except OSError:
+                return
+            self.plain = plain
+            self.hashes = hashes
+            self.signatures = signatures
+            self.loaded = True
+
+    def plain_credentials(self) -> Optional[Tuple[str, str]]:
+        self.refresh()
+        return self.plain
+
+    def hash_for(self, user: str) -> Optional[str]:
+        self.refresh()
+        return self.hashes.get(user)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets; the least recently used keys are dropped past max_keys."""
+
+    def __init__(self, rate_per_sec: float, burst: float, max_keys: int) -> None:
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Consume a token; return 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return wait
+
+
+class LoginBusyError(Exception):
+    pass
+
+
+CREDENTIALS = CredentialIndex(CREDENTIALS_PATH, HTPASSWD_PATH)
+LOGIN_IP_LIMITER = TokenBucketLimiter(LOGIN_IP_RATE, LOGIN_IP_BURST, LOGIN_THROTTLE_MAX_KEYS)
+LOGIN_USER_LIMITER = TokenBucketLimiter(LOGIN_USER_RATE, LOGIN_USER_BURST, LOGIN_THROTTLE_MAX_KEYS)
+HASH_POOL = ThreadPoolExecutor(max_workers=max(1, LOGIN_HASH_WORKERS), thread_name_prefix="login-hash")
+HASH_SLOTS = threading.BoundedSemaphore(max(1, LOGIN_HASH_WORKERS) + max(0, LOGIN_HASH_QUEUE))
+
+
+def parse_plain_credentials() -> Optional[Tuple[str, str]]:
+    return CREDENTIALS.plain_credentials()
+
+
+def check_crypt(password: str, hashed: str) -> bool:
+    try:
+        return hmac.compare_digest(crypt.crypt(password, hashed) or "", hashed)
+    except Exception:
+        return False
+
+
 def verify_password(user: str, password: str) -> bool:
     creds = parse_plain_credentials()
-    if creds and user == creds[0] and password == creds[1]:
+    # compare_digest() only accepts ASCII str, so compare the UTF-8 bytes.
+    if (
+        creds
+        and hmac.compare_digest(user.encode("utf-8"), creds[0].encode("utf-8"))
+        and hmac.compare_digest(password.encode("utf-8"), creds[1].encode("utf-8"))
+    ):
         return True
-    htpasswd_path = DATA_DIR / "admin.htpasswd"
-    if not htpasswd_path.exists():
-        return False
     if crypt is None:
         return False
-    for line in htpasswd_path.read_text(encoding="utf-8").splitlines():
-        if ":" not in line:
-            continue
-        name, hashed = line.split(":", 1)
-        if name != user:
-            continue
+    hashed = CREDENTIALS.hash_for(user)
+    if hashed is None:
+        return False
+    # Hashing runs on a small fixed pool so a login burst cannot take more
+    # than LOGIN_HASH_WORKERS cores; excess attempts are rejected, not queued.
+    # The slot is held until the crypt call itself finishes, not until the
+    # caller stops waiting for it.
+    if not HASH_SLOTS.acquire(blocking=False):
+        raise LoginBusyError("too many login attempts in progress")
+    try:
+        future = HASH_POOL.submit(check_crypt, password, hashed)
+    except BaseException:
+        HASH_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _: HASH_SLOTS.release())
+    try:
+        return future.result(timeout=LOGIN_HASH_TIMEOUT)
+    except FuturesTimeout:
+        raise LoginBusyError("login check timed out") from None
+
+
+class SessionStore:
+    """Thread-safe LRU of admin sessions with expiry and on-disk persistence.
+
+    Sessions are keyed by the SHA-256 of the cookie token, so the persisted
+    file never contains a usable token. At most `max_entries` sessions are
+    kept; the least recently used one is evicted first.
+    """
+
+    def __init__(self, path: Path, ttl: int, max_entries: int) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.lock = threading.Lock()
+        # Serializes save(): the snapshot is taken and written under it, so an
+        # older snapshot can never be renamed over a newer one.
+        self.write_lock = threading.Lock()
+        self.sessions: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self.revision = 0
+        self.saved_revision = 0
+        self.thread: Optional[threading.Thread] = None
+        self.load()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def load(self) -> None:
         try:
-            return crypt.crypt(password, hashed) == hashed
-        except Exception:
-            return False
-    return False
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(entries, list):
+            return
+        now = now_ts()
+        with self.lock:
+            for entry in entries[-self.max_entries :]:
+                if not isinstance(entry, dict):
+                    continue
+                key = entry.get("key")
+                exp = entry.get("exp")
+                if isinstance(key, str) and isinstance(exp, int) and exp >= now:
+                    self.sessions[key] = {"user": str(entry.get("user", "")), "exp": exp}
+
+    def save(self) -> None:
+        with self.write_lock:
+            with self.lock:
+                revision = self.revision
+                if revision == self.saved_revision:
+                    # A concurrent save already wrote this state (or a newer one).
+                    return
+                entries = [{"key": key, **session} for key, session in self.sessions.items()]
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(entries, handle)
+                tmp_path.replace(self.path)
+            except OSError:
+                return
+            self.saved_revision = revision
+
+    def create(self, user: str) -> str:
+        token = secrets.token_urlsafe(32)
+        with self.lock:
+            self.sessions[self.key(token)] = {"user": user, "exp": now_ts() + self.ttl}
+            while len(self.sessions) > self.max_entries:
+                self.sessions.popitem(last=False)
+            self.revision += 1
+        self.save()
+        return token
+
+    def get(self, token: str) -> Optional[str]:
+        key = self.key(token)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                return None
+            if session["exp"] < now_ts():
+                del self.sessions[key]
+                return None
+            self.sessions.move_to_end(key)
+            return str(session["user"])
+
+    def delete(self, token: str) -> None:
+        with self.lock:
+            removed = self.sessions.pop(self.key(token), None)
+            if removed is not None:
+                self.revision += 1
+        if removed is not None:
+            self.save()
+
+    def sweep(self) -> int:
+        now = now_ts()
+        with self.lock:
+            expired = [key for key, session in self.sessions.items() if session["exp"] < now]
+            for key in expired:
+                del self.sessions[key]
+            if expired:
+                self.revision += 1
+        if expired:
+            self.save()
+        return len(expired)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.sessions)
+
+    def run(self) -> None:
+        while True:
+            time.sleep(SESSION_SWEEP_INTERVAL)
+            self.sweep()
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, name="session-sweeper", daemon=True)
+        self.thread.start()
+
+
+SESSION_STORE = SessionStore(SESSION_STORE_PATH, SESSION_TTL, SESSION_MAX)
 
 
 def create_session(user: str) -> str:
-    token = secrets.token_urlsafe(32)
-    SESSIONS[token] = {"user": user, "exp": now_ts() + SESSION_TTL}
-    return token
+    return SESSION_STORE.create(user)
 
 
 def parse_cookies(header: str) -> Dict[str, str]:
@@ -1250,9 +3468,75 @@ def parse_cookies(header: str) -> Dict[str, str]:
 
 
 class Handler(BaseHTTPRequestHandler):
+    status = 0
+
     def log_message(self, format: str, *args) -> None:
         return
 
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self.status = code
+        super().send_response(code, message)
+
+    def _timed(self, method: str, handle) -> None:
+        started = time.perf_counter()
+        self.status = 0
+        try:
+            handle()
+        finally:
+            histogram = INSTRUMENTATION.route(method, self.path.partition("?")[0])
+            if histogram is not None:
+                # No response means the handler raised; count it as a 500.
+                histogram.observe_response((time.perf_counter() - started) * 1000, self.status or 500)
+
+    def _metrics_allowed(self) -> bool:
+        if METRICS_TOKEN:
+            presented = self.headers.get("Authorization", "").encode("utf-8")
+            return hmac.compare_digest(presented, f"Bearer {METRICS_TOKEN}".encode("utf-8"))
+        # Without a token only local scrapers; nginx proxies /admin/api/ only, never /metrics.
+        return bool(self.client_address) and self.client_address[0] in ("127.0.0.1", "::1")
+
+    def _require_profiling(self) -> bool:
+        if not self._require_auth():
+            return False
+        if not profiling_enabled():
+            self._send_json(
+                {"error": "profiling is disabled (set ADMIN_PROFILING=1 or create data/admin-profiling.enabled)"},
+                status=404,
+            )
+            return False
+        return True
+
+    def _send_profile(self, query: dict) -> None:
+        seconds = clamp_float(query.get("seconds", ["10"])[0], 0.1, PROFILE_MAX_SEC, 10)
+        interval = clamp_float(query.get("interval", ["0.01"])[0], 0.001, 1, 0.01)
+        try:
+            result = STACK_PROFILER.run(seconds, interval, query.get("thread", [""])[0])
+        except profiling.ProfilerBusyError as exc:
+            self._send_json({"error": str(exc)}, status=409)
+            return
+        body = result["folded"].encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Disposition", f'attachment; filename="admin-api-{now_ts()}.folded"')
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("X-Profile-Samples", str(result["samples"]))
+        self.send_header("X-Profile-Elapsed", str(result["elapsed_sec"]))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_metrics(self) -> None:
+        if not self._metrics_allowed():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
     def _send_json(self, data: dict, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
         body = json.dumps(data).encode("utf-8")
         self.send_response(status)
@@ -1279,13 +3563,15 @@ class Handler(BaseHTTPRequestHandler):
         token = cookies.get(SESSION_COOKIE)
         if not token:
             return None
-        session = SESSIONS.get(token)
-        if not session:
-            return None
-        if session["exp"] < now_ts():
-            del SESSIONS[token]
-            return None
-        return str(session["user"])
+        return SESSION_STORE.get(token)
+
+    def _client_ip(self) -> str:
+        peer = self.client_address[0] if self.client_address else ""
+        if peer in ("127.0.0.1", "::1"):
+            forwarded = self.headers.get("X-Real-IP", "").strip()
+            if forwarded:
+                return forwarded
+        return peer
 
     def _require_auth(self) -> Optional[str]:
         user = self._session_user()
@@ -1294,13 +3580,99 @@ class Handler(BaseHTTPRequestHandler):
             return None
         return user
 
+    def _stream_events(self) -> None:
+        channel = EVENT_HUB.subscribe()
+        if channel is None:
+            self._send_json({"error": "too many event subscribers"}, status=503)
+            return
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(f"retry: {int(EVENT_HUB.interval * 1000)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            while True:
+                try:
+                    frame = channel.get(timeout=EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    frame = b": keep-alive\n\n"
+                if not frame or not self._session_user():
+                    break
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            EVENT_HUB.unsubscribe(channel)
+            self.close_connection = True
+
+    def _receive_overlay_upload(self, overlay_id: str, original_name: str) -> dict:
+        """Stream a raw image body to disk in fixed-size chunks.
+
+        The body goes to a temp file in data/overlays/ while being hashed,
+        its type is sniffed from the magic bytes of the first chunk, and the
+        file is renamed to its content-addressed name once complete.
+        """
+        length_header = self.headers.get("Content-Length")
+        if not length_header:
+            raise ValueError("Content-Length required")
+        length = int(length_header)
+        if length <= 0:
+            raise ValueError("empty upload")
+        if length > OVERLAY_MAX_BYTES:
+            raise ValueError("image too large")
+        OVERLAY_DIR.mkdir(parents=True, exist_ok=True)
+        handle = tempfile.NamedTemporaryFile(dir=str(OVERLAY_DIR), prefix=".upload-", delete=False)
+        tmp_path = Path(handle.name)
+        digest = hashlib.sha256()
+        try:
+            ext = None
+            remaining = length
+            with handle:
+                while remaining > 0:
+                    chunk = self.rfile.read(min(OVERLAY_UPLOAD_CHUNK, remaining))
+                    if not chunk:
+                        raise ValueError("upload interrupted")
+                    if ext is None:
+                        ext = sniff_overlay_ext(chunk)
+                        if ext is None:
+                            raise ValueError("unsupported image type")
+                    handle.write(chunk)
+                    digest.update(chunk)
+                    remaining -= len(chunk)
+            # NamedTemporaryFile is 0600 and os.replace keeps it; nginx workers must read the blob.
+            os.chmod(tmp_path, overlay_assets.FILE_MODE)
+            return attach_overlay_image(
+                overlay_id, ext, digest.hexdigest(), original_name, lambda path: os.replace(tmp_path, path)
+            )
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _send_save_error(self, exc: Exception) -> None:
+        if isinstance(exc, ConfigConflictError):
+            self._send_json({"error": str(exc), "revision": exc.revision}, status=409)
+        else:
+            self._send_json({"error": str(exc)}, status=400)
+
     def _read_json(self) -> dict:
         length = int(self.headers.get("Content-Length", 0))
         raw = self.rfile.read(length) if length else b"{}"
         return json.loads(raw.decode("utf-8"))
 
     def do_GET(self) -> None:
+        self._timed("GET", self._get)
+
+    def do_POST(self) -> None:
+        self._timed("POST", self._post)
+
+    def _get(self) -> None:
         parsed = urlparse(self.path)
+        if parsed.path == "/metrics":
+            self._send_metrics()
+            return
         if parsed.path == "/api/session":
             user = self._require_auth()
             if user:
@@ -1314,27 +3686,108 @@ class Handler(BaseHTTPRequestHandler):
         if parsed.path == "/api/ingest":
             if not self._require_auth():
                 return
-            self._send_json({"ingest_key": load_ingest_key()})
+            snapshot = load_config_snapshot()
+            self._send_json(
+                {
+                    "ingest_key": load_ingest_key(),
+                    "ingest_keys": thaw_config(snapshot.get("ingest_keys", ())),
+                }
+            )
+            return
+        if parsed.path == "/api/publish/latency":
+            if not self._require_auth():
+                return
+            self._send_json(PUBLISH_LATENCY.snapshot())
             return
         if parsed.path == "/api/metrics":
             if not self._require_auth():
                 return
             self._send_json(read_metrics())
             return
+        if parsed.path == "/api/events":
+            if not self._require_auth():
+                return
+            self._stream_events()
+            return
+        if parsed.path == "/api/viewers/history":
+            if not self._require_auth():
+                return
+            query = parse_qs(parsed.query)
+            end = clamp_int(query.get("to", [now_ts()])[0], 0, 2**31 - 1, now_ts())
+            start = clamp_int(query.get("from", [end - 86400])[0], end - VIEWER_HISTORY_MAX_SEC, end, end - 86400)
+            step = clamp_int(query.get("step", ["300"])[0], 60, VIEWER_HISTORY_MAX_SEC, 300)
+            step = max(step, (end - start) // 10000)
+            try:
+                self._send_json(viewer_timeseries.query_range(VIEWER_TIMESERIES_PATH, start, end, step))
+            except (OSError, ValueError) as exc:
+                self._send_json({"error": str(exc)}, status=500)
+            return
+        if parsed.path == "/api/metrics/history":
+            if not self._require_auth():
+                return
+            if not metrics_supported():
+                self._send_json({"supported": False})
+                return
+            query = parse_qs(parsed.query)
+            window = clamp_float(query.get("window", ["3600"])[0], 1, METRICS_HISTORY_SEC, 3600)
+            step = clamp_float(query.get("step", ["60"])[0], 1, METRICS_HISTORY_SEC, 60)
+            self._send_json({"supported": True, **METRICS_SAMPLER.history(window, step)})
+            return
         if parsed.path == "/api/health":
             if not self._require_auth():
                 return
-            self._send_json(build_health_report())
+            query = parse_qs(parsed.query)
+            window = clamp_float(query.get("window", [str(PUSH_HEALTH_WINDOW)])[0], 1, PUSH_HISTORY_SEC, PUSH_HEALTH_WINDOW)
+            self._send_json(build_health_report(window))
+            return
+        if parsed.path == "/api/restream/apply":
+            if not self._require_auth():
+                return
+            self._send_json({**APPLY_QUEUE.summary(), "jobs": APPLY_QUEUE.recent()})
+            return
+        if parsed.path == "/api/debug/threads":
+            if not self._require_profiling():
+                return
+            query = parse_qs(parsed.query)
+            sample = clamp_float(query.get("sample", ["0"])[0], 0, 10, 0)
+            self._send_json(profiling.thread_cpu_report(sample))
+            return
+        if parsed.path == "/api/debug/profile":
+            if not self._require_profiling():
+                return
+            self._send_profile(parse_qs(parsed.query))
+            return
+        if parsed.path == "/api/debug/tracemalloc":
+            if not self._require_profiling():
+                return
+            self._send_json(ALLOCATION_TRACER.status())
+            return
+        if parsed.path.startswith("/api/restream/apply/"):
+            if not self._require_auth():
+                return
+            job = APPLY_QUEUE.get(parsed.path[len("/api/restream/apply/"):])
+            if job is None:
+                self._send_json({"error": "unknown apply job"}, status=404)
+                return
+            self._send_json(job)
             return
         self._send_json({"error": "not found"}, status=404)
 
-    def do_POST(self) -> None:
+    def _post(self) -> None:
         parsed = urlparse(self.path)
         if parsed.path == "/api/login":
             try:
                 payload = self._read_json()
                 user = str(payload.get("user", "")).strip()
                 password = str(payload.get("password", "")).strip()
+                wait = max(LOGIN_IP_LIMITER.take(self._client_ip()), LOGIN_USER_LIMITER.take(user.lower()))
+                if wait > 0:
+                    self._send_json(
+                        {"error": "too many login attempts"},
+                        status=429,
+                        headers={"Retry-After": str(max(1, int(math.ceil(wait))))},
+                    )
+                    return
                 if not user or not password or not verify_password(user, password):
                     self._send_json({"error": "invalid credentials"}, status=401)
                     return
@@ -1344,14 +3797,16 @@ class Handler(BaseHTTPRequestHandler):
                     "Cache-Control": "no-store",
                 }
                 self._send_json({"status": "ok"}, headers=headers)
+            except LoginBusyError as exc:
+                self._send_json({"error": str(exc)}, status=429, headers={"Retry-After": "1"})
             except Exception as exc:
                 self._send_json({"error": str(exc)}, status=400)
             return
         if parsed.path == "/api/logout":
             cookies = parse_cookies(self.headers.get("Cookie", ""))
             token = cookies.get(SESSION_COOKIE)
-            if token and token in SESSIONS:
-                del SESSIONS[token]
+            if token:
+                SESSION_STORE.delete(token)
             headers = {
                 "Set-Cookie": f"{SESSION_COOKIE}=; {self._cookie_attrs()}; Max-Age=0",
                 "Cache-Control": "no-store",
@@ -1366,13 +3821,10 @@ class Handler(BaseHTTPRequestHandler):
                 action = str(payload.get("action", "")).strip().lower()
                 overlay_id = normalize_overlay_id(payload.get("overlay_id") or payload.get("id"))
                 existing = load_config()
-                overlays = existing.get("overlays", [])
-                if not isinstance(overlays, list):
-                    overlays = [existing.get("overlay")] if isinstance(existing.get("overlay"), dict) else []
-                overlays = sanitize_overlays({"overlays": overlays}, existing)
+                overlays = current_overlays(existing)
 
-                def save_overlays(next_overlays: list) -> None:
-                    save_config({"overlays": next_overlays})
+                def save_overlays(next_overlays: list) -> int:
+                    return save_config({"overlays": next_overlays}, expected_revision=existing["revision"])
 
                 def find_overlay_index(target_id: str) -> int:
                     for idx, item in enumerate(overlays):
@@ -1386,15 +3838,16 @@ class Handler(BaseHTTPRequestHandler):
                         if idx == -1:
                             raise ValueError("overlay not found")
                         image_file = overlays[idx].get("image_file", "")
-                        delete_overlay_file(image_file)
                         overlays[idx]["image_file"] = ""
+                        overlays[idx]["image_name"] = ""
                         overlays[idx]["enabled"] = False
-                        save_overlays(overlays)
-                        self._send_json({"status": "cleared", "overlay_id": overlay_id})
+                        revision = save_overlays(overlays)
+                        delete_overlay_file(image_file)
+                        self._send_json({"status": "cleared", "overlay_id": overlay_id, "revision": revision})
                     else:
+                        revision = save_overlays([])
                         remove_overlay_files(overlays, remove_all=True)
-                        save_overlays([])
-                        self._send_json({"status": "cleared", "overlays": []})
+                        self._send_json({"status": "cleared", "overlays": [], "revision": revision})
                     return
                 if action == "delete":
                     if not overlay_id:
@@ -1403,12 +3856,12 @@ class Handler(BaseHTTPRequestHandler):
                     if idx == -1:
                         raise ValueError("overlay not found")
                     image_file = overlays[idx].get("image_file", "")
-                    delete_overlay_file(image_file)
                     overlays.pop(idx)
                     if not overlays:
                         overlays = [sanitize_overlay_item({}, {}, fallback_id="primary")]
-                    save_overlays(overlays)
-                    self._send_json({"status": "deleted", "overlay_id": overlay_id})
+                    revision = save_overlays(overlays)
+                    delete_overlay_file(image_file)
+                    self._send_json({"status": "deleted", "overlay_id": overlay_id, "revision": revision})
                     return
                 data_url = str(payload.get("data_url", "")).strip()
                 if not data_url.startswith("data:") or "," not in data_url:
@@ -1423,72 +3876,48 @@ class Handler(BaseHTTPRequestHandler):
                 raw = base64.b64decode(b64_data, validate=True)
                 if len(raw) > OVERLAY_MAX_BYTES:
                     raise ValueError("image too large")
-                if not overlay_id:
-                    overlay_id = generate_overlay_id()
-                idx = find_overlay_index(overlay_id)
-                if idx == -1:
-                    overlays.append(sanitize_overlay_item({"id": overlay_id}, {}))
-                    idx = len(overlays) - 1
                 original_name = payload.get("original_name") or payload.get("filename") or payload.get("name")
-                used_names = {
-                    item.get("image_file")
-                    for item in overlays
-                    if isinstance(item, dict) and item.get("id") != overlay_id
-                }
-                fallback = f"overlay-{overlay_id}.{ext}"
-                filename = sanitize_overlay_filename(original_name, ext, fallback)
-                if filename in used_names:
-                    filename = f"{Path(filename).stem}-{overlay_id}.{ext}"
-                if filename in used_names:
-                    filename = fallback
-                if not OVERLAY_FILENAME_RE.match(filename):
-                    filename = fallback
-                overlay_path = overlay_storage_path(filename)
-                overlay_path.parent.mkdir(parents=True, exist_ok=True)
-                overlay_path.write_bytes(raw)
-                previous_file = overlays[idx].get("image_file", "")
-                overlays[idx]["image_file"] = filename
-                save_overlays(overlays)
-                if previous_file and previous_file != filename:
-                    delete_overlay_file(previous_file)
+                digest = hashlib.sha256(raw).hexdigest()
                 self._send_json(
-                    {
-                        "status": "ok",
-                        "image_file": filename,
-                        "image_url": f"/admin/overlays/{filename}",
-                        "overlay_id": overlay_id,
-                    }
+                    attach_overlay_image(overlay_id, ext, digest, original_name, lambda path: path.write_bytes(raw))
                 )
             except Exception as exc:
-                self._send_json({"error": str(exc)}, status=400)
+                self._send_save_error(exc)
+            return
+        if parsed.path == "/api/overlay/upload":
+            try:
+                if not self._require_auth():
+                    return
+                query = parse_qs(parsed.query)
+                overlay_id = normalize_overlay_id(query.get("overlay_id", [""])[0])
+                original_name = query.get("name", [""])[0]
+                self._send_json(self._receive_overlay_upload(overlay_id, original_name))
+            except Exception as exc:
+                self.close_connection = True
+                self._send_save_error(exc)
             return
         if parsed.path == "/api/restream":
             try:
                 if not self._require_auth():
                     return
                 payload = self._read_json()
-                save_config(payload)
-                self._send_json({"status": "ok"})
+                revision = save_config(payload)
+                self._send_json({"status": "ok", "revision": revision})
             except Exception as exc:
-                self._send_json({"error": str(exc)}, status=400)
+                self._send_save_error(exc)
             return
         if parsed.path == "/api/ingest":
             try:
                 if not self._require_auth():
                     return
                 payload = self._read_json()
-                current = load_config()
-                save_config(
-                    {
-                        "destinations": current.get("destinations", []),
-                        "ingest_key": payload.get("ingest_key", ""),
-                    }
-                )
-                self._send_json({"status": "ok"})
+                revision = save_config({"ingest_key": payload.get("ingest_key", "")})
+                self._send_json({"status": "ok", "revision": revision})
             except Exception as exc:
-                self._send_json({"error": str(exc)}, status=400)
+                self._send_save_error(exc)
             return
         if parsed.path == "/api/publish":
+            started = time.perf_counter()
             params = parse_qs(parsed.query)
             length = int(self.headers.get("Content-Length", 0))
             if length and not params:
@@ -1500,63 +3929,64 @@ class Handler(BaseHTTPRequestHandler):
             else:
                 key = params.get("name", [""])[0]
             key = str(key).strip()
-            stored = load_ingest_key()
-            if not stored:
-                write_stream_status(True, started_at=now_ts())
-                self._send_json({"status": "ok"})
-                return
-            if key == stored:
-                write_stream_status(True, started_at=now_ts())
-                self._send_json({"status": "ok"})
-                return
-            self._send_json({"error": "forbidden"}, status=403)
+            allowed, stream, rename = authorize_ingest_key(key)
+            if allowed:
+                queue_stream_status(True, started_at=now_ts(), stream=stream)
+                if rename and stream != params.get("name", [""])[0].strip():
+                    # nginx-rtmp ignores the on_publish body; a 3xx whose Location
+                    # is not an rtmp:// URL renames the published stream instead.
+                    self._send_json({"status": "ok", "stream": stream}, status=302, headers={"Location": stream})
+                else:
+                    self._send_json({"status": "ok", "stream": stream})
+            else:
+                self._send_json({"error": "forbidden"}, status=403)
+            PUBLISH_LATENCY.observe((time.perf_counter() - started) * 1000)
             return
         if parsed.path == "/api/publish_done":
-            write_stream_status(False, ended_at=now_ts())
+            queue_stream_status(False, ended_at=now_ts())
             self._send_json({"status": "ok"})
             return
         if parsed.path == "/api/restream/apply":
-            try:
-                if not self._require_auth():
-                    return
-                query = parse_qs(parsed.query)
-                env = os.environ.copy()
-                if query.get("restart", ["0"])[0] == "1":
-                    env["RESTART_NGINX"] = "1"
-                if sys.platform == "darwin":
-                    env.setdefault("LOCAL_MODE", "1")
-                reconnect = query.get("reconnect", ["0"])[0] == "1"
-                if IS_WINDOWS:
-                    subprocess.run(
-                        [
-                            "powershell",
-                            "-NoProfile",
-                            "-ExecutionPolicy",
-                            "Bypass",
-                            "-File",
-                            str(APPLY_SCRIPT),
-                        ],
-                        check=True,
-                        env=env,
+            if not self._require_auth():
+                return
+            query = parse_qs(parsed.query)
+            job, coalesced = APPLY_QUEUE.submit(
+                restart=query.get("restart", ["0"])[0] == "1",
+                reconnect=query.get("reconnect", ["0"])[0] == "1",
+            )
+            if query.get("wait", ["0"])[0] == "1":
+                # Blocking form for scripts: answer like the old synchronous endpoint.
+                job = APPLY_QUEUE.wait(job["id"], APPLY_TIMEOUT) or job
+                status = 500 if job["status"] == "failed" else 200
+                self._send_json({**job, "coalesced": coalesced}, status=status)
+                return
+            self._send_json({**job, "coalesced": coalesced}, status=202)
+            return
+        if parsed.path == "/api/debug/tracemalloc":
+            if not self._require_profiling():
+                return
+            query = parse_qs(parsed.query)
+            action = query.get("action", [""])[0]
+            if action == "start":
+                self._send_json(ALLOCATION_TRACER.start(clamp_int(query.get("frames", ["1"])[0], 1, 25, 1)))
+            elif action == "stop":
+                self._send_json(ALLOCATION_TRACER.stop())
+            elif action == "diff":
+                key = query.get("key", ["lineno"])[0]
+                if key not in TRACEMALLOC_KEYS:
+                    key = "lineno"
+                try:
+                    self._send_json(
+                        ALLOCATION_TRACER.diff(
+                            query.get("since", ["previous"])[0] == "baseline",
+                            key,
+                            clamp_int(query.get("limit", ["25"])[0], 1, 200, 25),
+                        )
                     )
-                else:
-                    subprocess.run(["bash", str(APPLY_SCRIPT)], check=True, env=env)
-                payload = {"status": "applied"}
-                if reconnect:
-                    try:
-                        ok, result = trigger_reconnect()
-                        if ok:
-                            payload["reconnect"] = "ok"
-                            payload["reconnect_result"] = result
-                        else:
-                            payload["reconnect"] = "failed"
-                            payload["reconnect_error"] = result
-                    except Exception as exc:
-                        payload["reconnect"] = "failed"
-                        payload["reconnect_error"] = str(exc)
-                self._send_json(payload)
-            except subprocess.CalledProcessError as exc:
-                self._send_json({"error": f"apply failed: {exc}"}, status=500)
+                except RuntimeError as exc:
+                    self._send_json({"error": str(exc)}, status=409)
+            else:
+                self._send_json({"error": "action must be start, diff or stop"}, status=400)
             return
         if parsed.path == "/api/stream/reconnect":
             try:
@@ -1573,12 +4003,45 @@ class Handler(BaseHTTPRequestHandler):
         self._send_json({"error": "not found"}, status=404)
 
 
+class AdminHTTPServer(ThreadingHTTPServer):
+    # nginx fires on_publish callbacks in bursts; socketserver's default
+    # backlog of 5 turns a burst into 1 s SYN retransmits before going live.
+    request_queue_size = ADMIN_API_BACKLOG
+
+
+def build_server(host: str, port: int):
+    """ThreadingHTTPServer (default) or the asyncio keep-alive engine, per ADMIN_API_ENGINE."""
+    if ADMIN_API_ENGINE == "asyncio":
+        return async_http.AsyncHTTPServer(
+            (host, port),
+            Handler,
+            workers=ADMIN_API_WORKERS,
+            max_pending=ADMIN_API_MAX_PENDING,
+            max_connections=ADMIN_API_MAX_CONNECTIONS,
+            keepalive_timeout=ADMIN_API_KEEPALIVE_TIMEOUT,
+            stream_paths={"/api/events"},
+            stream_workers=EVENTS_MAX_SUBSCRIBERS + 1,
+        )
+    if ADMIN_API_ENGINE != "threaded":
+        raise SystemExit(f"Unknown ADMIN_API_ENGINE {ADMIN_API_ENGINE!r} (use threaded or asyncio)")
+    return AdminHTTPServer((host, port), Handler)
+
+
 def main() -> int:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     host = os.environ.get("ADMIN_API_HOST", "127.0.0.1")
     port = int(os.environ.get("ADMIN_API_PORT", "9090"))
-    server = ThreadingHTTPServer((host, port), Handler)
-    server.serve_forever()
+    server = build_server(host, port)
+    STAT_COLLECTOR.start()
+    METRICS_SAMPLER.start()
+    SESSION_STORE.start()
+    queue_overlay_render(load_config().get("overlays", []))
+    # SIGTERM (systemd stop) unwinds through the finally so a staged save is written.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        CONFIG_WRITER.flush()
     return 0
 
 
@@ -0,0 +1,308 @@
+"""asyncio HTTP/1.1 front end for http.server request handlers.
+
+The event loop owns every connection: it reads request heads, applies the
+connection/queue limits and keeps connections alive between requests. Each
+request is then handed to the existing BaseHTTPRequestHandler subclass on a
+bounded thread pool, so request parsing and the do_* methods run unchanged.
+Only the handler's rfile/wfile are swapped for adapters over the asyncio
+stream: bodies are still read incrementally and responses can stream.
+"""
+import asyncio
+import io
+import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from typing import Iterable, Optional, Tuple, Type
+
+MAX_HEAD_BYTES = 64 * 1024
+DRAIN_LIMIT = 64 * 1024
+PRELOAD_BODY_BYTES = 64 * 1024
+WRITE_FLUSH_BYTES = 256 * 1024
+
+
+class RequestStream(io.RawIOBase):
+    """Request head from memory, then at most `length` body bytes pulled from the socket."""
+
+    def __init__(self, loop, reader: asyncio.StreamReader, head: bytes, length: int, timeout: float) -> None:
+        self.loop = loop
+        self.reader = reader
+        self.head = memoryview(head)
+        self.remaining = length
+        self.timeout = timeout
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.head:
+            count = min(len(buffer), len(self.head))
+            buffer[:count] = self.head[:count]
+            self.head = self.head[count:]
+            return count
+        if self.remaining <= 0:
+            return 0
+        wanted = min(len(buffer), self.remaining)
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self.reader.read(wanted), self.timeout), self.loop
+        )
+        try:
+            data = future.result()
+        except asyncio.TimeoutError:
+            raise TimeoutError("request body timed out") from None
+        if not data:
+            self.remaining = 0
+            return 0
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+class ResponseStream(io.RawIOBase):
+    """Buffers handler output and hands it to the loop on flush.
+
+    The worker only waits for the socket to drain when the transport is
+    already holding a lot of unsent data, so slow readers push back on
+    streaming handlers without every response paying a round trip.
+    """
+
+    def __init__(self, loop, writer: asyncio.StreamWriter) -> None:
+        self.loop = loop
+        self.writer = writer
+        self.pending = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.pending += data
+        if len(self.pending) >= WRITE_FLUSH_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        data = bytes(self.pending)
+        self.pending.clear()
+        if self.writer.is_closing():
+            raise BrokenPipeError("client disconnected")
+        if self.writer.transport.get_write_buffer_size() < WRITE_FLUSH_BYTES:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+            return
+        asyncio.run_coroutine_threadsafe(self.send(data), self.loop).result()
+
+    async def send(self, data: bytes) -> None:
+        if self.writer.is_closing():
+            raise BrokenPipeError("client disconnected")
+        self.writer.write(data)
+        await self.writer.drain()
+
+
+def parse_head(head: bytes) -> Tuple[str, int, bool]:
+    """Path, Content-Length and whether the body is chunked; enough to schedule the request."""
+    lines = head.split(b"\r\n")
+    parts = lines[0].split(b" ")
+    path = parts[1].decode("latin-1") if len(parts) >= 2 else ""
+    length = 0
+    chunked = False
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value.strip())
+            if length < 0:
+                raise ValueError("negative Content-Length")
+        elif name == b"transfer-encoding" and value.strip().lower() != b"identity":
+            chunked = True
+    return path.split("?", 1)[0], length, chunked
+
+
+def simple_response(status: int, reason: str, message: str, retry_after: Optional[int] = None) -> bytes:
+    body = json.dumps({"error": message}).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {reason}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    if retry_after is not None:
+        head.append(f"Retry-After: {retry_after}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+class AsyncHTTPServer:
+    """Serve a BaseHTTPRequestHandler subclass from an asyncio event loop.
+
+    - `workers` threads run ordinary requests; at most `max_pending` more
+      wait for one, beyond that requests get 503 + Retry-After.
+    - Paths in `stream_paths` (long-lived responses such as SSE) run on a
+      separate pool of `stream_workers` threads so they cannot starve it.
+    - At most `max_connections` sockets are open; idle keep-alive
+      connections close after `keepalive_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler_class: Type[BaseHTTPRequestHandler],
+        workers: int = 16,
+        max_pending: int = 64,
+        max_connections: int = 256,
+        keepalive_timeout: float = 15.0,
+        header_timeout: float = 10.0,
+        body_timeout: float = 30.0,
+        stream_paths: Iterable[str] = (),
+        stream_workers: int = 8,
+    ) -> None:
+        self.server_address = address
+        # HTTP/1.1 lets the stock parse_request() honour keep-alive.
+        self.handler_class = type(handler_class.__name__, (handler_class,), {"protocol_version": "HTTP/1.1"})
+        self.workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self.stream_workers = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix="http-stream")
+        self.capacity = workers + max_pending
+        self.stream_capacity = stream_workers
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.stream_paths = set(stream_paths)
+        self.connections = 0
+        self.inflight = 0
+        self.streams = 0
+        self.stats = {"requests": 0, "rejected": 0, "connections": 0}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.ready = threading.Event()
+        self.stopping: Optional[asyncio.Event] = None
+
+    def serve_forever(self) -> None:
+        asyncio.run(self.serve())
+
+    def shutdown(self) -> None:
+        if self.loop is not None and self.stopping is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    async def serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        host, port = self.server_address
+        server = await asyncio.start_server(self.connection, host, port, limit=MAX_HEAD_BYTES, reuse_address=True)
+        self.server_address = server.sockets[0].getsockname()[:2]
+        self.ready.set()
+        try:
+            async with server:
+                await self.stopping.wait()
+        finally:
+            self.workers.shutdown(wait=False, cancel_futures=True)
+            self.stream_workers.shutdown(wait=False, cancel_futures=True)
+
+    async def connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.connections >= self.max_connections:
+            self.stats["rejected"] += 1
+            await self.reply_and_close(writer, simple_response(503, "Service Unavailable", "too many connections", 1))
+            return
+        self.connections += 1
+        self.stats["connections"] += 1
+        peer = writer.get_extra_info("peername") or ("", 0)
+        timeout = self.header_timeout
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                except asyncio.LimitOverrunError:
+                    await self.reply_and_close(writer, simple_response(431, "Request Header Fields Too Large", "headers too large"))
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                try:
+                    path, length, chunked = parse_head(head)
+                except ValueError:
+                    await self.reply_and_close(writer, simple_response(400, "Bad Request", "invalid request"))
+                    return
+                if chunked:
+                    await self.reply_and_close(writer, simple_response(411, "Length Required", "chunked bodies are not supported"))
+                    return
+                keep_alive = await self.dispatch(path, head, length, reader, writer, peer)
+                if not keep_alive:
+                    return
+                timeout = self.keepalive_timeout
+        except asyncio.CancelledError:
+            # Server shutting down; the task ends here so asyncio has nothing to report.
+            return
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def dispatch(self, path, head, length, reader, writer, peer) -> bool:
+        stream = path in self.stream_paths
+        if stream:
+            if self.streams >= self.stream_capacity:
+                self.stats["rejected"] += 1
+                await self.reply_and_close(writer, simple_response(503, "Service Unavailable", "too many streams", 5))
+                return False
+            pool = self.stream_workers
+            self.streams += 1
+        else:
+            if self.inflight >= self.capacity:
+                self.stats["rejected"] += 1
+                await self.reply_and_close(writer, simple_response(503, "Service Unavailable", "server busy", 1))
+                return False
+            pool = self.workers
+            self.inflight += 1
+        self.stats["requests"] += 1
+        if 0 < length <= PRELOAD_BODY_BYTES:
+            # Small bodies (JSON posts) are read here so the worker never waits on the loop.
+            try:
+                head += await asyncio.wait_for(reader.readexactly(length), self.body_timeout)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                self.release(stream)
+                return False
+            length = 0
+        body = RequestStream(self.loop, reader, head, length, self.body_timeout)
+        try:
+            keep_alive = await self.loop.run_in_executor(pool, self.run_handler, body, writer, peer)
+        finally:
+            self.release(stream)
+        if keep_alive and body.remaining:
+            # The handler ignored (part of) the body; skip it to reach the next request.
+            if body.remaining > DRAIN_LIMIT:
+                return False
+            try:
+                await asyncio.wait_for(reader.readexactly(body.remaining), self.body_timeout)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                return False
+        return keep_alive
+
+    def release(self, stream: bool) -> None:
+        if stream:
+            self.streams -= 1
+        else:
+            self.inflight -= 1
+
+    def run_handler(self, body: RequestStream, writer: asyncio.StreamWriter, peer) -> bool:
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.request = None
+        handler.server = self
+        handler.client_address = peer
+        handler.rfile = io.BufferedReader(body)
+        handler.wfile = ResponseStream(self.loop, writer)
+        handler.close_connection = True
+        try:
+            handler.handle_one_request()
+            handler.wfile.flush()
+        except (ConnectionError, TimeoutError):
+            return False
+        except Exception:
+            # Same as socketserver's handle_error(): report and drop the connection.
+            traceback.print_exc()
+            return False
+        return not handler.close_connection
+
+    async def reply_and_close(self, writer: asyncio.StreamWriter, payload: bytes) -> None:
+        try:
+            writer.write(payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
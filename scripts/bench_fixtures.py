@@ -0,0 +1,300 @@
+"""Synthetic inputs for the admin-api benchmarks.
+
+Generators for the data the hot paths chew on (a restream.json at its
+configured limits, nginx-rtmp /stat XML with many streams and push relays,
+an hls_access.log in the hls_viewers format) plus FakeNginx, a local
+stand-in for nginx's /stat and /control endpoints. Everything is seeded,
+so two runs of a benchmark see byte-identical fixtures. The helpers at
+the end start admin-api.py from a scratch tree and log in to it.
+"""
+import hashlib
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+SEED = 20240601
+PLATFORMS = (
+    ("YouTube", "rtmp://a.rtmp.youtube.com/live2"),
+    ("Facebook", "rtmps://live-api-s.facebook.com:443/rtmp/"),
+    ("Twitch", "rtmp://live.twitch.tv/app"),
+    ("Kick", "rtmps://fa723fc1b171.global-contribute.live-video.net/app"),
+    ("Custom", "rtmp://203.0.113.10:1935/live"),
+)
+RENDITIONS = ("source", "1080p", "720p", "480p")
+
+
+def ticker_items(count: int, rng: random.Random) -> list:
+    words = ["breaking", "live", "now", "studio", "guest", "update", "sponsor", "tonight", "replay", "chat"]
+    items = []
+    for index in range(count):
+        text = " ".join(rng.choice(words) for _ in range(12))
+        items.append(
+            {
+                "id": f"item-{index:02d}",
+                "html": (
+                    f"<strong>{text[:20]}</strong> &amp; <em>{text[20:60]}</em><br>"
+                    f"<span style=\"color:red\">{text[60:]}</span> &#8226; <b>#{index}</b>"
+                ),
+                "bold": index % 2 == 0,
+            }
+        )
+    return items
+
+
+def make_config(destinations: int, overlays: int, ticker_count: int, seed: int = SEED) -> dict:
+    """A restream.json with every list at the size under test."""
+    rng = random.Random(seed)
+    dests = []
+    for index in range(destinations):
+        name, url = PLATFORMS[index % len(PLATFORMS)]
+        dests.append(
+            {
+                "id": f"dest-{index:03d}",
+                "name": f"{name} {index}",
+                "enabled": index % 4 != 3,
+                "rtmp_url": url,
+                "stream_key": hashlib.sha256(f"{seed}-{index}".encode("ascii")).hexdigest()[:24],
+            }
+        )
+    positions = ("top-left", "top-right", "bottom-left", "bottom-right")
+    overlay_items = []
+    for index in range(overlays):
+        overlay_items.append(
+            {
+                "id": f"overlay-{index + 1}",
+                "enabled": True,
+                "image_file": hashlib.sha256(f"overlay-{index}".encode("ascii")).hexdigest() + ".png",
+                "image_name": f"logo-{index}.png",
+                "position": positions[index % len(positions)],
+                "offset_x": 24,
+                "offset_y": 24,
+                "size_mode": "percent" if index % 2 == 0 else "px",
+                "size_value": 18 if index % 2 == 0 else 240,
+                "opacity": 0.8,
+                "rotate": index * 5,
+            }
+        )
+    return {
+        "revision": 1,
+        "ingest_key": "bench-key",
+        "ingest_keys": [{"key": f"bench-key-{index}", "stream": f"stream-{index + 1}"} for index in range(4)],
+        "destinations": dests,
+        "public_live": True,
+        "public_hls": True,
+        "force_transcode": True,
+        "ticker": {
+            "enabled": True,
+            "speed": 40,
+            "font_size": 16,
+            "height": 44,
+            "background": "#101820",
+            "separator": "•",
+            "items": ticker_items(ticker_count, rng),
+        },
+        "overlays": overlay_items,
+    }
+
+
+def stat_client(client_id: int, address: str, time_ms: int, flashver: str, publishing: bool = False) -> str:
+    return (
+        f"<client><id>{client_id}</id><address>{address}</address><time>{time_ms}</time>"
+        f"<flashver>{flashver}</flashver><dropped>0</dropped><avsync>-3</avsync>"
+        f"<timestamp>{time_ms}</timestamp>{'<publishing/>' if publishing else ''}<active/></client>"
+    )
+
+
+def stat_stream(name: str, client_start: int, pushes: int, players: int, rng: random.Random) -> str:
+    uptime = rng.randint(10_000, 9_000_000)
+    clients = [stat_client(client_start, f"198.51.100.{client_start % 250}", uptime, "FMLE/3.0 (compatible; obs)", True)]
+    for index in range(pushes):
+        _, url = PLATFORMS[index % len(PLATFORMS)]
+        host = url.split("://", 1)[1].rstrip("/")
+        clients.append(stat_client(client_start + 1 + index, f"{host}/key-{index}", uptime - 500, "ngx-local-relay"))
+    for index in range(players):
+        clients.append(
+            stat_client(client_start + 1 + pushes + index, f"192.0.2.{index % 250}", rng.randint(1000, uptime), "LNX 9,0,124,2")
+        )
+    return (
+        f"<stream><name>{name}</name><time>{uptime}</time>"
+        f"<bw_in>{rng.randint(2_000_000, 8_000_000)}</bw_in><bytes_in>{rng.randint(10**8, 10**10)}</bytes_in>"
+        f"<bw_out>{rng.randint(0, 40_000_000)}</bw_out><bytes_out>{rng.randint(10**8, 10**11)}</bytes_out>"
+        f"<bw_audio>160000</bw_audio><bw_video>{rng.randint(2_000_000, 8_000_000)}</bw_video>"
+        f"{''.join(clients)}"
+        "<meta><video><width>1920</width><height>1080</height><frame_rate>30</frame_rate>"
+        "<codec>H264</codec><profile>High</profile><compat>0</compat><level>4.2</level></video>"
+        "<audio><codec>AAC</codec><profile>LC</profile><channels>2</channels><sample_rate>48000</sample_rate></audio></meta>"
+        f"<nclients>{len(clients)}</nclients><publishing/><active/></stream>"
+    )
+
+
+def make_stat_xml(streams: int, pushes: int = 4, players: int = 2, seed: int = SEED) -> bytes:
+    """nginx-rtmp /stat output: one ingest stream, `streams` live streams with push relays."""
+    rng = random.Random(seed)
+    ingest = stat_stream("bench-key", 1, 0, 0, rng)
+    live = []
+    client_id = 10
+    for index in range(streams):
+        live.append(stat_stream("stream" if index == 0 else f"stream-{index}", client_id, pushes, players, rng))
+        client_id += 1 + pushes + players
+    return (
+        '<?xml version="1.0" encoding="utf-8" ?>'
+        "<rtmp><nginx_version>1.25.3</nginx_version><nginx_rtmp_version>1.1.4</nginx_rtmp_version>"
+        "<built>Jan  1 2024 00:00:00</built><pid>4242</pid><uptime>86400</uptime><naccepted>1200</naccepted>"
+        "<bw_in>8000000</bw_in><bytes_in>100000000000</bytes_in><bw_out>40000000</bw_out><bytes_out>400000000000</bytes_out>"
+        "<server>"
+        f"<application><name>ingest</name><live>{ingest}<nclients>1</nclients></live></application>"
+        f"<application><name>live</name><live>{''.join(live)}<nclients>{client_id}</nclients></live></application>"
+        "</server></rtmp>"
+    ).encode("utf-8")
+
+
+def write_access_log(path: Path, lines: int, viewers: int = 2000, span_sec: int = 600, seed: int = SEED) -> int:
+    """hls_access.log lines ending now, in the hls_viewers log_format; returns the file size."""
+    rng = random.Random(seed)
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(seconds=span_sec)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="ascii") as handle:
+        chunk = []
+        for index in range(lines):
+            ts = (start + timedelta(seconds=span_sec * index // max(1, lines))).isoformat()
+            viewer = rng.randrange(viewers)
+            remote = f"10.{viewer >> 16 & 255}.{viewer >> 8 & 255}.{viewer & 255}"
+            cf_ip = "-" if viewer % 3 else f"203.0.113.{viewer % 250}"
+            rendition = RENDITIONS[viewer % len(RENDITIONS)]
+            if rendition == "source":
+                uri = "/hls/stream.m3u8" if index % 4 == 0 else f"/hls/stream-{index // 40}.ts"
+                size = 1200 if index % 4 == 0 else 900_000
+            else:
+                uri = f"/hls/stream/{rendition}/index.m3u8" if index % 4 == 0 else f"/hls/stream/{rendition}/seg_{index // 40:05d}.ts"
+                size = 600 if index % 4 == 0 else 450_000
+            chunk.append(f"{ts} {remote} {cf_ip} {uri} {size}\n")
+            if len(chunk) >= 4096:
+                handle.write("".join(chunk))
+                chunk = []
+        handle.write("".join(chunk))
+    return path.stat().st_size
+
+
+def write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+class FakeNginxHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # One buffered write per response, so keep-alive clients never wait on delayed ACKs.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+    def do_GET(self) -> None:
+        server = self.server
+        parsed = urlparse(self.path)
+        if server.latency > 0:
+            time.sleep(server.latency)
+        if parsed.path == "/stat":
+            self.reply(200, server.stat_xml, "text/xml")
+            return
+        if parsed.path == "/control/drop/publisher":
+            query = parse_qs(parsed.query)
+            with server.lock:
+                server.drops.append((query.get("app", [""])[0], query.get("name", [""])[0]))
+            self.reply(200, b"1", "text/plain")
+            return
+        self.reply(404, b"", "text/plain")
+
+    def reply(self, status: int, body: bytes, content_type: str) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeNginx(ThreadingHTTPServer):
+    """Serves a fixed /stat payload and accepts /control/drop/publisher calls.
+
+    `latency` delays every reply, to model a loaded nginx.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, stat_xml: bytes, port: int = 0, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", port), FakeNginxHandler)
+        self.stat_xml = stat_xml
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.drops = []
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def start(self) -> "FakeNginx":
+        self.thread = threading.Thread(target=self.serve_forever, name="fake-nginx", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def start_admin_api(tree: Path, port: int, env: dict) -> subprocess.Popen:
+    """Run tree/scripts/admin-api.py on 127.0.0.1:port and wait until it accepts connections."""
+    full_env = os.environ.copy()
+    full_env.update({"ADMIN_API_HOST": "127.0.0.1", "ADMIN_API_PORT": str(port), **env})
+    proc = subprocess.Popen([sys.executable, str(tree / "scripts" / "admin-api.py")], env=full_env)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"admin-api ({env.get('ADMIN_API_ENGINE', 'threaded')}) did not start")
+
+
+def login(port: int, user: str, password: str) -> str:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    body = json.dumps({"user": user, "password": password})
+    conn.request("POST", "/api/login", body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader("Set-Cookie", "")
+    conn.close()
+    if response.status != 200 or not cookie:
+        raise RuntimeError(f"login failed: {response.status}")
+    return cookie.split(";", 1)[0]
@@ -38,7 +38,7 @@ OVERLAY_FILTER_COMPLEX=""
 OVERLAY_VIDEO_LABEL=""
 OVERLAY_BYPASS_FILE="${ROOT_DIR}/data/overlay-bypass.conf"
 
-OVERLAY_CONFIG="$(python3 - <<'PY' "${CONFIG_FILE}" "${ROOT_DIR}/data"
+OVERLAY_CONFIG="$(python3 - <<'PY' "${CONFIG_FILE}" "${ROOT_DIR}/data" "${ROOT_DIR}/scripts" "${STREAM_NAME}"
 import json
 import shlex
 import sys
@@ -46,6 +46,10 @@ from pathlib import Path
 
 config_path = Path(sys.argv[1])
 data_dir = Path(sys.argv[2])
+sys.path.insert(0, sys.argv[3])
+import overlay_assets
+
+stream_name = sys.argv[4]
 overlay_dir = data_dir / "overlays"
 defaults = {
     "enabled": False,
@@ -91,10 +95,6 @@ def clamp_float(value, min_value, max_value, fallback):
         return fallback
     return max(min_value, min(max_value, number))
 
-def fmt_float(value):
-    text = f"{value:.3f}".rstrip("0").rstrip(".")
-    return text if text else "0"
-
 def parse_bool(value, default):
     if isinstance(value, bool):
         return value
@@ -212,37 +212,27 @@ if not active:
     print("OVERLAY_COUNT=0")
     sys.exit(0)
 
-filters = []
-base_label = "0:v"
-for idx, overlay in enumerate(active, start=1):
-    ovl_label = f"ovl{idx}"
-    wm_label = f"wm{idx}"
-    base_ref = f"base_ref{idx}"
-    base_out = f"base{idx}"
-
-    chain = f"[{idx}:v]format=rgba,colorchannelmixer=aa={fmt_float(overlay['opacity'])}"
-    if overlay["rotate"]:
-        chain += f",rotate={overlay['rotate']}*PI/180:fillcolor=none"
-    chain += f"[{ovl_label}]"
-    filters.append(chain)
-
-    if overlay["size_mode"] == "percent":
-        size_value = fmt_float(overlay["size_value"])
-        filters.append(
-            f"[{ovl_label}][{base_label}]scale2ref=w=main_w*{size_value}/100:h=-1[{wm_label}][{base_ref}]"
-        )
-        filters.append(
-            f"[{base_ref}][{wm_label}]overlay=x={overlay['x']}:y={overlay['y']}:format=auto[{base_out}]"
-        )
+cache_dir = overlay_dir / overlay_assets.CACHE_DIRNAME
+canvas_width = None
+if any(overlay["size_mode"] == "percent" for overlay in active):
+    # Percent sizes depend on the ingest width: nginx's if the metadata is in,
+    # else the last width the admin API saw for this stream.
+    canvas_width = overlay_assets.stat_ingest_width(stream_name)
+    if canvas_width is None:
+        canvas_width = overlay_assets.read_ingest_widths(cache_dir).get(stream_name)
+# Cache lookups only: the admin API renders missing assets in the background
+# once it sees this ingest in /stat, and the next start picks them up.
+missing = 0
+for overlay in active:
+    asset = overlay_assets.cached_asset(Path(overlay["image_path"]), overlay, canvas_width, cache_dir)
+    if asset is not None:
+        overlay["asset_path"] = str(asset)
     else:
-        size_value = int(overlay["size_value"])
-        filters.append(f"[{ovl_label}]scale={size_value}:-1[{wm_label}]")
-        filters.append(
-            f"[{base_label}][{wm_label}]overlay=x={overlay['x']}:y={overlay['y']}:format=auto[{base_out}]"
-        )
-    base_label = base_out
+        missing += 1
+if missing:
+    print(f"{missing} overlay(s) not pre-rendered for width {canvas_width or 'unknown'}; using per-frame filters.", file=sys.stderr)
 
-filter_complex = ";".join(filters)
+filter_complex, base_label = overlay_assets.filter_graph(active)
 print(f"FORCE_TRANSCODE={1 if force_transcode else 0}")
 print(f"TRANSCODE_BITRATE_KBPS={transcode_bitrate}")
 print(f"TRANSCODE_MAXRATE_KBPS={transcode_maxrate}")
@@ -251,8 +241,10 @@ print(f"TRANSCODE_FPS={transcode_fps}")
 print(f"OVERLAY_COUNT={len(active)}")
 print(f"OVERLAY_VIDEO_LABEL={base_label}")
 print(f"OVERLAY_FILTER_COMPLEX={shlex.quote(filter_complex)}")
+print(f"OVERLAY_PRERENDERED={sum(1 for overlay in active if overlay.get('asset_path'))}")
 for idx, overlay in enumerate(active):
-    print(f"OVERLAY_INPUT_{idx}={shlex.quote(overlay['image_path'])}")
+    print(f"OVERLAY_INPUT_{idx}={shlex.quote(overlay.get('asset_path') or overlay['image_path'])}")
+    print(f"OVERLAY_STILL_{idx}={1 if overlay.get('asset_path') else 0}")
 PY
 )"
 
@@ -307,8 +299,15 @@ if [ "${OVERLAY_COUNT}" -gt 0 ] && [ -n "${OVERLAY_FILTER_COMPLEX}" ] && [ -n "$
             continue
         fi
         overlay_inputs_added=$((overlay_inputs_added + 1))
-        ffmpeg_cmd+=( -loop 1 -i "${overlay_path}" )
+        still_var="OVERLAY_STILL_${i}"
+        if [ "${!still_var:-0}" = "1" ]; then
+            # Pre-rendered asset: decoded once, the overlay filter holds the frame.
+            ffmpeg_cmd+=( -i "${overlay_path}" )
+        else
+            ffmpeg_cmd+=( -loop 1 -i "${overlay_path}" )
+        fi
     done
+    echo "Overlays: ${OVERLAY_COUNT} (pre-rendered: ${OVERLAY_PRERENDERED:-0})"
     if [ "${overlay_inputs_added}" -ne "${OVERLAY_COUNT}" ]; then
         echo "Overlay inputs missing; falling back to passthrough." >&2
     else
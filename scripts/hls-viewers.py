@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""Follow the HLS access log and publish a rolling viewer count.
+
+The log is tailed incrementally: only bytes appended since the last poll
+are parsed, and the active window is kept as a time-ordered deque so each
+update costs O(new lines). The follower also rotates and compresses the
+log itself once it grows past HLS_LOG_MAX_BYTES.
+
+Unique viewers are estimated with HyperLogLog sketches kept in per-second
+and per-minute rings, so 30 s, 5 min and 1 h counts (and the rendition and
+playlist breakdowns) use fixed memory. The merged window sketches are
+written to data/hls-viewers.sketch.json; `hls-viewers.py merge` combines
+sketch files from several edge nodes.
+
+Each completed minute is appended to data/hls-analytics.bin (see
+viewer_timeseries.py) for post-event reports.
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from viewer_timeseries import TimeSeriesWriter
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+LOG_FILE = ROOT_DIR / "logs" / "hls_access.log"
+OUT_FILE = ROOT_DIR / "public" / "hls-viewers.json"
+STATE_FILE = ROOT_DIR / "data" / "hls-viewers.state.json"
+SKETCH_FILE = ROOT_DIR / "data" / "hls-viewers.sketch.json"
+TIMESERIES_FILE = ROOT_DIR / "data" / "hls-analytics.bin"
+MINUTE_GRACE_SEC = 15
+WINDOW_SEC = int(os.environ.get("WINDOW_SEC", "30"))
+INTERVAL_SEC = float(os.environ.get("HLS_VIEWERS_INTERVAL", "10"))
+READ_CHUNK = 1024 * 1024
+BOOTSTRAP_BYTES = int(os.environ.get("HLS_VIEWERS_BOOTSTRAP_BYTES", str(4 * 1024 * 1024)))
+LOG_MAX_BYTES = int(os.environ.get("HLS_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+LOG_KEEP = int(os.environ.get("HLS_LOG_KEEP", "5"))
+LOG_ROTATE_RETRY_SEC = float(os.environ.get("HLS_LOG_ROTATE_RETRY_SEC", "3600"))
+HLL_PRECISION = int(os.environ.get("HLL_PRECISION", "11"))
+HLL_MAX_KEYS = int(os.environ.get("HLL_MAX_KEYS", "8"))
+HLL_WINDOWS = (("5m", 300), ("1h", 3600))
+HLL_POWERS = [2.0 ** -rank for rank in range(66)]
+
+
+def parse_line(line: bytes) -> Optional[Tuple[str, str, str, int]]:
+    parts = line.split()
+    if len(parts) < 4:
+        return None
+    try:
+        ts_str = parts[0].decode("ascii")
+        remote_ip = parts[1].decode("utf-8", "replace")
+        cf_ip = parts[2].decode("utf-8", "replace")
+        uri = parts[3].decode("utf-8", "replace")
+    except UnicodeDecodeError:
+        return None
+    ip = cf_ip if cf_ip and cf_ip != "-" else remote_ip
+    # $body_bytes_sent was added to the log format later; older lines have 4 fields.
+    sent = int(parts[4]) if len(parts) > 4 and parts[4].isdigit() else 0
+    return ts_str, ip, uri, sent
+
+
+class TimestampParser:
+    """Caches the last timestamp: nginx $time_iso8601 only changes once a second."""
+
+    def __init__(self) -> None:
+        self.last_text = ""
+        self.last_value = 0.0
+
+    def parse(self, text: str) -> Optional[float]:
+        if text == self.last_text:
+            return self.last_value
+        try:
+            ts = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        self.last_text = text
+        self.last_value = ts.timestamp()
+        return self.last_value
+
+
+class LogFollower:
+    """Reads appended lines from a log, surviving truncation and rotation.
+
+    The byte offset and inode are persisted so a restart resumes where the
+    previous process stopped instead of re-reading the whole file. Callers
+    can store extra state with the offset (save_state(extra)); after open()
+    `resumed` tells whether it applies, and `bootstrapped` whether reading
+    started mid-file at the BOOTSTRAP_BYTES tail instead.
+    """
+
+    def __init__(self, path: Path, state_path: Optional[Path] = None) -> None:
+        self.path = path
+        self.state_path = state_path
+        self.handle = None
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self.partial = b""
+        self.saved_state: dict = {}
+        self.resumed = False
+        self.bootstrapped = False
+
+    def load_state(self) -> Tuple[Optional[int], int]:
+        self.saved_state = {}
+        if self.state_path is None or not self.state_path.exists():
+            return None, 0
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+            inode, offset = int(state["inode"]), int(state["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 0
+        self.saved_state = state
+        return inode, offset
+
+    def save_state(self, extra: Optional[dict] = None) -> None:
+        if self.state_path is None or self.inode is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        offset = self.offset - len(self.partial)
+        state = {**(extra or {}), "inode": self.inode, "offset": offset}
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+
+    def open(self, resume: bool) -> bool:
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(handle.fileno())
+        offset = 0
+        self.resumed = False
+        self.bootstrapped = False
+        if resume:
+            saved_inode, saved_offset = self.load_state()
+            if saved_inode == stat.st_ino and saved_offset <= stat.st_size:
+                offset = saved_offset
+                self.resumed = True
+            else:
+                offset = max(0, stat.st_size - BOOTSTRAP_BYTES)
+                self.bootstrapped = offset > 0
+        self.close()
+        self.handle = handle
+        self.inode = stat.st_ino
+        self.offset = offset
+        self.partial = b""
+        handle.seek(offset)
+        if offset and not resume_at_line_start(handle, offset):
+            # Bootstrapped mid-file: drop the partial first line.
+            handle.readline()
+            self.offset = handle.tell()
+        return True
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = None
+
+    def drain(self) -> List[bytes]:
+        lines: List[bytes] = []
+        if self.handle is None:
+            return lines
+        while True:
+            chunk = self.handle.read(READ_CHUNK)
+            if not chunk:
+                break
+            self.offset += len(chunk)
+            data = self.partial + chunk
+            pieces = data.split(b"\n")
+            self.partial = pieces.pop()
+            lines.extend(piece for piece in pieces if piece)
+            if len(chunk) < READ_CHUNK:
+                break
+        return lines
+
+    def poll(self) -> List[bytes]:
+        if self.handle is None and not self.open(resume=True):
+            return []
+        lines = self.drain()
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return lines
+        if stat.st_ino != self.inode:
+            # Rotated by someone else: finish the old file, then start the new one.
+            lines.extend(self.drain())
+            if self.open(resume=False):
+                lines.extend(self.drain())
+        elif stat.st_size < self.offset:
+            self.handle.seek(0)
+            self.offset = 0
+            self.partial = b""
+            lines.extend(self.drain())
+        return lines
+
+    def rotate(self, keep: int) -> Tuple[List[bytes], bool]:
+        """Compress the consumed part of the log and truncate it in place.
+
+        nginx opens access logs with O_APPEND, so truncating the live file is
+        safe and needs no reload. Lines appended after the final drain below
+        and before the truncate (microseconds) are not archived. Returns the
+        drained lines and whether the log was rotated; the archives are only
+        shifted once the truncate succeeded, so a failed attempt (e.g. a
+        root-owned log the service user cannot write) changes nothing.
+        """
+        if self.handle is None:
+            return [], False
+        lines = self.drain()
+        if not os.access(self.path, os.W_OK):
+            return lines, False
+        tmp_path = self.path.with_name(f"{self.path.name}.rotate.tmp") if keep > 0 else None
+        try:
+            if tmp_path is not None:
+                with open(self.path, "rb") as source, gzip.open(tmp_path, "wb") as target:
+                    shutil.copyfileobj(source, target, READ_CHUNK)
+                lines.extend(self.drain())
+            os.truncate(self.path, 0)
+        except OSError:
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+            return lines, False
+        if tmp_path is not None:
+            archives = [self.path.with_name(f"{self.path.name}.{index}.gz") for index in range(1, keep + 1)]
+            for index in range(len(archives) - 1, 0, -1):
+                if archives[index - 1].exists():
+                    archives[index - 1].replace(archives[index])
+            tmp_path.replace(archives[0])
+        self.handle.seek(0)
+        self.offset = 0
+        self.partial = b""
+        return lines, True
+
+
+def resume_at_line_start(handle, offset: int) -> bool:
+    handle.seek(offset - 1)
+    at_start = handle.read(1) == b"\n"
+    handle.seek(offset)
+    return at_start
+
+
+def classify_uri(uri: str) -> Tuple[str, str]:
+    """Return (rendition, playlist) for an HLS request URI.
+
+    /hls/stream.m3u8 and /hls/stream-12.ts map to ("source", "stream");
+    /hls/<stream>/<variant>/seg_00001.ts maps to (<variant>, <stream>) and
+    /hls/<variant>/index.m3u8 to (<variant>, <variant>).
+    """
+    path = uri.split("?", 1)[0]
+    parts = [part for part in path.split("/") if part]
+    if len(parts) < 2:
+        return "source", "-"
+    if len(parts) == 2:
+        stem = parts[1].rsplit(".", 1)[0]
+        base = stem.rstrip("0123456789")
+        if base != stem and base.endswith(("-", "_")):
+            stem = base[:-1]
+        return "source", stem or "-"
+    return parts[-2], parts[1]
+
+
+def hash_value(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Mergeable cardinality sketch with 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytearray] = None) -> None:
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+
+    def add(self, value: str) -> None:
+        self.add_hash(hash_value(value))
+
+    def add_hash(self, hashed: int) -> None:
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def copy(self) -> "HyperLogLog":
+        return HyperLogLog(self.precision, bytearray(self.registers))
+
+    def count(self) -> int:
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(HLL_POWERS[rank] for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_text(self) -> str:
+        return base64.b64encode(bytes([self.precision]) + bytes(self.registers)).decode("ascii")
+
+    @classmethod
+    def from_text(cls, text: str) -> "HyperLogLog":
+        raw = base64.b64decode(text)
+        precision = raw[0]
+        registers = bytearray(raw[1:])
+        if len(registers) != 1 << precision:
+            raise ValueError("corrupt sketch")
+        return cls(precision, registers)
+
+
+def merge_sketches(sketches: Iterable[HyperLogLog]) -> HyperLogLog:
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+class SketchRing:
+    """One HyperLogLog per time bucket, keeping at most `buckets` of them."""
+
+    def __init__(self, bucket_sec: int, buckets: int) -> None:
+        self.bucket_sec = bucket_sec
+        self.buckets = buckets
+        self.sketches: Dict[int, HyperLogLog] = {}
+
+    def add(self, ts: float, hashed: int) -> None:
+        bucket = int(ts // self.bucket_sec)
+        sketch = self.sketches.get(bucket)
+        if sketch is None:
+            sketch = HyperLogLog()
+            self.sketches[bucket] = sketch
+        sketch.add_hash(hashed)
+
+    def prune(self, now: float) -> None:
+        oldest = int(now // self.bucket_sec) - self.buckets + 1
+        for bucket in [bucket for bucket in self.sketches if bucket < oldest]:
+            del self.sketches[bucket]
+
+    def window(self, now: float, seconds: int) -> HyperLogLog:
+        oldest = int((now - seconds) // self.bucket_sec) + 1
+        return merge_sketches(sketch for bucket, sketch in self.sketches.items() if bucket >= oldest)
+
+
+class ViewerSketches:
+    """Unique-viewer sketches for the short window, 5 min and 1 h.
+
+    Totals keep a per-second ring (short window) and a per-minute ring;
+    rendition and playlist breakdowns keep the per-minute ring only, and
+    at most HLL_MAX_KEYS values each, so memory stays bounded.
+    """
+
+    def __init__(self, window_sec: int) -> None:
+        self.window_sec = window_sec
+        self.seconds = SketchRing(1, max(window_sec, 1))
+        self.minutes = SketchRing(60, 61)
+        self.breakdowns: Dict[str, Dict[str, SketchRing]] = {"renditions": {}, "playlists": {}}
+
+    def breakdown_ring(self, dimension: str, key: str) -> SketchRing:
+        rings = self.breakdowns[dimension]
+        ring = rings.get(key)
+        if ring is None:
+            if len(rings) >= HLL_MAX_KEYS:
+                key = "other"
+                ring = rings.get(key)
+            if ring is None:
+                ring = SketchRing(60, 61)
+                rings[key] = ring
+        return ring
+
+    def add(self, ts: float, ip: str, uri: str) -> None:
+        # Hash once; every ring's sketch only needs the 64-bit value.
+        hashed = hash_value(ip)
+        self.seconds.add(ts, hashed)
+        self.minutes.add(ts, hashed)
+        rendition, playlist = classify_uri(uri)
+        self.breakdown_ring("renditions", rendition).add(ts, hashed)
+        self.breakdown_ring("playlists", playlist).add(ts, hashed)
+
+    def prune(self, now: float) -> None:
+        self.seconds.prune(now)
+        self.minutes.prune(now)
+        for rings in self.breakdowns.values():
+            for key in list(rings):
+                rings[key].prune(now)
+                if not rings[key].sketches:
+                    del rings[key]
+
+    def windows(self, now: float) -> Dict[str, HyperLogLog]:
+        merged = {f"{self.window_sec}s": self.seconds.window(now, self.window_sec)}
+        for label, seconds in HLL_WINDOWS:
+            merged[label] = self.minutes.window(now, seconds)
+        return merged
+
+    def breakdown_counts(self, now: float) -> Dict[str, Dict[str, Dict[str, int]]]:
+        result: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for dimension, rings in self.breakdowns.items():
+            result[dimension] = {
+                key: {label: ring.window(now, seconds).count() for label, seconds in HLL_WINDOWS}
+                for key, ring in sorted(rings.items())
+            }
+        return result
+
+
+class ViewerWindow:
+    """Requests seen within the last window_sec seconds."""
+
+    def __init__(self, window_sec: int) -> None:
+        self.window_sec = window_sec
+        self.entries: Deque[float] = deque()
+
+    def add(self, ts: float) -> None:
+        self.entries.append(ts)
+
+    def prune(self, now: float) -> None:
+        cutoff = now - self.window_sec
+        entries = self.entries
+        while entries and entries[0] < cutoff:
+            entries.popleft()
+
+    def summary(self) -> dict:
+        return {"requests": len(self.entries)}
+
+
+class MinuteAccumulator:
+    """Per-minute request, byte and rendition totals awaiting a store write.
+
+    Open minutes are saved with the log offset (to_state/restore), so a
+    restart continues them instead of writing what is left as a full
+    minute. After starting mid-log, skip_first() drops the first minute
+    seen, whose earlier lines were never read.
+    """
+
+    def __init__(self) -> None:
+        self.minutes: Dict[int, dict] = {}
+        self.floor: Optional[int] = None
+        self.skip_next = False
+
+    def skip_first(self) -> None:
+        self.skip_next = True
+
+    def to_state(self) -> dict:
+        return {str(minute): entry for minute, entry in self.minutes.items()}
+
+    def restore(self, state: object) -> None:
+        self.minutes = {}
+        if not isinstance(state, dict):
+            return
+        for minute, entry in state.items():
+            try:
+                self.minutes[int(minute)] = {
+                    "requests": int(entry["requests"]),
+                    "bytes": int(entry["bytes"]),
+                    "renditions": {str(name): int(count) for name, count in entry["renditions"].items()},
+                }
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+
+    def add(self, ts: float, uri: str, sent: int) -> None:
+        minute = int(ts // 60)
+        if self.skip_next:
+            self.floor = minute
+            self.skip_next = False
+        if self.floor is not None and minute <= self.floor:
+            return
+        entry = self.minutes.get(minute)
+        if entry is None:
+            entry = {"requests": 0, "bytes": 0, "renditions": {}}
+            self.minutes[minute] = entry
+        entry["requests"] += 1
+        entry["bytes"] += sent
+        rendition = classify_uri(uri)[0]
+        entry["renditions"][rendition] = entry["renditions"].get(rendition, 0) + 1
+
+    def completed(self, now: float) -> List[Tuple[int, dict]]:
+        ready = sorted(minute for minute in self.minutes if (minute + 1) * 60 + MINUTE_GRACE_SEC <= now)
+        return [(minute, self.minutes.pop(minute)) for minute in ready]
+
+
+class ViewerJob:
+    def __init__(
+        self,
+        log_file: Path,
+        out_file: Path,
+        state_file: Optional[Path],
+        window_sec: int,
+        sketch_file: Optional[Path] = None,
+        timeseries_file: Optional[Path] = None,
+    ) -> None:
+        self.follower = LogFollower(log_file, state_file)
+        self.out_file = out_file
+        self.sketch_file = sketch_file
+        self.window = ViewerWindow(window_sec)
+        self.sketches = ViewerSketches(window_sec)
+        self.timestamps = TimestampParser()
+        self.minutes = MinuteAccumulator()
+        self.timeseries = TimeSeriesWriter(timeseries_file) if timeseries_file is not None else None
+        self.rotate_after = 0.0
+
+    def ingest(self, lines: List[bytes]) -> None:
+        for line in lines:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            ts_str, ip, uri, sent = parsed
+            ts = self.timestamps.parse(ts_str)
+            if ts is None:
+                continue
+            self.window.add(ts)
+            self.sketches.add(ts, ip, uri)
+            self.minutes.add(ts, uri, sent)
+
+    def restore_minutes(self) -> None:
+        """Called right after the follower (re)opened the log, before its lines are ingested."""
+        if self.follower.resumed:
+            state = self.follower.saved_state
+            self.minutes.restore(state.get("minutes"))
+            ring = self.sketches.minutes
+            for minute, text in (state.get("minute_sketches") or {}).items():
+                try:
+                    ring.sketches[int(minute)] = HyperLogLog.from_text(text)
+                except (TypeError, ValueError, IndexError):
+                    continue
+        elif self.follower.bootstrapped:
+            self.minutes.skip_first()
+
+    def minute_state(self) -> dict:
+        sketches = self.sketches.minutes.sketches
+        return {
+            "minutes": self.minutes.to_state(),
+            "minute_sketches": {
+                str(minute): sketches[minute].to_text() for minute in self.minutes.minutes if minute in sketches
+            },
+        }
+
+    def flush_minutes(self, now: float) -> None:
+        for minute, entry in self.minutes.completed(now):
+            if self.timeseries is None:
+                continue
+            sketch = self.sketches.minutes.sketches.get(minute)
+            uniques = sketch.count() if sketch is not None else 0
+            self.timeseries.append(minute, entry["requests"], uniques, entry["bytes"], entry["renditions"])
+
+    def update(self) -> dict:
+        started = time.perf_counter()
+        opening = self.follower.handle is None
+        lines = self.follower.poll()
+        if opening and self.follower.handle is not None:
+            self.restore_minutes()
+        self.ingest(lines)
+        line_count = len(lines)
+        if LOG_MAX_BYTES > 0 and self.follower.offset >= LOG_MAX_BYTES and time.monotonic() >= self.rotate_after:
+            lines, rotated = self.follower.rotate(LOG_KEEP)
+            self.ingest(lines)
+            line_count += len(lines)
+            if not rotated:
+                # Usually a log created by nginx as root; leave it to logrotate instead of retrying every tick.
+                self.rotate_after = time.monotonic() + LOG_ROTATE_RETRY_SEC
+                print(f"cannot rotate {self.follower.path}; retrying in {LOG_ROTATE_RETRY_SEC:g}s", file=sys.stderr)
+        now = datetime.now(timezone.utc)
+        now_ts = now.timestamp()
+        self.flush_minutes(now_ts)
+        self.window.prune(now_ts)
+        self.sketches.prune(now_ts)
+        windows = self.sketches.windows(now_ts)
+        uniques = {label: sketch.count() for label, sketch in windows.items()}
+        data = {
+            "window_seconds": self.window.window_sec,
+            "viewer_ips": uniques[f"{self.window.window_sec}s"],
+            **self.window.summary(),
+            "uniques": uniques,
+            **self.sketches.breakdown_counts(now_ts),
+            "updated_at": now.isoformat(),
+        }
+        write_json(self.out_file, data)
+        if self.sketch_file is not None:
+            write_json(
+                self.sketch_file,
+                {
+                    "precision": HLL_PRECISION,
+                    "updated_at": now.isoformat(),
+                    "windows": {label: sketch.to_text() for label, sketch in windows.items()},
+                    # Job cost, exported by admin-api's /metrics.
+                    "lines": line_count,
+                    "job_ms": round((time.perf_counter() - started) * 1000, 1),
+                },
+            )
+        self.follower.save_state(self.minute_state())
+        return data
+
+
+def write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def merge_sketch_files(paths: List[str]) -> dict:
+    merged: Dict[str, HyperLogLog] = {}
+    for path in paths:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        for label, text in (payload.get("windows") or {}).items():
+            sketch = HyperLogLog.from_text(text)
+            if label in merged:
+                merged[label].merge(sketch)
+            else:
+                merged[label] = sketch
+    return {
+        "nodes": len(paths),
+        "uniques": {label: sketch.count() for label, sketch in merged.items()},
+        "windows": {label: sketch.to_text() for label, sketch in merged.items()},
+    }
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        if len(sys.argv) < 3:
+            print("Usage: hls-viewers.py merge <sketch.json> [<sketch.json> ...]")
+            return 2
+        print(json.dumps(merge_sketch_files(sys.argv[2:])))
+        return 0
+    parser = argparse.ArgumentParser(description="Publish the rolling HLS viewer count.")
+    parser.add_argument("--log", default=str(LOG_FILE))
+    parser.add_argument("--out", default=str(OUT_FILE))
+    parser.add_argument("--state", default=str(STATE_FILE))
+    parser.add_argument("--sketch", default=str(SKETCH_FILE))
+    parser.add_argument("--timeseries", default=str(TIMESERIES_FILE))
+    parser.add_argument("--window", type=int, default=WINDOW_SEC)
+    parser.add_argument("--interval", type=float, default=INTERVAL_SEC)
+    parser.add_argument("--once", action="store_true", help="read the tail of the log, write once and exit")
+    args = parser.parse_args()
+
+    state_file = None if args.once else Path(args.state)
+    timeseries_file = None if args.once else Path(args.timeseries)
+    job = ViewerJob(Path(args.log), Path(args.out), state_file, args.window, Path(args.sketch), timeseries_file)
+    if args.once:
+        job.update()
+        return 0
+    while True:
+        try:
+            job.update()
+        except OSError:
+            job.follower.close()
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
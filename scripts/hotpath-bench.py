@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Time the admin-api functions that run on every request.
+
+Loads scripts/admin-api.py and hls-viewers.py from a scratch copy of the
+tree (real data is never touched), feeds them generated fixtures (see
+bench_fixtures.py) and a local fake nginx for /stat and /control, and
+times each case for --min-time seconds. Results go to stdout and, with
+--json, to a file that --compare reads back: cases whose median got more
+than --threshold slower than in the baseline fail the run.
+
+    python3 scripts/hotpath-bench.py --json base.json
+    python3 scripts/hotpath-bench.py --compare base.json
+    python3 scripts/hotpath-bench.py --serve 18080   # only the fake nginx
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import bench_fixtures
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare_tree(target: Path) -> None:
+    shutil.copytree(ROOT_DIR / "scripts", target / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(ROOT_DIR / "config", target / "config")
+    (target / "data").mkdir()
+    (target / "public").mkdir()
+
+
+class NullWriter(io.RawIOBase):
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return len(data)
+
+
+def json_handler(api):
+    """A Handler wired to a discarding wfile, enough for _send_json()."""
+    handler = api.Handler.__new__(api.Handler)
+    handler.request_version = "HTTP/1.1"
+    handler.requestline = "GET /api/bench HTTP/1.1"
+    handler.command = "GET"
+    handler.client_address = ("127.0.0.1", 0)
+    handler.wfile = NullWriter()
+    return handler
+
+
+def measure(func, min_time: float, min_rounds: int, max_rounds: int) -> dict:
+    func()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_rounds and (len(samples) < min_rounds or time.perf_counter() < deadline):
+        started = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - started)
+    samples.sort()
+    count = len(samples)
+    return {
+        "rounds": count,
+        "mean_us": round(sum(samples) / count / 1000, 2),
+        "p50_us": round(samples[count // 2] / 1000, 2),
+        "p95_us": round(samples[min(count - 1, int(count * 0.95))] / 1000, 2),
+        "min_us": round(samples[0] / 1000, 2),
+    }
+
+
+def build_cases(api, viewers, tree: Path, args: argparse.Namespace) -> list:
+    """(name, params, items per call, callable) for every case."""
+    config = api.load_config()
+    cases = [
+        ("load_config", {}, 1, api.load_config),
+        ("load_config_cold", {}, 1, lambda: (api.invalidate_config_cache(), api.load_config())),
+        (
+            "sanitize_ticker",
+            {"items": len(config["ticker"]["items"])},
+            1,
+            lambda: api.sanitize_ticker({"ticker": config["ticker"]}, {}),
+        ),
+        (
+            "sanitize_overlays",
+            {"overlays": len(config["overlays"])},
+            1,
+            lambda: api.sanitize_overlays({"overlays": config["overlays"]}, config),
+        ),
+    ]
+    for streams in [int(value) for value in args.streams.split(",") if value.strip()]:
+        xml = bench_fixtures.make_stat_xml(streams, args.pushes)
+        cases.append(
+            (
+                "extract_stream_meta",
+                {"streams": streams, "pushes": args.pushes, "bytes": len(xml)},
+                1,
+                lambda xml=xml: api.extract_stream_meta(xml, api.STREAM_APP),
+            )
+        )
+    cases.append(("read_metrics", {}, 1, api.read_metrics))
+    if api.metrics_supported():
+        cases.append(("metrics_sample", {}, 1, api.METRICS_SAMPLER.sample))
+    handler = json_handler(api)
+    health = api.build_health_report()
+    for label, payload in (("config", config), ("health", health)):
+        cases.append(
+            (
+                "send_json",
+                {"payload": label, "bytes": len(json.dumps(payload))},
+                1,
+                lambda payload=payload: handler._send_json(payload),
+            )
+        )
+    cases.append(("build_health_report", {"streams": args.fake_streams}, 1, api.build_health_report))
+    cases.append(("fetch_rtmp_stats", {"streams": args.fake_streams}, 1, api.fetch_rtmp_stats))
+    cases.append(("trigger_reconnect", {}, 1, api.trigger_reconnect))
+    cases.append(("render_prometheus", {}, 1, api.render_prometheus))
+    route = api.INSTRUMENTATION.route("GET", "/api/health")
+    cases.append(("observe_request", {}, 1, lambda: route.observe_response(1.5, 200)))
+
+    log_path = tree / "logs" / "hls_access.log"
+    size = bench_fixtures.write_access_log(log_path, args.log_lines)
+    with open(log_path, "rb") as handle:
+        lines = handle.readlines()[: args.ingest_lines]
+    job = viewers.ViewerJob(log_path, tree / "public" / "hls-viewers.json", None, viewers.WINDOW_SEC)
+    cases.append(("hls_viewers_ingest", {"lines": len(lines)}, len(lines), lambda: job.ingest(lines)))
+    cases.append(
+        (
+            "hls_viewers_update",
+            {"log_lines": args.log_lines, "log_bytes": size},
+            1,
+            lambda: viewers.ViewerJob(log_path, tree / "public" / "hls-viewers.json", None, viewers.WINDOW_SEC).update(),
+        )
+    )
+    return cases
+
+
+def case_name(name: str, params: dict) -> str:
+    keys = [key for key in params if key != "bytes" and key != "log_bytes"]
+    if not keys:
+        return name
+    return f"{name}[{','.join(f'{key}={params[key]}' for key in keys)}]"
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(ROOT_DIR), "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout.strip()
+
+
+def compare(results: list, baseline_path: Path, threshold: float) -> int:
+    baseline = {row["name"]: row for row in json.loads(baseline_path.read_text(encoding="utf-8")).get("results", [])}
+    regressions = 0
+    for row in results:
+        base = baseline.get(row["name"])
+        if base is None or not base.get("p50_us"):
+            print(f"{row['name']:<52} new")
+            continue
+        change = row["p50_us"] / base["p50_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{row['name']:<52} {base['p50_us']:>10}us -> {row['p50_us']:>10}us {change:+7.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def serve(port: int, args: argparse.Namespace) -> int:
+    server = bench_fixtures.FakeNginx(bench_fixtures.make_stat_xml(args.fake_streams, args.pushes), port, args.latency)
+    print(f"fake nginx on {server.url} ({args.fake_streams} streams); Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark admin-api hot paths")
+    parser.add_argument("--streams", default="1,50,500", help="stat XML sizes for extract_stream_meta")
+    parser.add_argument("--pushes", type=int, default=4, help="push relays per stream")
+    parser.add_argument("--fake-streams", type=int, default=20, help="streams served by the fake nginx")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake nginx reply delay in seconds")
+    parser.add_argument("--destinations", type=int, default=32)
+    parser.add_argument("--log-lines", type=int, default=200_000)
+    parser.add_argument("--ingest-lines", type=int, default=10_000)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=200_000)
+    parser.add_argument("--only", help="regex; run matching cases only")
+    parser.add_argument("--json", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="run only the fake nginx on PORT")
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        return serve(args.serve, args)
+
+    only = re.compile(args.only) if args.only else None
+    fake = bench_fixtures.FakeNginx(bench_fixtures.make_stat_xml(args.fake_streams, args.pushes), latency=args.latency).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="hotpath-bench-") as tmp:
+            tree = Path(tmp)
+            prepare_tree(tree)
+            os.environ.update({"CONTROL_URL": fake.url, "STAT_POLL_INTERVAL": "0", "EVENTS_INTERVAL": "0"})
+            sys.path.insert(0, str(tree / "scripts"))
+            api = load_module("admin_api", tree / "scripts" / "admin-api.py")
+            viewers = load_module("hls_viewers", tree / "scripts" / "hls-viewers.py")
+            bench_fixtures.write_json(
+                api.CONFIG_PATH,
+                bench_fixtures.make_config(args.destinations, api.OVERLAY_MAX_COUNT, api.TICKER_MAX_ITEMS),
+            )
+            api.invalidate_config_cache()
+            for name, params, items, func in build_cases(api, viewers, tree, args):
+                full_name = case_name(name, params)
+                if only and not only.search(full_name):
+                    continue
+                row = {"name": full_name, "case": name, "params": params, **measure(func, args.min_time, args.min_rounds, args.max_rounds)}
+                if items > 1:
+                    row["items_per_sec"] = round(items / (row["p50_us"] / 1e6))
+                results.append(row)
+                rate = f" {row['items_per_sec']}/s" if "items_per_sec" in row else ""
+                print(f"{full_name:<52} p50={row['p50_us']:>10}us p95={row['p95_us']:>10}us rounds={row['rounds']}{rate}")
+    finally:
+        fake.stop()
+
+    if args.json:
+        meta = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "min_time": args.min_time,
+        }
+        args.json.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+    if args.compare:
+        return compare(results, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
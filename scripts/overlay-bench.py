@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Measure overlay pipeline throughput: per-frame filters vs pre-rendered assets.
+
+Encodes a synthetic source (lavfi testsrc2) with the same x264 settings as
+ffmpeg-overlay.sh, as fast as possible, for each overlay count and graph
+mode, and reports frames per second and CPU seconds. Higher fps means more
+headroom for the live pipeline, which only has to keep up with real time.
+
+    python3 scripts/overlay-bench.py --counts 0,1,4 --seconds 20
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import overlay_assets
+
+CORNERS = [
+    ("24", "24"),
+    ("main_w-overlay_w-24", "24"),
+    ("24", "main_h-overlay_h-24"),
+    ("main_w-overlay_w-24", "main_h-overlay_h-24"),
+]
+BENCH_RE = re.compile(r"bench:\s+utime=([\d.]+)s\s+stime=([\d.]+)s")
+
+
+def make_test_image(ffmpeg: str, target: Path) -> None:
+    subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=s=640x320,format=rgba",
+            "-frames:v", "1", str(target),
+        ],
+        check=True,
+    )
+
+
+def build_overlays(image: Path, count: int, args: argparse.Namespace) -> list:
+    overlays = []
+    for index in range(count):
+        x, y = CORNERS[index % len(CORNERS)]
+        overlays.append(
+            {
+                "image_path": str(image),
+                "size_mode": "percent",
+                "size_value": args.size_percent,
+                "opacity": args.opacity,
+                "rotate": args.rotate,
+                "x": x,
+                "y": y,
+            }
+        )
+    return overlays
+
+
+def run_case(ffmpeg: str, overlays: list, args: argparse.Namespace) -> dict:
+    width, height = args.size.split("x")
+    frames = args.seconds * args.fps
+    cmd = [
+        ffmpeg, "-hide_banner", "-nostats", "-benchmark", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=s={width}x{height}:r={args.fps}",
+    ]
+    for overlay in overlays:
+        if overlay.get("asset_path"):
+            cmd += ["-i", overlay["asset_path"]]
+        else:
+            cmd += ["-loop", "1", "-i", overlay["image_path"]]
+    if overlays:
+        graph, label = overlay_assets.filter_graph(overlays)
+        cmd += ["-filter_complex", graph, "-map", f"[{label}]"]
+    cmd += [
+        "-frames:v", str(frames),
+        "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-pix_fmt", "yuv420p",
+        "-b:v", f"{args.bitrate}k",
+        "-f", "null", "-",
+    ]
+    started = time.monotonic()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = time.monotonic() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "ffmpeg failed")
+    cpu = None
+    match = BENCH_RE.search(result.stderr)
+    if match:
+        cpu = round(float(match.group(1)) + float(match.group(2)), 3)
+    return {"frames": frames, "elapsed_sec": round(elapsed, 3), "fps": round(frames / elapsed, 1), "cpu_sec": cpu}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark overlay filter graphs")
+    parser.add_argument("--image", type=Path, help="overlay image (default: generated test card)")
+    parser.add_argument("--counts", default="0,1,4", help="comma separated overlay counts")
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--bitrate", type=int, default=3500)
+    parser.add_argument("--size-percent", type=float, default=18.0)
+    parser.add_argument("--opacity", type=float, default=0.8)
+    parser.add_argument("--rotate", type=int, default=8)
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args()
+
+    ffmpeg = overlay_assets.find_binary("ffmpeg")
+    if not ffmpeg:
+        print("FFmpeg not found. Install ffmpeg or set FFMPEG_BIN.", file=sys.stderr)
+        return 1
+    counts = [int(value) for value in args.counts.split(",") if value.strip()]
+    canvas_width = int(args.size.split("x")[0])
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="overlay-bench-") as tmp:
+        tmp_dir = Path(tmp)
+        image = args.image
+        if image is None:
+            image = tmp_dir / "overlay.png"
+            make_test_image(ffmpeg, image)
+        for count in counts:
+            modes = ["per-frame", "prerendered"] if count else ["none"]
+            for mode in modes:
+                overlays = build_overlays(image, count, args)
+                if mode == "prerendered":
+                    for overlay in overlays:
+                        asset = overlay_assets.ensure_asset(ffmpeg, image, overlay, canvas_width, tmp_dir / "cache")
+                        if asset is not None:
+                            overlay["asset_path"] = str(asset)
+                    if not all(overlay.get("asset_path") for overlay in overlays):
+                        print(f"Pre-render failed; skipping {count} overlay case.", file=sys.stderr)
+                        continue
+                row = {"overlays": count, "mode": mode, **run_case(ffmpeg, overlays, args)}
+                results.append(row)
+                print(
+                    f"overlays={row['overlays']:<2} mode={row['mode']:<12} fps={row['fps']:<8} "
+                    f"cpu={row['cpu_sec']}s elapsed={row['elapsed_sec']}s"
+                )
+
+    if args.json:
+        args.json.write_text(
+            json.dumps({"size": args.size, "seconds": args.seconds, "results": results}, indent=2),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
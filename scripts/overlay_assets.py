@@ -0,0 +1,259 @@
+"""Pre-rendered overlay images for the ffmpeg overlay pipeline.
+
+Opacity, rotation and scaling are applied once by a single-frame ffmpeg run
+and the result is cached under data/overlays/cache, named after the source
+image's content hash plus the render parameters. Only the admin API
+renders, when overlays are saved and when a new ingest width shows up in
+/stat. ffmpeg-overlay.sh never renders or probes: it looks the asset up
+for the ingest width nginx reports (or the width the admin last saw for
+that stream), feeds the cached PNG as a single still frame and the
+per-frame graph is a plain overlay; overlays without a cached asset keep
+the original graph.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RENDER_VERSION = 1
+CACHE_DIRNAME = "cache"
+CANVAS_WIDTH = int(os.environ.get("OVERLAY_CANVAS_WIDTH", "1920"))
+RENDER_TIMEOUT = float(os.environ.get("OVERLAY_RENDER_TIMEOUT", "20"))
+STAT_URL = os.environ.get("OVERLAY_STAT_URL", "http://127.0.0.1:8080/stat")
+STAT_TIMEOUT = float(os.environ.get("OVERLAY_STAT_TIMEOUT", "1"))
+INGEST_WIDTHS_FILENAME = "ingest-widths.json"
+CACHE_MAX_AGE = int(os.environ.get("OVERLAY_CACHE_MAX_AGE", str(7 * 86400)))
+BINARY_FALLBACKS = ("/opt/homebrew/bin", "/usr/local/bin", "/opt/local/bin", "/usr/bin")
+
+
+def default_file_mode() -> int:
+    """The mode open() gives a new file: 0o666 minus the process umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import: os.umask() can only be queried by setting it, which is not thread-safe.
+FILE_MODE = default_file_mode()
+
+
+def fmt_float(value: float) -> str:
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return text if text else "0"
+
+
+def find_binary(name: str) -> Optional[str]:
+    override = os.environ.get(f"{name.upper()}_BIN")
+    if override:
+        return override
+    found = shutil.which(name)
+    if found:
+        return found
+    for folder in BINARY_FALLBACKS:
+        candidate = Path(folder) / name
+        if os.access(candidate, os.X_OK):
+            return str(candidate)
+    return None
+
+
+def target_width(overlay: dict, canvas_width: Optional[int]) -> Optional[int]:
+    """Rendered width in pixels, or None when it depends on an unknown canvas."""
+    if overlay["size_mode"] == "px":
+        return int(overlay["size_value"])
+    if not canvas_width:
+        return None
+    # Same truncation as scale2ref's w=main_w*pct/100.
+    return max(1, int(canvas_width * float(overlay["size_value"]) / 100))
+
+
+def content_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def asset_name(digest: str, width: int, opacity: float, rotate: int) -> str:
+    params = f"v{RENDER_VERSION}|{width}|{fmt_float(opacity)}|{int(rotate)}"
+    return f"{digest[:24]}-{hashlib.sha256(params.encode('ascii')).hexdigest()[:12]}.png"
+
+
+def render_chain(overlay: dict) -> str:
+    """Opacity, then rotation, like the live graph (rotation keeps the input box)."""
+    chain = f"format=rgba,colorchannelmixer=aa={fmt_float(overlay['opacity'])}"
+    if overlay["rotate"]:
+        chain += f",rotate={overlay['rotate']}*PI/180:fillcolor=none"
+    return chain
+
+
+def render_asset(ffmpeg: str, source: Path, target: Path, overlay: dict, width: int) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=".render-", suffix=".png", dir=str(target.parent))
+    os.close(fd)
+    try:
+        subprocess.run(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                "-i", str(source),
+                "-vf", f"{render_chain(overlay)},scale={width}:-1",
+                "-frames:v", "1", "-f", "image2", "-c:v", "png", tmp_name,
+            ],
+            check=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=RENDER_TIMEOUT,
+        )
+        if os.path.getsize(tmp_name) == 0:
+            raise OSError("ffmpeg produced an empty image")
+        # mkstemp() creates 0600; ffmpeg-overlay.sh may run as the nginx worker user.
+        os.chmod(tmp_name, FILE_MODE)
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def cached_asset(source: Path, overlay: dict, canvas_width: Optional[int], cache_dir: Path) -> Optional[Path]:
+    """Path of the pre-rendered image if it is already cached; never renders."""
+    width = target_width(overlay, canvas_width)
+    if width is None:
+        return None
+    try:
+        target = cache_dir / asset_name(content_digest(source), width, overlay["opacity"], overlay["rotate"])
+        if not target.exists():
+            return None
+        os.utime(target)
+    except OSError:
+        return None
+    return target
+
+
+def ensure_asset(
+    ffmpeg: Optional[str], source: Path, overlay: dict, canvas_width: Optional[int], cache_dir: Path
+) -> Optional[Path]:
+    """Path of the pre-rendered image, rendering it on a cache miss.
+
+    Returns None when the size cannot be resolved or rendering fails, in
+    which case the caller keeps the per-frame filters. Renders take up to
+    RENDER_TIMEOUT, so this belongs in the admin API's background worker,
+    not in the publish path.
+    """
+    width = target_width(overlay, canvas_width)
+    if width is None:
+        return None
+    try:
+        target = cache_dir / asset_name(content_digest(source), width, overlay["opacity"], overlay["rotate"])
+        if target.exists():
+            os.utime(target)
+            return target
+        if not ffmpeg:
+            return None
+        render_asset(ffmpeg, source, target, overlay, width)
+        return target
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def prune_cache(cache_dir: Path, keep: Iterable[Path], max_age: int = CACHE_MAX_AGE) -> int:
+    """Remove assets that are neither kept nor used within max_age seconds."""
+    if not cache_dir.exists():
+        return 0
+    keep_names = {path.name for path in keep}
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in cache_dir.iterdir():
+        if path.name in keep_names or path.suffix != ".png" or not path.is_file():
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def stat_ingest_width(stream: str, url: str = STAT_URL, timeout: float = STAT_TIMEOUT) -> Optional[int]:
+    """meta.video.width of ingest/<stream> from nginx-rtmp /stat, or None if not known yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            root = ET.fromstring(response.read())
+    except (OSError, ValueError, ET.ParseError):
+        return None
+    for application in root.iter("application"):
+        if (application.findtext("name") or "").strip() != "ingest":
+            continue
+        for entry in application.iterfind("live/stream"):
+            if (entry.findtext("name") or "").strip() != stream:
+                continue
+            try:
+                width = int(entry.findtext("meta/video/width") or "")
+            except ValueError:
+                return None
+            return width if width > 0 else None
+    return None
+
+
+def read_ingest_widths(cache_dir: Path) -> Dict[str, int]:
+    """Last video width the admin API saw per ingest stream."""
+    try:
+        widths = json.loads((cache_dir / INGEST_WIDTHS_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(widths, dict):
+        return {}
+    return {str(name): width for name, width in widths.items() if isinstance(width, int) and width > 0}
+
+
+def write_ingest_widths(cache_dir: Path, widths: Dict[str, int]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=".widths-", suffix=".json", dir=str(cache_dir))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(widths, handle, sort_keys=True)
+        os.chmod(tmp_name, FILE_MODE)
+        os.replace(tmp_name, cache_dir / INGEST_WIDTHS_FILENAME)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def filter_graph(overlays: List[dict]) -> Tuple[str, str]:
+    """Build the filter_complex for the active overlays; input N+1 is overlay N.
+
+    Overlays carrying an "asset_path" are composited as-is and held after
+    their single frame; the rest get the per-frame opacity/rotate/scale chain.
+    """
+    filters = []
+    base_label = "0:v"
+    for idx, overlay in enumerate(overlays, start=1):
+        ovl_label = f"ovl{idx}"
+        wm_label = f"wm{idx}"
+        base_ref = f"base_ref{idx}"
+        base_out = f"base{idx}"
+        position = f"x={overlay['x']}:y={overlay['y']}"
+
+        if overlay.get("asset_path"):
+            filters.append(f"[{base_label}][{idx}:v]overlay={position}:format=auto:eof_action=repeat[{base_out}]")
+            base_label = base_out
+            continue
+
+        filters.append(f"[{idx}:v]{render_chain(overlay)}[{ovl_label}]")
+        if overlay["size_mode"] == "percent":
+            size_value = fmt_float(overlay["size_value"])
+            filters.append(f"[{ovl_label}][{base_label}]scale2ref=w=main_w*{size_value}/100:h=-1[{wm_label}][{base_ref}]")
+            filters.append(f"[{base_ref}][{wm_label}]overlay={position}:format=auto[{base_out}]")
+        else:
+            filters.append(f"[{ovl_label}]scale={int(overlay['size_value'])}:-1[{wm_label}]")
+            filters.append(f"[{base_label}][{wm_label}]overlay={position}:format=auto[{base_out}]")
+        base_label = base_out
+    return ";".join(filters), base_label
@@ -0,0 +1,216 @@
+"""On-demand CPU and memory diagnostics for the long-running admin API.
+
+Nothing here runs until an endpoint asks for it: the stack sampler is a
+loop in the requesting thread that lasts for the requested duration,
+tracemalloc is only started (and its per-allocation cost only paid)
+between start() and stop(), and thread CPU times are read from /proc when
+asked for. Profiles use the collapsed-stack format ("root;caller;callee
+count" per line) that flamegraph.pl, speedscope and inferno read directly.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+THREAD_NUMBER_RE = re.compile(r"\d+")
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def frame_label(code, labels: Dict[object, str]) -> str:
+    label = labels.get(code)
+    if label is None:
+        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def sample_stacks(duration: float, interval: float, thread_filter: str = "") -> Dict[str, object]:
+    """Sample every other thread's stack for `duration` seconds; returns collapsed stacks.
+
+    Each stack is rooted at the thread name with its numbers replaced by
+    "N", so all request threads ("Thread-N (process_request_thread)",
+    "http-worker_N") merge into one tower of the flamegraph. `thread_filter`
+    keeps only threads whose name contains it.
+    """
+    me = threading.get_ident()
+    labels: Dict[object, str] = {}
+    stacks: Counter = Counter()
+    samples = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while True:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            name = names.get(ident, f"thread-{ident}")
+            if thread_filter and thread_filter not in name:
+                continue
+            parts = []
+            while frame is not None:
+                parts.append(frame_label(frame.f_code, labels))
+                frame = frame.f_back
+            parts.append(THREAD_NUMBER_RE.sub("N", name).replace(";", ":"))
+            parts.reverse()
+            stacks[";".join(parts)] += 1
+        samples += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        time.sleep(min(interval, deadline - now))
+    return {
+        "samples": samples,
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+        "folded": "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+    }
+
+
+def thread_cpu_seconds(native_id: Optional[int]) -> Optional[float]:
+    """User + system CPU time of one thread of this process, from /proc."""
+    if native_id is None:
+        return None
+    try:
+        with open(f"/proc/self/task/{native_id}/stat", "r", encoding="utf-8") as handle:
+            raw = handle.read()
+    except OSError:
+        return None
+    # The command name may contain spaces; the fields after it are fixed.
+    fields = raw.rsplit(")", 1)[-1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def thread_cpu_report(sample_sec: float = 0.0) -> dict:
+    """CPU time per live thread; with `sample_sec` > 0 also the usage over that interval."""
+    threads = threading.enumerate()
+    before = {thread.native_id: thread_cpu_seconds(thread.native_id) for thread in threads}
+    if sample_sec > 0:
+        time.sleep(sample_sec)
+    rows: List[dict] = []
+    for thread in threads:
+        cpu = thread_cpu_seconds(thread.native_id)
+        row = {
+            "name": thread.name,
+            "native_id": thread.native_id,
+            "daemon": thread.daemon,
+            "alive": thread.is_alive(),
+            "cpu_sec": round(cpu, 2) if cpu is not None else None,
+        }
+        if sample_sec > 0:
+            start = before.get(thread.native_id)
+            row["cpu_pct"] = round((cpu - start) / sample_sec * 100, 1) if cpu is not None and start is not None else None
+        rows.append(row)
+    rows.sort(key=lambda row: row["cpu_sec"] or 0.0, reverse=True)
+    times = os.times()
+    return {
+        "supported": os.path.isdir("/proc/self/task"),
+        "process_cpu_sec": round(times.user + times.system, 2),
+        "sample_sec": sample_sec,
+        "threads": rows,
+    }
+
+
+class AllocationTracer:
+    """tracemalloc snapshots: a baseline taken at start() and the previous diff point.
+
+    diff() takes a new snapshot and compares it with the previous one (or
+    the baseline), grouped by line, file or full traceback, so repeated
+    calls show where memory grew in between.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.previous: Optional[tracemalloc.Snapshot] = None
+        self.started_at: Optional[float] = None
+
+    def start(self, frames: int) -> dict:
+        """Start tracing `frames` deep; if already tracing at another depth, restart at this one."""
+        with self.lock:
+            if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+                tracemalloc.stop()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self.started_at = time.time()
+            self.baseline = self.previous = self.take()
+            return self.status_locked()
+
+    def stop(self) -> dict:
+        with self.lock:
+            tracemalloc.stop()
+            self.baseline = self.previous = None
+            self.started_at = None
+            return self.status_locked()
+
+    def take(self) -> tracemalloc.Snapshot:
+        # Leave out tracemalloc's own bookkeeping and import machinery.
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+    def diff(self, since_baseline: bool, key_type: str, limit: int) -> dict:
+        with self.lock:
+            if not tracemalloc.is_tracing() or self.baseline is None:
+                raise RuntimeError("tracemalloc is not running")
+            current = self.take()
+            reference = self.baseline if since_baseline else self.previous
+            stats = current.compare_to(reference, key_type)
+            self.previous = current
+            status = self.status_locked()
+        return {
+            **status,
+            "since": "baseline" if since_baseline else "previous",
+            "key": key_type,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "where": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def status_locked(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "started_at": int(self.started_at) if self.started_at else None,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+        }
+
+    def status(self) -> dict:
+        with self.lock:
+            return self.status_locked()
+
+
+class StackProfiler:
+    """Allows one sampling profile at a time; a second request is refused, not queued."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+
+    def run(self, duration: float, interval: float, thread_filter: str = "") -> Dict[str, object]:
+        if not self.lock.acquire(blocking=False):
+            raise ProfilerBusyError("a profile is already running")
+        try:
+            return sample_stacks(duration, interval, thread_filter)
+        finally:
+            self.lock.release()
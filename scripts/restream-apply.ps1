@@ -17,6 +17,8 @@ $restart = ($env:RESTART_NGINX -eq "1")
 $confBefore = if (Test-Path $confFile) { Get-Content $confFile -Raw } else { "" }
 $publicHlsBefore = if (Test-Path $publicHlsConf) { Get-Content $publicHlsConf -Raw } else { "" }
 $overlayBypassBefore = if (Test-Path $overlayBypassConf) { Get-Content $overlayBypassConf -Raw } else { "" }
+# Phase markers let the admin API time each step of an apply.
+Write-Output "APPLY_PHASE generate"
 
 function Clean-Value {
     param([string]$Value)
@@ -265,8 +267,10 @@ if (-not $needsReload) {
     exit 0
 }
 
+Write-Output "APPLY_PHASE test"
 & $nginxExe -p $Root -c conf\nginx.local.conf -t | Out-Null
 
+Write-Output "APPLY_PHASE reload"
 try {
     if ($restart) {
         & $nginxExe -p $Root -c conf\nginx.local.conf -s stop | Out-Null
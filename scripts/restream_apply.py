@@ -0,0 +1,751 @@
+#!/usr/bin/env python3
+"""Apply data/restream.json to nginx and stunnel in a single process.
+
+render() builds every generated artifact from the config document in
+memory. apply() compares them with the files on disk and with what nginx
+last loaded (data/apply-state.json). It writes only the files that
+changed and runs only what those changes need: an nginx test + reload, a
+stunnel restart, or nothing. admin-api.py calls apply() in-process;
+restream-apply.sh is a thin wrapper around main() and
+restream-generate.py reuses render_restream().
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+NGINX_BIN = os.environ.get("NGINX_BIN", "/usr/local/nginx/sbin/nginx")
+STUNNEL_CONF = Path(os.environ.get("STUNNEL_CONF", "/etc/stunnel/stunnel.conf"))
+# Load tests and other scratch trees: write artifacts under --root only, never touch stunnel or nginx.
+APPLY_SANDBOX = os.environ.get("APPLY_SANDBOX", "0") == "1"
+STUNNEL_SERVICE = os.environ.get("STUNNEL_SERVICE", "stunnel4")
+STUNNEL_MARKER_BEGIN = "# BEGIN REDSTUDIO RTMPS CLIENTS"
+STUNNEL_MARKER_END = "# END REDSTUDIO RTMPS CLIENTS"
+COMMAND_TIMEOUT = float(os.environ.get("APPLY_COMMAND_TIMEOUT", "30"))
+GENERATED_HEADER = [
+    "# Auto-generated by restream-generate.py",
+    "# Do not edit manually. Edit data/restream.json instead.",
+]
+# Files nginx includes; any change to them needs a reload.
+NGINX_ARTIFACTS = ("restream.conf", "public-hls.conf", "overlay-bypass.conf")
+TICKER_BG_RE = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+
+
+class ApplyError(RuntimeError):
+    pass
+
+
+def data_paths(root: Path) -> Dict[str, Path]:
+    data_dir = root / "data"
+    return {
+        "config": data_dir / "restream.json",
+        "default": root / "config" / "restream.default.json",
+        "override": root / "config" / "restream.override.json",
+        "restream.conf": data_dir / "restream.conf",
+        "stunnel-rtmps.conf": data_dir / "stunnel-rtmps.conf",
+        "public-config.json": data_dir / "public-config.json",
+        "public-hls.conf": data_dir / "public-hls.conf",
+        "overlay-bypass.conf": data_dir / "overlay-bypass.conf",
+        "stunnel-merged": data_dir / "stunnel-rtmps.merged.conf",
+        "rtmps-ports.json": data_dir / "rtmps-ports.json",
+        "rtmps-marker": data_dir / "rtmps-enabled",
+        "state": data_dir / "apply-state.json",
+    }
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8")
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+
+def digest(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# --- restream.conf / stunnel snippet ---------------------------------------
+
+
+def clean(value: str) -> str:
+    if value is None:
+        return ""
+    value = value.strip()
+    if any(ch in value for ch in ["\n", "\r", ";"]):
+        raise ValueError("Invalid characters in value")
+    return value
+
+
+def build_push_url(base: str, key: str) -> Optional[str]:
+    if not base:
+        return None
+    if key:
+        if base.endswith("/"):
+            return base + key.lstrip("/")
+        return base + "/" + key.lstrip("/")
+    return base
+
+
+def normalize_path(path: str) -> str:
+    if not path:
+        return "/"
+    if not path.startswith("/"):
+        return "/" + path
+    return path
+
+
+def parse_rtmps(base: str) -> Optional[Tuple[str, int, str]]:
+    parts = urlsplit(base)
+    if parts.scheme.lower() != "rtmps":
+        return None
+    host = parts.hostname
+    if not host:
+        return None
+    port = parts.port or 443
+    path = normalize_path(parts.path)
+    return host, port, path
+
+
+def destination_key(dest: dict, index: int) -> str:
+    return str(dest.get("id") or dest.get("name") or f"dest-{index}")
+
+
+def destination_keys(destinations: list) -> Dict[int, str]:
+    """1-based index -> key for every destination, unique within the list.
+
+    The first destination with a given id (or name, when the id is empty)
+    keeps it as its key; repeats get "-<index>" appended so they never
+    share a tunnel port or stunnel section.
+    """
+    keys: Dict[int, str] = {}
+    seen = set()
+    for index, dest in enumerate(destinations, start=1):
+        if not isinstance(dest, dict):
+            continue
+        key = destination_key(dest, index)
+        while key in seen:
+            key = f"{key}-{index}"
+        seen.add(key)
+        keys[index] = key
+    return keys
+
+
+def tunnel_destinations(destinations: list) -> List[Tuple[str, Tuple[str, int, str]]]:
+    """(key, parsed rtmps url) for every enabled destination that needs a tunnel."""
+    keys = destination_keys(destinations)
+    tunnels = []
+    for index, dest in enumerate(destinations, start=1):
+        if not isinstance(dest, dict) or not dest.get("enabled", False):
+            continue
+        try:
+            parsed = parse_rtmps(clean(dest.get("rtmp_url", "")))
+        except ValueError:
+            continue
+        if parsed:
+            tunnels.append((keys[index], parsed))
+    return tunnels
+
+
+def allocate_tunnel_ports(destinations: list, table: Dict[str, int], base_port: int) -> Dict[str, int]:
+    """Stable destination key -> local tunnel port.
+
+    A destination keeps its port for as long as it exists, also while it
+    is disabled, so editing one destination never renumbers the others.
+    Ports of deleted destinations are freed; new tunnels take the lowest
+    free port from base_port up.
+    """
+    present = set(destination_keys(destinations).values())
+    ports: Dict[str, int] = {}
+    used = set()
+    for key, port in table.items():
+        if key in present and isinstance(port, int) and port >= base_port and port not in used:
+            ports[key] = port
+            used.add(port)
+    free_port = base_port
+    for key, _ in tunnel_destinations(destinations):
+        if key in ports:
+            continue
+        while free_port in used:
+            free_port += 1
+        ports[key] = free_port
+        used.add(free_port)
+    return ports
+
+
+def tunnel_base_port() -> int:
+    return int(os.environ.get("RTMPS_TUNNEL_BASE_PORT", "19350"))
+
+
+def read_port_table(path: Path) -> Dict[str, int]:
+    try:
+        table = json.loads(path.read_text(encoding="utf-8")).get("ports", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return table if isinstance(table, dict) else {}
+
+
+def port_table_text(ports: Dict[str, int]) -> str:
+    return json.dumps({"ports": ports}, indent=2, sort_keys=True) + "\n"
+
+
+def push_targets(data: dict, ports: Optional[Dict[str, int]] = None) -> List[dict]:
+    """One entry per push line restream.conf gets, in order.
+
+    "url" is the push URL as written in the push directive, "connect" the
+    (host, port) nginx opens its socket to (the local tunnel for RTMPS
+    destinations) and "tunnel" the (host, port, path) stunnel dials, or
+    None. `ports` comes from allocate_tunnel_ports(); without it tunnels
+    are numbered from RTMPS_TUNNEL_BASE_PORT in order.
+    """
+    destinations = data.get("destinations", [])
+    if ports is None:
+        ports = allocate_tunnel_ports(destinations, {}, tunnel_base_port())
+    keys = destination_keys(destinations)
+    targets = []
+    for index, dest in enumerate(destinations, start=1):
+        if not isinstance(dest, dict) or not dest.get("enabled", False):
+            continue
+        try:
+            base = clean(dest.get("rtmp_url", ""))
+            key = clean(dest.get("stream_key", ""))
+        except ValueError:
+            continue
+        if not base:
+            continue
+        name = keys[index]
+        tunnel = parse_rtmps(base)
+        if tunnel:
+            local_port = ports[name]
+            base = f"rtmp://127.0.0.1:{local_port}{tunnel[2]}"
+            connect = ("127.0.0.1", local_port)
+        else:
+            parts = urlsplit(base)
+            try:
+                connect = (parts.hostname or "", parts.port or 1935)
+            except ValueError:
+                connect = (parts.hostname or "", 1935)
+        push_url = build_push_url(base, key)
+        if not push_url:
+            continue
+        targets.append(
+            {
+                "key": name,
+                "name": str(dest.get("name") or name),
+                "url": push_url,
+                "connect": connect,
+                "tunnel": tunnel,
+            }
+        )
+    return targets
+
+
+def render_restream(data: dict, ports: Optional[Dict[str, int]] = None) -> Tuple[str, str]:
+    """nginx push directives and the stunnel client sections for RTMPS destinations."""
+    stunnel_sections = []
+    lines = list(GENERATED_HEADER)
+
+    for target in push_targets(data, ports):
+        if target["tunnel"]:
+            host, port, _ = target["tunnel"]
+            local_port = target["connect"][1]
+            safe_name = "".join(ch if ch.isalnum() or ch in "-_" else "-" for ch in target["key"])
+            section_name = f"rtmps-{safe_name}-{local_port}"
+            stunnel_sections.append(
+                [
+                    f"[{section_name}]",
+                    "client = yes",
+                    f"accept = 127.0.0.1:{local_port}",
+                    f"connect = {host}:{port}",
+                    f"sni = {host}",
+                    "",
+                ]
+            )
+        lines.append(f"push {target['url']};")
+
+    stunnel_lines = list(GENERATED_HEADER)
+    for section in stunnel_sections:
+        stunnel_lines.extend(section)
+    return "\n".join(lines) + "\n", "\n".join(stunnel_lines).rstrip() + "\n"
+
+
+def has_stunnel_sections(snippet: str) -> bool:
+    return any(line.startswith("[") for line in snippet.splitlines())
+
+
+def stunnel_sections(snippet: Optional[str]) -> Dict[str, str]:
+    """Section name -> section text of a generated stunnel snippet."""
+    sections: Dict[str, str] = {}
+    name = None
+    for line in (snippet or "").splitlines():
+        if line.startswith("["):
+            name = line.strip("[]")
+            sections[name] = ""
+        if name is not None and line.strip():
+            sections[name] += line + "\n"
+    return sections
+
+
+def diff_sections(old_snippet: Optional[str], new_snippet: str) -> Dict[str, List[str]]:
+    old = stunnel_sections(old_snippet)
+    new = stunnel_sections(new_snippet)
+    return {
+        "added": sorted(set(new) - set(old)),
+        "removed": sorted(set(old) - set(new)),
+        "changed": sorted(name for name in set(old) & set(new) if old[name] != new[name]),
+    }
+
+
+def merge_stunnel(conf_text: str, snippet: str) -> str:
+    """stunnel.conf with the managed client block replaced (or appended)."""
+    block = ""
+    snippet = snippet.strip()
+    if has_stunnel_sections(snippet):
+        block = "\n".join([STUNNEL_MARKER_BEGIN, snippet, STUNNEL_MARKER_END])
+    if STUNNEL_MARKER_BEGIN in conf_text and STUNNEL_MARKER_END in conf_text:
+        before, rest = conf_text.split(STUNNEL_MARKER_BEGIN, 1)
+        _, after = rest.split(STUNNEL_MARKER_END, 1)
+        return before.rstrip() + ("\n" + block + "\n" if block else "\n") + after.lstrip()
+    if conf_text and not conf_text.endswith("\n"):
+        conf_text += "\n"
+    return conf_text + (block + "\n" if block else "")
+
+
+# --- public-config.json / public-hls.conf / overlay-bypass.conf -----------
+
+
+def parse_bool(value: object, default: bool) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("1", "true", "yes", "on"):
+            return True
+        if text in ("0", "false", "no", "off"):
+            return False
+    return default
+
+
+def clamp_int(value: object, low: int, high: int, default: int) -> int:
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError):
+        number = default
+    return max(low, min(high, number))
+
+
+def one_line(value: object) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("\r", " ").replace("\n", " ").strip()
+
+
+def public_ticker(ticker: object) -> dict:
+    """The ticker as published to the player pages."""
+    if not isinstance(ticker, dict):
+        ticker = {}
+    background = "" if ticker.get("background") is None else str(ticker.get("background")).strip()
+    if not TICKER_BG_RE.match(background):
+        background = ""
+    separator = one_line(ticker.get("separator", ""))
+    if len(separator) > 6:
+        separator = separator[:6].strip()
+    separator = separator or "•"
+
+    items = []
+    items_raw = ticker.get("items")
+    for item in items_raw if isinstance(items_raw, list) else []:
+        if not isinstance(item, dict):
+            continue
+        text = one_line(item.get("text", ""))
+        html_value = "" if item.get("html") is None else str(item.get("html")).strip()
+        if not text and html_value:
+            text = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html_value)).strip()
+        if not text and not html_value:
+            continue
+        entry = {"text": text, "bold": bool(item.get("bold", False))}
+        if html_value:
+            entry["html"] = html_value
+        item_id = item.get("id")
+        if isinstance(item_id, str) and item_id.strip():
+            entry["id"] = item_id.strip()
+        items.append(entry)
+    if not items:
+        text = one_line(ticker.get("text", ""))
+        if text:
+            items = [{"text": text, "bold": False}]
+
+    legacy_text = f" {separator} ".join(item["text"] for item in items if item.get("text"))
+    if not legacy_text:
+        legacy_text = one_line(ticker.get("text", ""))
+    return {
+        "enabled": bool(ticker.get("enabled", False)),
+        "text": legacy_text,
+        "speed": clamp_int(ticker.get("speed", 32), 10, 120, 32),
+        "font_size": clamp_int(ticker.get("font_size", 14), 10, 28, 14),
+        "height": clamp_int(ticker.get("height", 40), 28, 80, 40),
+        "background": background,
+        "separator": separator,
+        "items": items,
+    }
+
+
+def overlay_active(data: dict) -> bool:
+    overlays = data.get("overlays")
+    if not isinstance(overlays, list):
+        overlay = data.get("overlay")
+        overlays = [overlay] if isinstance(overlay, dict) else []
+    for item in overlays:
+        if isinstance(item, dict) and bool(item.get("enabled")) and str(item.get("image_file", "") or "").strip():
+            return True
+    return False
+
+
+def public_config_text(data: dict, now: int) -> str:
+    payload = {
+        "public_live": bool(data.get("public_live", True)),
+        "public_hls": bool(data.get("public_hls", True)),
+        "ticker": public_ticker(data.get("ticker")),
+        "updated_at_epoch": now,
+        "updated_at": datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+    }
+    return json.dumps(payload)
+
+
+def same_public_config(current: Optional[str], rendered: str) -> bool:
+    """Equal apart from the updated_at stamps, so an unchanged config is not rewritten."""
+    if current is None:
+        return False
+    try:
+        old = json.loads(current)
+    except ValueError:
+        return False
+    new = json.loads(rendered)
+    for payload in (old, new):
+        if isinstance(payload, dict):
+            payload.pop("updated_at_epoch", None)
+            payload.pop("updated_at", None)
+    return old == new
+
+
+def render(data: dict, port_table: Dict[str, int], public_config: bool = True) -> Dict[str, str]:
+    """Every generated artifact, keyed like data_paths()."""
+    ports = allocate_tunnel_ports(data.get("destinations", []), port_table, tunnel_base_port())
+    restream_conf, stunnel_snippet = render_restream(data, ports)
+    artifacts = {
+        "restream.conf": restream_conf,
+        "stunnel-rtmps.conf": stunnel_snippet,
+        "rtmps-ports.json": port_table_text(ports),
+        "public-hls.conf": f"set $public_hls {1 if bool(data.get('public_hls', True)) else 0};\n",
+    }
+    if overlay_active(data) or parse_bool(data.get("force_transcode"), True):
+        artifacts["overlay-bypass.conf"] = "# overlay pipeline active\n"
+    else:
+        artifacts["overlay-bypass.conf"] = "push rtmp://127.0.0.1/live/stream;\n"
+    if public_config:
+        artifacts["public-config.json"] = public_config_text(data, int(time.time()))
+    return artifacts
+
+
+# --- config document --------------------------------------------------------
+
+
+def read_override(root: Path) -> dict:
+    text = read_text(data_paths(root)["override"])
+    if text is None:
+        return {}
+    overrides = json.loads(text)
+    return overrides if isinstance(overrides, dict) else {}
+
+
+def load_document(root: Path) -> dict:
+    """restream.json with config/restream.override.json merged in (and saved back)."""
+    paths = data_paths(root)
+    if not paths["config"].exists() and paths["default"].exists():
+        atomic_write_text(paths["config"], paths["default"].read_text(encoding="utf-8"))
+    text = read_text(paths["config"])
+    data = json.loads(text) if text else {}
+    overrides = read_override(root)
+    if overrides:
+        merged = {**data, **overrides}
+        if merged != data:
+            atomic_write_text(paths["config"], json.dumps(merged, indent=2))
+        data = merged
+    return data
+
+
+# --- nginx / stunnel actions ------------------------------------------------
+
+
+def find_nginx() -> Optional[str]:
+    if os.access(NGINX_BIN, os.X_OK):
+        return NGINX_BIN
+    return shutil.which("nginx")
+
+
+def is_root() -> bool:
+    return hasattr(os, "geteuid") and os.geteuid() == 0
+
+
+def has_sudo() -> bool:
+    if is_root():
+        return True
+    if not shutil.which("sudo"):
+        return False
+    try:
+        result = subprocess.run(
+            ["sudo", "-n", "true"], stdin=subprocess.DEVNULL, capture_output=True, timeout=COMMAND_TIMEOUT
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+def run(cmd: List[str], privileged: bool = False, check: bool = True) -> subprocess.CompletedProcess:
+    if privileged and not is_root():
+        cmd = ["sudo", "-n", *cmd]
+    try:
+        result = subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True, errors="replace", timeout=COMMAND_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        raise ApplyError(f"{' '.join(cmd)} timed out") from None
+    except OSError as exc:
+        raise ApplyError(f"{' '.join(cmd)}: {exc}") from None
+    if check and result.returncode != 0:
+        output = (result.stderr or result.stdout).strip().splitlines()
+        detail = output[-1] if output else f"exit status {result.returncode}"
+        raise ApplyError(f"{' '.join(cmd)} failed: {detail}")
+    return result
+
+
+def master_pid() -> Optional[int]:
+    if not shutil.which("pgrep"):
+        return None
+    result = run(["pgrep", "-o", "-f", "nginx: master"], check=False)
+    try:
+        return int(result.stdout.split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def local_nginx_running() -> bool:
+    """True for a dev nginx started with -c conf/nginx.local.conf (LOCAL_MODE=1, always on macOS)."""
+    if os.environ.get("LOCAL_MODE", "0") == "1" or sys.platform == "darwin":
+        return True
+    pid = master_pid()
+    if pid is None:
+        return False
+    result = run(["ps", "-p", str(pid), "-o", "command="], check=False)
+    return "nginx.local.conf" in result.stdout
+
+
+def stop_master(privileged: bool) -> None:
+    pid = master_pid()
+    if pid is None:
+        return
+    run(["/bin/kill", "-TERM", str(pid)], privileged=privileged, check=False)
+    for _ in range(10):
+        time.sleep(0.5)
+        if master_pid() is None:
+            break
+
+
+def reload_nginx(nginx_cmd: List[str], privileged: bool, restart: bool) -> str:
+    if restart:
+        stop_master(privileged)
+        run(nginx_cmd, privileged=privileged)
+        return "restart"
+    if run([*nginx_cmd, "-s", "reload"], privileged=privileged, check=False).returncode == 0:
+        return "reload"
+    pid = master_pid()
+    if pid is None:
+        raise ApplyError("nginx master process not found; reload failed.")
+    run(["/bin/kill", "-HUP", str(pid)], privileged=privileged)
+    return "reload"
+
+
+def reload_stunnel() -> str:
+    """Reload (SIGHUP) so untouched tunnels keep their connections; restart if that fails."""
+    if not shutil.which("systemctl"):
+        return "stunnel-unmanaged"
+    if run(["systemctl", "reload", STUNNEL_SERVICE], privileged=True, check=False).returncode == 0:
+        return "stunnel-reload"
+    run(["systemctl", "restart", STUNNEL_SERVICE], privileged=True, check=False)
+    return "stunnel-restart"
+
+
+# --- plan / apply ------------------------------------------------------------
+
+
+def read_state(path: Path) -> Dict[str, str]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def plan(root: Path, data: dict, public_config: bool = True) -> dict:
+    """What apply() would do: changed artifacts, tunnel sections, nginx reload.
+
+    A reload is needed when an nginx include differs from what nginx last
+    loaded. Without a recorded state that is the file on disk; with one it
+    also catches files written by the admin API between applies.
+    """
+    paths = data_paths(root)
+    artifacts = render(data, read_port_table(paths["rtmps-ports.json"]), public_config=public_config)
+    current = {name: read_text(paths[name]) for name in artifacts}
+    changed = []
+    for name, text in artifacts.items():
+        if name == "public-config.json":
+            if not same_public_config(current[name], text):
+                changed.append(name)
+        elif current[name] != text:
+            changed.append(name)
+    loaded = read_state(paths["state"])
+    reload_for = [
+        name for name in NGINX_ARTIFACTS if digest(artifacts[name]) != loaded.get(name, digest(current[name]))
+    ]
+    tunnels = diff_sections(current["stunnel-rtmps.conf"], artifacts["stunnel-rtmps.conf"])
+    return {"artifacts": artifacts, "changed": changed, "reload_for": reload_for, "tunnels": tunnels}
+
+
+def apply(
+    root: Path,
+    data: dict,
+    restart: bool = False,
+    public_config: bool = True,
+    on_phase: Callable[[str], None] = lambda name: None,
+) -> dict:
+    """Write changed artifacts and reload/restart only what they affect.
+
+    Returns {"changed", "reload_for", "tunnels", "actions", "messages"};
+    raises ApplyError when a required step fails.
+    """
+    on_phase("generate")
+    paths = data_paths(root)
+    planned = plan(root, data, public_config=public_config)
+    artifacts = planned["artifacts"]
+    for name in planned["changed"]:
+        atomic_write_text(paths[name], artifacts[name])
+    rtmps = has_stunnel_sections(artifacts["stunnel-rtmps.conf"])
+    if rtmps and not paths["rtmps-marker"].exists():
+        paths["rtmps-marker"].touch()
+    elif not rtmps and paths["rtmps-marker"].exists():
+        paths["rtmps-marker"].unlink()
+    result = {
+        "changed": planned["changed"],
+        "reload_for": planned["reload_for"],
+        "tunnels": planned["tunnels"],
+        "actions": [],
+        "messages": [],
+    }
+    need_reload = restart or bool(planned["reload_for"])
+
+    if APPLY_SANDBOX:
+        result["messages"].append("APPLY_SANDBOX=1: artifacts written, stunnel and nginx left alone.")
+        return result
+
+    nginx = find_nginx()
+    if not nginx:
+        result["messages"].append("NGINX binary not found. Skipping reload.")
+        return result
+
+    if has_sudo():
+        if STUNNEL_CONF.exists():
+            on_phase("stunnel")
+            conf_text = read_text(STUNNEL_CONF) or ""
+            merged = merge_stunnel(conf_text, artifacts["stunnel-rtmps.conf"])
+            if merged != conf_text:
+                atomic_write_text(paths["stunnel-merged"], merged)
+                run(["/bin/cp", str(paths["stunnel-merged"]), str(STUNNEL_CONF)], privileged=True)
+                result["actions"].append(reload_stunnel())
+        if need_reload:
+            on_phase("test")
+            run([nginx, "-t"], privileged=True)
+            on_phase("reload")
+            result["actions"].append(reload_nginx([nginx], privileged=True, restart=restart))
+    elif local_nginx_running():
+        if need_reload:
+            nginx_cmd = [nginx, "-p", str(root), "-c", "conf/nginx.local.conf"]
+            on_phase("test")
+            run([*nginx_cmd, "-t"])
+            on_phase("reload")
+            result["actions"].append(reload_nginx(nginx_cmd, privileged=False, restart=restart))
+    else:
+        raise ApplyError("sudo permissions missing for nginx reload. Run deploy to install sudoers.")
+
+    loaded = {name: digest(artifacts[name]) for name in NGINX_ARTIFACTS}
+    if read_state(paths["state"]) != loaded:
+        atomic_write_text(paths["state"], json.dumps(loaded, indent=2) + "\n")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate restream artifacts and reload nginx/stunnel as needed")
+    parser.add_argument("--root", type=Path, default=ROOT_DIR)
+    parser.add_argument("--restart", action="store_true", help="restart nginx instead of reloading (or RESTART_NGINX=1)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    args = parser.parse_args()
+    restart = args.restart or os.environ.get("RESTART_NGINX", "0") == "1"
+
+    try:
+        data = load_document(args.root)
+        if args.dry_run:
+            planned = plan(args.root, data)
+            print(json.dumps({key: planned[key] for key in ("changed", "reload_for", "tunnels")}))
+            return 0
+        # Phase markers let callers of restream-apply.sh time each step.
+        result = apply(args.root, data, restart=restart, on_phase=lambda name: print(f"APPLY_PHASE {name}", flush=True))
+    except (ApplyError, OSError, ValueError) as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    for message in result["messages"]:
+        print(message)
+    for kind in ("added", "removed", "changed"):
+        if result["tunnels"][kind]:
+            print(f"RTMPS tunnels {kind}: {', '.join(result['tunnels'][kind])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
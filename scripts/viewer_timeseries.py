@@ -0,0 +1,185 @@
+"""Append-only per-minute store for HLS viewer analytics.
+
+The file starts with a fixed header (magic, version, rendition slot names)
+followed by fixed-size little-endian records sorted by minute:
+
+    minute (u32, epoch // 60), requests (u32), uniques (u32), bytes (u64),
+    rendition hits (u32 x RENDITION_SLOTS)
+
+hls-viewers.py appends one record per completed minute; readers memory-map
+the file and binary-search the requested range, so a query only touches
+the records it aggregates.
+"""
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"RSTS"
+VERSION = 1
+RENDITION_SLOTS = 8
+SLOT_NAME_BYTES = 16
+HEADER = struct.Struct(f"<4sHHH{RENDITION_SLOTS * SLOT_NAME_BYTES}s")
+HEADER_SIZE = 64 + RENDITION_SLOTS * SLOT_NAME_BYTES
+RECORD = struct.Struct(f"<IIIQ{RENDITION_SLOTS}I")
+
+
+def encode_slot_names(names: List[str]) -> bytes:
+    raw = b""
+    for index in range(RENDITION_SLOTS):
+        name = names[index] if index < len(names) else ""
+        raw += name.encode("utf-8")[:SLOT_NAME_BYTES].ljust(SLOT_NAME_BYTES, b"\0")
+    return raw
+
+
+def decode_slot_names(raw: bytes) -> List[str]:
+    names = []
+    for index in range(RENDITION_SLOTS):
+        chunk = raw[index * SLOT_NAME_BYTES : (index + 1) * SLOT_NAME_BYTES].rstrip(b"\0")
+        if not chunk:
+            break
+        names.append(chunk.decode("utf-8", "replace"))
+    return names
+
+
+def read_header(handle) -> List[str]:
+    handle.seek(0)
+    raw = handle.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError("truncated header")
+    magic, version, record_size, slots, names = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size or slots != RENDITION_SLOTS:
+        raise ValueError("unsupported time-series file")
+    return decode_slot_names(names)
+
+
+def pack_header(names: List[str]) -> bytes:
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, RENDITION_SLOTS, encode_slot_names(names))
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+class TimeSeriesWriter:
+    """Appends minute records; minutes at or before the last record are ignored."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.slot_names: List[str] = []
+        self.last_minute = 0
+        self.open()
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists() or self.path.stat().st_size < HEADER_SIZE:
+            with open(self.path, "wb") as handle:
+                handle.write(pack_header([]))
+        with open(self.path, "r+b") as handle:
+            self.slot_names = read_header(handle)
+            size = os.fstat(handle.fileno()).st_size
+            usable = HEADER_SIZE + ((size - HEADER_SIZE) // RECORD.size) * RECORD.size
+            if usable != size:
+                # Drop a partially written trailing record.
+                handle.truncate(usable)
+            if usable > HEADER_SIZE:
+                handle.seek(usable - RECORD.size)
+                self.last_minute = RECORD.unpack(handle.read(RECORD.size))[0]
+
+    def slot_for(self, rendition: str) -> Optional[int]:
+        if rendition in self.slot_names:
+            return self.slot_names.index(rendition)
+        if len(self.slot_names) >= RENDITION_SLOTS:
+            return None
+        self.slot_names.append(rendition)
+        with open(self.path, "r+b") as handle:
+            handle.write(pack_header(self.slot_names))
+        return len(self.slot_names) - 1
+
+    def append(self, minute: int, requests: int, uniques: int, bytes_sent: int, renditions: Dict[str, int]) -> bool:
+        if minute <= self.last_minute:
+            return False
+        hits = [0] * RENDITION_SLOTS
+        for name, count in renditions.items():
+            slot = self.slot_for(name)
+            if slot is None:
+                slot = RENDITION_SLOTS - 1
+            hits[slot] += count
+        record = RECORD.pack(minute, requests, uniques, bytes_sent, *hits)
+        with open(self.path, "ab") as handle:
+            handle.write(record)
+        self.last_minute = minute
+        return True
+
+
+def find_record(view: mmap.mmap, count: int, minute: int) -> int:
+    """Index of the first record whose minute is >= `minute`."""
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from("<I", view, HEADER_SIZE + middle * RECORD.size)[0] < minute:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def query_range(path: Path, start: int, end: int, step: int) -> dict:
+    """Aggregate records between start and end (epoch seconds) into step buckets.
+
+    requests, bytes and rendition hits are summed per step; uniques reports
+    the peak per-minute estimate within the step, since sketch counts cannot
+    be added.
+    """
+    step = max(60, (step // 60) * 60)
+    start = (start // step) * step
+    end = max(start + step, end)
+    buckets = (end - start + step - 1) // step
+    requests = [0] * buckets
+    uniques = [0] * buckets
+    bytes_sent = [0] * buckets
+    slot_names: List[str] = []
+    hits: List[List[int]] = []
+    if path.exists() and path.stat().st_size > HEADER_SIZE:
+        with open(path, "rb") as handle:
+            slot_names = read_header(handle)
+            hits = [[0] * buckets for _ in slot_names]
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                count = (len(view) - HEADER_SIZE) // RECORD.size
+                index = find_record(view, count, start // 60)
+                end_minute = end // 60
+                offset = HEADER_SIZE + index * RECORD.size
+                while index < count:
+                    record = RECORD.unpack_from(view, offset)
+                    minute = record[0]
+                    if minute >= end_minute:
+                        break
+                    bucket = (minute * 60 - start) // step
+                    requests[bucket] += record[1]
+                    if record[2] > uniques[bucket]:
+                        uniques[bucket] = record[2]
+                    bytes_sent[bucket] += record[3]
+                    for slot in range(len(slot_names)):
+                        hits[slot][bucket] += record[4 + slot]
+                    index += 1
+                    offset += RECORD.size
+    return {
+        "start": start,
+        "end": end,
+        "step_sec": step,
+        "t": [start + bucket * step for bucket in range(buckets)],
+        "requests": requests,
+        "uniques_peak": uniques,
+        "bytes": bytes_sent,
+        "renditions": dict(zip(slot_names, hits)),
+    }
+
+
+def minute_range(path: Path) -> Optional[Tuple[int, int]]:
+    if not path.exists() or path.stat().st_size < HEADER_SIZE + RECORD.size:
+        return None
+    with open(path, "rb") as handle:
+        read_header(handle)
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            count = (len(view) - HEADER_SIZE) // RECORD.size
+            first = struct.unpack_from("<I", view, HEADER_SIZE)[0]
+            last = struct.unpack_from("<I", view, HEADER_SIZE + (count - 1) * RECORD.size)[0]
+    return first * 60, last * 60